@@ -9,19 +9,28 @@ const COLOR = {
   text: getCssVar("--text") || "#f8fafc",
 };
 
-// Data endpoints (all local JSON produced by scripts/preprocess_data.py).
+// Data endpoints (all local JSON produced by scripts/preprocess_data.py). These are logical names:
+// fetchJSON resolves each through data/processed/assets.json to its content-hashed copy when available.
+const DATA_ROOT = "data/processed/";
+const DATA_ASSETS = `${DATA_ROOT}assets.json`;
 const DATA_PATHS = {
   businessZip: "data/processed/business_by_zip.json",
   businessNeighborhoods: "data/processed/business_neighborhoods.json",
   neighborhoodCentroids: "data/processed/neighborhood_centroids.json",
   parks: "data/processed/parks.json",
   parkAcres: "data/processed/park_acres_by_district.json",
+  parkShapes: "data/processed/park_shapes.json",
   facilities: "data/processed/facilities.json",
   facilityCounts: "data/processed/facility_counts_by_district.json",
   housing: "data/processed/housing_burden.json",
   rentTrend: "data/processed/rent_trend.json",
   rentZip: "data/processed/rent_by_zip.json",
+  rentZipSummary: "data/processed/rent_by_zip.summary.json",
+  zipShards: "data/processed/zips",
   addressPoints: "data/processed/address_points.json",
+  addressSearch: "data/processed/address_points.search.json",
+  accessibilityZip: "data/processed/accessibility_by_zip.json",
+  addressAccessibility: "data/processed/address_accessibility.json",
   schools: "data/processed/schools.json",
   schoolCounts: "data/processed/school_counts_by_zip.json",
 };
@@ -115,16 +124,22 @@ const sharedState = {
   rentEntries: [],
   rentControls: null,
   rentZipEntries: [],
+  zipShardManifest: null,
+  zipShards: new Map(),
+  accessByZip: new Map(),
+  addressAccess: null,
+  dataAssets: {},
   maps: {},
   activeZip: null,
   zipFocusMarkers: {},
   zipList: [],
   neighborhoodCentroids: new Map(),
-  addressPoints: [],
+  addressPoints: null,
+  addressSearch: null,
   addressMarker: null,
-  parks: [],
-  facilities: [],
-  schools: [],
+  parks: null,
+  facilities: null,
+  schools: null,
   schoolCountsByZip: new Map(),
   citywideBusinessStats: null,
   shareRanking: [],
@@ -166,6 +181,7 @@ async function init() {
   }
 
   try {
+    await loadDataAssets();
     const [
       businessZip,
       businessNeighborhoods,
@@ -176,20 +192,28 @@ async function init() {
       rentTrend,
       rentZip,
       addressPoints,
-      schools,
       schoolCounts,
+      addressSearch,
+      zipShardManifest,
+      accessibilityZip,
     ] = await Promise.all([
       fetchJSON(DATA_PATHS.businessZip),
       fetchJSON(DATA_PATHS.businessNeighborhoods),
       fetchJSON(DATA_PATHS.neighborhoodCentroids),
-      fetchJSON(DATA_PATHS.parks),
-      fetchJSON(DATA_PATHS.facilities),
+      fetchPointLayer(DATA_PATHS.parks),
+      fetchPointLayer(DATA_PATHS.facilities),
       fetchJSON(DATA_PATHS.housing),
       fetchJSON(DATA_PATHS.rentTrend),
-      fetchJSON(DATA_PATHS.rentZip),
-      fetchJSON(DATA_PATHS.addressPoints),
-      fetchJSON(DATA_PATHS.schools),
+      // Histories live in the per-ZIP shards; the full file is the fallback for older builds.
+      fetchJSON(DATA_PATHS.rentZipSummary).catch(() => fetchJSON(DATA_PATHS.rentZip)),
+      fetchPointLayer(DATA_PATHS.addressPoints),
       fetchJSON(DATA_PATHS.schoolCounts),
+      // Optional: without the index, address lookups scan every point.
+      fetchJSON(DATA_PATHS.addressSearch).catch(() => null),
+      // Optional: without the manifest, the ZIP card skips rent history and school detail.
+      fetchJSON(`${DATA_PATHS.zipShards}/manifest.json`).catch(() => null),
+      // Optional: without it, the ZIP card leaves out walk access to parks, facilities and schools.
+      fetchJSON(DATA_PATHS.accessibilityZip).catch(() => null),
     ]);
 
     const centroidLookup = new Map(
@@ -199,15 +223,20 @@ async function init() {
     sharedState.businessZipLookup = new Map(businessZip.entries.map((entry) => [entry.zip, entry]));
     sharedState.neighborhoodCentroids = centroidLookup;
     sharedState.zipList = businessZip.entries.map((entry) => entry.zip).sort();
-    sharedState.addressPoints = addressPoints.entries || [];
-    sharedState.parks = parks.entries || [];
-    sharedState.facilities = facilities.entries || [];
-    sharedState.schools = schools.entries || [];
+    sharedState.addressPoints = addressPoints;
+    sharedState.addressSearch =
+      addressSearch?.format === "search" && addressSearch.count === addressPoints.length
+        ? new SearchIndex(addressSearch)
+        : null;
+    sharedState.parks = parks;
+    sharedState.facilities = facilities;
+    sharedState.zipShardManifest = zipShardManifest?.format === "zip_shards" ? zipShardManifest : null;
     sharedState.schoolCountsByZip = new Map((schoolCounts.entries || []).map((entry) => [entry.zip, entry]));
+    sharedState.accessByZip = new Map((accessibilityZip?.entries || []).map((entry) => [entry.zip, entry]));
     sharedState.dataReady = true;
 
-    createHookMaps(parks.entries, businessNeighborhoods.entries, centroidLookup, businessZip.total_businesses);
-    createResourceMap(parks.entries, businessNeighborhoods.entries, centroidLookup, facilities.entries);
+    createHookMaps(parks, businessNeighborhoods.entries, centroidLookup, businessZip.total_businesses);
+    createResourceMap(parks, businessNeighborhoods.entries, centroidLookup, facilities);
     renderBusinessZipChart(businessZip);
     renderBusinessZipLollipop(businessZip);
     renderBusinessZipComparison();
@@ -220,6 +249,16 @@ async function init() {
     updateTourStatus(TOUR_STATUS_DEFAULT);
     updateTourNarration(TOUR_NARRATION_DEFAULT);
     showTourHint();
+
+    // The full school layer is only needed for the resource map and nearest-school lookups,
+    // so the layer loads after first paint instead of holding it up.
+    fetchPointLayer(DATA_PATHS.schools)
+      .then((schools) => {
+        sharedState.schools = schools;
+        drawSchoolLayer(sharedState.maps.resource, schools);
+      })
+      .catch((error) => console.error(error));
+    subscribeToRebuilds();
   } catch (error) {
     console.error(error);
     showTooltip(window.innerWidth / 2, window.innerHeight / 2, "Failed to load the data. Refresh to try again.");
@@ -228,6 +267,81 @@ async function init() {
   }
 }
 
+// Live reload: with serve.py and `preprocess_data.py --watch` running, each rebuild arrives as a
+// server-sent event listing the output files whose content changed. Charts fed by those files are
+// refetched and redrawn in place; files behind the Leaflet layers and address index reload the page.
+const LIVE_UPDATES = {
+  businessZip: (payload) => {
+    sharedState.businessZipLookup = new Map(payload.entries.map((entry) => [entry.zip, entry]));
+    sharedState.zipList = payload.entries.map((entry) => entry.zip).sort();
+    sharedState.businessBarNodes.clear();
+    sharedState.businessLollipopNodes.clear();
+    renderBusinessZipChart(payload);
+    renderBusinessZipLollipop(payload);
+    renderBusinessZipComparison();
+  },
+  housing: (payload) => renderHousingBurdenChart(payload),
+  rentTrend: (payload) => renderRentTrendChart(payload.entries),
+  rentZipSummary: (payload) => {
+    sharedState.maps.rent?.remove();
+    delete sharedState.maps.rent;
+    renderRentZipMap(payload);
+  },
+  schoolCounts: (payload) => {
+    sharedState.schoolCountsByZip = new Map((payload.entries || []).map((entry) => [entry.zip, entry]));
+  },
+  accessibilityZip: (payload) => {
+    sharedState.accessByZip = new Map((payload.entries || []).map((entry) => [entry.zip, entry]));
+  },
+};
+const LIVE_RELOAD = ["businessNeighborhoods", "neighborhoodCentroids", "addressSearch"];
+const LIVE_RELOAD_LAYERS = ["parks", "parkShapes", "facilities", "schools", "addressPoints"];
+
+function subscribeToRebuilds() {
+  if (typeof EventSource === "undefined") return;
+  const source = new EventSource("/api/events");
+  let opened = false;
+  source.addEventListener("open", () => {
+    opened = true;
+  });
+  // Static hosting has no event stream; stop after the first failed attempt instead of retrying.
+  source.addEventListener("error", () => {
+    if (!opened) source.close();
+  });
+  source.addEventListener("change", (event) => {
+    applyRebuild(JSON.parse(event.data)).catch((error) => console.error(error));
+  });
+}
+
+async function applyRebuild(change) {
+  await loadDataAssets();
+  const processed = (key) => DATA_PATHS[key].replace("data/processed/", "");
+  const updates = Object.keys(LIVE_UPDATES).filter((key) => change.changed?.includes(processed(key)));
+  const layerStems = LIVE_RELOAD_LAYERS.map((key) => processed(key).replace(/\.json$/, ""));
+  const needsReload = (change.changed || []).some(
+    (name) =>
+      LIVE_RELOAD.some((key) => name === processed(key)) ||
+      layerStems.some((stem) => name.startsWith(`${stem}.`) || name.startsWith(`tiles/${stem}/`))
+  );
+  if (needsReload) {
+    window.location.reload();
+    return;
+  }
+
+  const payloads = await Promise.all(updates.map((key) => fetchJSON(DATA_PATHS[key], { cache: "no-cache" })));
+  updates.forEach((key, i) => LIVE_UPDATES[key](payloads[i]));
+  const shardsChanged = (change.stages || []).includes("zip_shards");
+  if (shardsChanged) {
+    sharedState.zipShards.clear();
+    const manifest = await fetchJSON(`${DATA_PATHS.zipShards}/manifest.json`, { cache: "no-cache" }).catch(() => null);
+    sharedState.zipShardManifest = manifest?.format === "zip_shards" ? manifest : null;
+  }
+  const activeEntry = sharedState.activeZip ? sharedState.businessZipLookup.get(sharedState.activeZip) : null;
+  if (activeEntry && (updates.length || shardsChanged)) {
+    renderZipSummary(activeEntry);
+  }
+}
+
 function attachNavListeners() {
   // Smooth-scroll to sections and sync nav button active state.
   document.querySelectorAll(".story-nav button").forEach((button) => {
@@ -266,12 +380,223 @@ function initSectionObserver() {
   observerTargets.forEach((target) => observer.observe(target));
 }
 
-async function fetchJSON(url) {
-  const response = await fetch(url);
+async function fetchJSON(url, init) {
+  const response = await fetch(resolveDataPath(url), init);
   if (!response.ok) throw new Error(`Failed to load ${url}`);
   return response.json();
 }
 
+// Map a data/processed path to its content-hashed copy (scripts/asset_manifest.py), if listed.
+function resolveDataPath(url) {
+  if (!url.startsWith(DATA_ROOT)) return url;
+  const hashed = sharedState.dataAssets[url.slice(DATA_ROOT.length)];
+  return hashed ? DATA_ROOT + hashed : url;
+}
+
+// The asset map itself is always revalidated; without it every file loads under its plain name.
+async function loadDataAssets() {
+  const manifest = await fetch(DATA_ASSETS, { cache: "no-cache" })
+    .then((response) => (response.ok ? response.json() : null))
+    .catch(() => null);
+  sharedState.dataAssets = manifest?.format === "assets" ? manifest.files || {} : {};
+}
+
+// Point dataset held column-wise: lat/lon interleaved in one typed array (float32 as stored in
+// the columnar copy, float64 from row JSON so its coordinates stay exact), categorical
+// fields as integer codes into a string table, other fields as plain arrays.
+class PointLayer {
+  constructor(length, coords, columns) {
+    this.length = length;
+    this.coords = coords;
+    this.columns = columns;
+    this.grid = null; // GridIndex, attached by fetchPointLayer when available
+    this.tiles = null; // { url, meta } of the layer's cluster tiles, likewise
+  }
+
+  // Decode a <layer>.columnar.json payload (see scripts/columnar.py).
+  static fromColumnar(payload) {
+    const length = payload.count || 0;
+    const coordBytes = decodeBase64(payload.coordinates.data);
+    const coords = readLittleEndian(coordBytes, "float32", length * 2);
+    const columns = {};
+    Object.entries(payload.columns || {}).forEach(([name, column]) => {
+      columns[name] = column.codes
+        ? { table: column.table, codes: readLittleEndian(decodeBase64(column.codes), column.dtype, length) }
+        : { values: column.values };
+    });
+    return new PointLayer(length, coords, columns);
+  }
+
+  // Build the same shape from row-oriented `{entries: [...]}` JSON.
+  static fromEntries(entries) {
+    const coords = new Float64Array(entries.length * 2);
+    const columns = {};
+    entries.forEach((entry, index) => {
+      coords[index * 2] = entry.coordinates?.lat ?? NaN;
+      coords[index * 2 + 1] = entry.coordinates?.lon ?? NaN;
+      Object.keys(entry).forEach((name) => {
+        if (name === "coordinates") return;
+        if (!columns[name]) columns[name] = { values: new Array(entries.length).fill(null) };
+        columns[name].values[index] = entry[name];
+      });
+    });
+    return new PointLayer(entries.length, coords, columns);
+  }
+
+  lat(index) {
+    return this.coords[index * 2];
+  }
+
+  lon(index) {
+    return this.coords[index * 2 + 1];
+  }
+
+  // True when the point has usable (non-zero, non-NaN) coordinates.
+  hasLocation(index) {
+    return Boolean(this.lat(index)) && Boolean(this.lon(index));
+  }
+
+  value(name, index) {
+    const column = this.columns[name];
+    if (!column) return undefined;
+    return column.codes ? column.table[column.codes[index]] : column.values[index];
+  }
+
+  // Materialize one point as a plain record (coordinates rounded back to 6 decimals).
+  record(index) {
+    const record = {};
+    Object.keys(this.columns).forEach((name) => {
+      record[name] = this.value(name, index);
+    });
+    record.coordinates = {
+      lat: Math.round(this.lat(index) * 1e6) / 1e6,
+      lon: Math.round(this.lon(index) * 1e6) / 1e6,
+    };
+    return record;
+  }
+}
+
+function decodeBase64(text) {
+  const binary = atob(text || "");
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i += 1) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return bytes;
+}
+
+// Read `length` little-endian numbers of `dtype` regardless of platform byte order.
+function readLittleEndian(bytes, dtype, length) {
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  const readers = {
+    uint8: [Uint8Array, (offset) => view.getUint8(offset), 1],
+    uint16: [Uint16Array, (offset) => view.getUint16(offset, true), 2],
+    uint32: [Uint32Array, (offset) => view.getUint32(offset, true), 4],
+    float32: [Float32Array, (offset) => view.getFloat32(offset, true), 4],
+  };
+  const [ArrayType, read, size] = readers[dtype];
+  const result = new ArrayType(length);
+  for (let i = 0; i < length; i += 1) {
+    result[i] = read(i * size);
+  }
+  return result;
+}
+
+// Uniform lat/lon grid over a PointLayer (see scripts/spatial_index.py): point indexes
+// grouped by cell, so nearest-point queries only visit the cells around the query.
+class GridIndex {
+  constructor(payload) {
+    this.cellDeg = payload.cell_deg;
+    this.originLat = payload.origin_lat;
+    this.originLon = payload.origin_lon;
+    this.rows = payload.rows;
+    this.cols = payload.cols;
+    this.offsets = readLittleEndian(decodeBase64(payload.offsets), "uint32", this.rows * this.cols + 1);
+    this.points = readLittleEndian(decodeBase64(payload.points), "uint32", this.offsets[this.rows * this.cols]);
+  }
+
+  // k nearest located points of `layer` as `{ index, distanceKm }`, closest first
+  // (ties in layer order, as a full scan would give).
+  nearest(layer, coords, limit) {
+    const row = Math.floor((coords.lat - this.originLat) / this.cellDeg);
+    const col = Math.floor((coords.lon - this.originLon) / this.cellDeg);
+    const lastRing = Math.max(row, this.rows - 1 - row, col, this.cols - 1 - col);
+    const kmPerDegLat = (Math.PI / 180) * 6371;
+    const maxAbsLat = Math.max(
+      Math.abs(coords.lat),
+      Math.abs(this.originLat),
+      Math.abs(this.originLat + this.rows * this.cellDeg)
+    );
+    const kmPerDegLon = kmPerDegLat * Math.cos((Math.min(maxAbsLat, 89) * Math.PI) / 180);
+    const byDistance = (a, b) => a.distanceKm - b.distanceKm || a.index - b.index;
+    let results = [];
+
+    const visitCell = (cellRow, cellCol) => {
+      if (cellRow < 0 || cellRow >= this.rows || cellCol < 0 || cellCol >= this.cols) return;
+      const cell = cellRow * this.cols + cellCol;
+      for (let k = this.offsets[cell]; k < this.offsets[cell + 1]; k += 1) {
+        const index = this.points[k];
+        if (!layer.hasLocation(index)) continue;
+        results.push({ index, distanceKm: haversineDistance(coords.lat, coords.lon, layer.lat(index), layer.lon(index)) });
+      }
+    };
+
+    for (let ring = 0; ring <= lastRing; ring += 1) {
+      const top = Math.max(row - ring, 0);
+      const bottom = Math.min(row + ring, this.rows - 1);
+      for (let cellRow = top; cellRow <= bottom; cellRow += 1) {
+        if (cellRow === row - ring || cellRow === row + ring) {
+          const left = Math.max(col - ring, 0);
+          const right = Math.min(col + ring, this.cols - 1);
+          for (let cellCol = left; cellCol <= right; cellCol += 1) visitCell(cellRow, cellCol);
+        } else {
+          visitCell(cellRow, col - ring);
+          if (ring) visitCell(cellRow, col + ring);
+        }
+      }
+      if (results.length < limit) continue;
+      results.sort(byDistance);
+      results = results.slice(0, limit);
+      // Anything not yet visited lies beyond the edge of the (2 * ring + 1)^2 block of cells.
+      const reachKm = Math.min(
+        (coords.lat - (this.originLat + (row - ring) * this.cellDeg)) * kmPerDegLat,
+        (this.originLat + (row + ring + 1) * this.cellDeg - coords.lat) * kmPerDegLat,
+        (coords.lon - (this.originLon + (col - ring) * this.cellDeg)) * kmPerDegLon,
+        (this.originLon + (col + ring + 1) * this.cellDeg - coords.lon) * kmPerDegLon
+      );
+      if (results[limit - 1].distanceKm <= reachKm) break;
+    }
+    return results.sort(byDistance).slice(0, limit);
+  }
+}
+
+// Load a point layer, preferring the columnar copy written by `preprocess_data.py --columnar`
+// and falling back to the row JSON when it is absent or unreadable. The layer's spatial
+// grid is attached when available; nearest-point queries fall back to a full scan without it.
+// Likewise its cluster tiles (`tiles/<layer>/`), without which maps draw every point.
+async function fetchPointLayer(url) {
+  const gridRequest = fetchJSON(url.replace(/\.json$/, ".grid.json")).catch(() => null);
+  const slash = url.lastIndexOf("/");
+  const tilesUrl = `${url.slice(0, slash)}/tiles/${url.slice(slash + 1).replace(/\.json$/, "")}`;
+  const tilesRequest = fetchJSON(`${tilesUrl}/meta.json`).catch(() => null);
+  let layer = null;
+  try {
+    const payload = await fetchJSON(url.replace(/\.json$/, ".columnar.json"));
+    if (payload?.format === "columnar") layer = PointLayer.fromColumnar(payload);
+  } catch (error) {
+    // No columnar copy; use the row JSON below.
+  }
+  if (!layer) {
+    const payload = await fetchJSON(url);
+    layer = PointLayer.fromEntries(payload.entries || []);
+  }
+  const grid = await gridRequest;
+  if (grid?.format === "grid") layer.grid = new GridIndex(grid);
+  const tiles = await tilesRequest;
+  if (tiles?.format === "tiles") layer.tiles = { url: tilesUrl, meta: tiles };
+  return layer;
+}
+
 function createLeafletMap(containerId, options = {}) {
   // Factory to create a map with consistent tiles/controls and reuse the element for later fits.
   const defaultOptions = {
@@ -330,40 +655,35 @@ function createHookMaps(parks, businessNeighborhoods, centroidLookup, totalBusin
     return COLOR.parkSmall;
   };
 
-  const parkMarkers = [];
-  const parkLatLngs = [];
-  parks
-    .filter((park) => park.coordinates?.lat && park.coordinates?.lon)
-    .forEach((park) => {
-      const radius = Math.min(32, 8 + Math.sqrt(park.acres || 0) * 1.8);
-      const marker = L.circleMarker([park.coordinates.lat, park.coordinates.lon], {
-        radius: radius || 4,
-        color: "#0f172a",
-        fillColor: parkCategoryColor(park.category),
-        fillOpacity: 0.8,
-        weight: 1.3,
-      });
-      const mapLinks = buildMapLinks(park.coordinates.lat, park.coordinates.lon);
-      marker
-        .bindTooltip(
-          `<strong>${park.name}</strong><br>${park.category}<br>${park.acres.toLocaleString()} acres`,
-          { direction: "top" }
-        )
-        .bindPopup(
-          `<strong>${park.name}</strong><br>${park.category}<br>${park.acres.toLocaleString()} acres${mapLinks}`,
-          { maxWidth: 260 }
-        );
-      marker.addTo(parksMap);
-      parkMarkers.push(marker);
-      const latlng = L.latLng(park.coordinates.lat, park.coordinates.lon);
-      if (isWithinSFBounds(latlng.lat, latlng.lng)) {
-        parkLatLngs.push(latlng);
-      }
+  const drawPark = (index) => {
+    const park = parks.record(index);
+    const radius = Math.min(32, 8 + Math.sqrt(park.acres || 0) * 1.8);
+    const marker = L.circleMarker([park.coordinates.lat, park.coordinates.lon], {
+      radius: radius || 4,
+      color: "#0f172a",
+      fillColor: parkCategoryColor(park.category),
+      fillOpacity: 0.8,
+      weight: 1.3,
     });
+    const mapLinks = buildMapLinks(park.coordinates.lat, park.coordinates.lon);
+    return marker
+      .bindTooltip(
+        `<strong>${park.name}</strong><br>${park.category}<br>${park.acres.toLocaleString()} acres`,
+        { direction: "top" }
+      )
+      .bindPopup(
+        `<strong>${park.name}</strong><br>${park.category}<br>${park.acres.toLocaleString()} acres${mapLinks}`,
+        { maxWidth: 260 }
+      );
+  };
+  drawPointLayer(parksMap, L.layerGroup().addTo(parksMap), parks, drawPark, { color: COLOR.park, noun: "parks" });
+  drawParkShapes(parksMap, parkCategoryColor).catch((error) => console.error(error));
 
-  if (parkMarkers.length) {
-    const fitPoints = parkLatLngs.length ? parkLatLngs : parkMarkers.map((marker) => marker.getLatLng());
-    parksMap.fitBounds(L.latLngBounds(fitPoints).pad(0.15));
+  const parkBounds = L.latLngBounds([]);
+  const parkCityBounds = L.latLngBounds([]);
+  extendPointBounds(parks, parkBounds, parkCityBounds);
+  if (parkBounds.isValid()) {
+    parksMap.fitBounds((parkCityBounds.isValid() ? parkCityBounds : parkBounds).pad(0.15));
   }
 
   const businessEntries = businessNeighborhoods
@@ -426,6 +746,145 @@ function createHookMaps(parks, businessNeighborhoods, centroidLookup, totalBusin
   });
 }
 
+// Draw every located point of `layer` into `group` with `drawPoint(index)`, or, when the layer has
+// precomputed cluster tiles, only the tiles covering the current view.
+function drawPointLayer(map, group, layer, drawPoint, style) {
+  if (layer.tiles) {
+    attachClusterTiles(map, group, layer.tiles, drawPoint, style);
+    return;
+  }
+  for (let i = 0; i < layer.length; i += 1) {
+    if (layer.hasLocation(i)) drawPoint(i).addTo(group);
+  }
+}
+
+// Redraw `group` from cluster tiles (see scripts/cluster_tiles.py) after every pan or zoom. Clusters
+// listing their points are drawn as real markers; larger ones as count bubbles that zoom in on click.
+function attachClusterTiles(map, group, tiles, drawPoint, style) {
+  const { url, meta } = tiles;
+  const available = new Map(Object.entries(meta.tiles).map(([zoom, keys]) => [Number(zoom), new Set(keys)]));
+  const cache = new Map();
+  let generation = 0;
+
+  const loadTile = (key) => {
+    if (!cache.has(key)) {
+      cache.set(key, fetchJSON(`${url}/${key}.json`).catch(() => ({ clusters: [] })));
+    }
+    return cache.get(key);
+  };
+
+  const drawCluster = (cluster) =>
+    L.circleMarker([cluster.lat, cluster.lon], {
+      radius: Math.min(30, 8 + Math.log2(cluster.count) * 3),
+      color: "#0f172a",
+      fillColor: style.color,
+      fillOpacity: 0.7,
+      weight: 1.2,
+    })
+      .bindTooltip(`${cluster.count.toLocaleString()} ${style.noun}`, { direction: "top" })
+      .on("click", () => map.setView([cluster.lat, cluster.lon], Math.min(map.getZoom() + 2, meta.max_zoom)));
+
+  const redraw = async () => {
+    const current = ++generation;
+    const zoom = Math.max(meta.min_zoom, Math.min(meta.max_zoom, Math.round(map.getZoom())));
+    const view = map.getBounds();
+    const northWest = map.project(view.getNorthWest(), zoom).divideBy(meta.tile_size).floor();
+    const southEast = map.project(view.getSouthEast(), zoom).divideBy(meta.tile_size).floor();
+    const keys = available.get(zoom) || new Set();
+    const requests = [];
+    for (let x = northWest.x; x <= southEast.x; x += 1) {
+      for (let y = northWest.y; y <= southEast.y; y += 1) {
+        const key = `${x}/${y}`;
+        if (keys.has(key)) requests.push(loadTile(`${zoom}/${key}`));
+      }
+    }
+    const loaded = await Promise.all(requests);
+    if (current !== generation) return; // a later pan/zoom already took over
+    group.clearLayers();
+    loaded.forEach((tile) =>
+      tile.clusters.forEach((cluster) => {
+        if (cluster.points) {
+          cluster.points.forEach((index) => drawPoint(index).addTo(group));
+        } else {
+          drawCluster(cluster).addTo(group);
+        }
+      })
+    );
+  };
+
+  map.on("moveend", redraw);
+  redraw();
+}
+
+// Park outlines (scripts/shapes.py): the coarsest level draws first, finer ones load as the map zooms in.
+async function drawParkShapes(map, colorFor) {
+  const index = await fetchJSON(DATA_PATHS.parkShapes).catch(() => null);
+  if (index?.format !== "park_shapes_index" || !index.levels?.length) return;
+  map.createPane("parkShapes");
+  map.getPane("parkShapes").style.zIndex = 350; // under the park markers
+  const group = L.layerGroup().addTo(map);
+  const requests = new Map();
+  let shown = -1;
+  const levelFor = (zoom) => index.levels.reduce((best, level, i) => (zoom >= level.min_zoom ? i : best), 0);
+
+  const show = async () => {
+    const level = levelFor(map.getZoom());
+    if (level === shown) return;
+    if (!requests.has(level)) {
+      const request = fetchJSON(`${DATA_ROOT}${index.levels[level].file}`).catch(() => {
+        requests.delete(level); // retry on the next zoom
+        return null;
+      });
+      requests.set(level, request);
+    }
+    const payload = await requests.get(level);
+    if (!payload || levelFor(map.getZoom()) !== level) return; // zoomed again meanwhile
+    shown = level;
+    group.clearLayers();
+    payload.entries.forEach((park) => {
+      L.polygon(decodePolygons(park.polygons, payload.quantum), {
+        pane: "parkShapes",
+        color: colorFor(park.category),
+        fillColor: colorFor(park.category),
+        fillOpacity: 0.25,
+        weight: 1,
+        interactive: false,
+      }).addTo(group);
+    });
+  };
+  map.on("zoomend", () => show().catch((error) => console.error(error)));
+  await show();
+}
+
+// Rings are flat [x0, y0, dx1, dy1, ...] integers in units of `quantum` degrees, longitude first.
+function decodePolygons(polygons, quantum) {
+  return polygons.map((rings) =>
+    rings.map((ring) => {
+      const latLngs = [];
+      let x = 0;
+      let y = 0;
+      for (let i = 0; i < ring.length; i += 2) {
+        x += ring[i];
+        y += ring[i + 1];
+        latLngs.push([y * quantum, x * quantum]);
+      }
+      return latLngs;
+    })
+  );
+}
+
+// Grow `bounds` by every located point of `layer`, and `cityBounds` by those inside San Francisco.
+function extendPointBounds(layer, bounds, cityBounds) {
+  for (let i = 0; i < (layer?.length || 0); i += 1) {
+    if (!layer.hasLocation(i)) continue;
+    const latlng = [layer.lat(i), layer.lon(i)];
+    bounds.extend(latlng);
+    if (isWithinSFBounds(latlng[0], latlng[1])) {
+      cityBounds.extend(latlng);
+    }
+  }
+}
+
 // Composite resource map that layers parks, businesses, facilities, and schools with toggles.
 function createResourceMap(parks, businessNeighborhoods, centroidLookup, facilities) {
   sharedState.resourceBusinessMarkers.clear();
@@ -438,24 +897,27 @@ function createResourceMap(parks, businessNeighborhoods, centroidLookup, facilit
     schools: L.layerGroup(),
   };
 
-  parks
-    .filter((park) => park.coordinates?.lat && park.coordinates?.lon)
-    .forEach((park) => {
+  drawPointLayer(
+    map,
+    layers.parks,
+    parks,
+    (index) => {
+      const park = parks.record(index);
       const radius = Math.min(26, 6 + Math.sqrt(park.acres || 0) * 1.4);
       const mapLinks = buildMapLinks(park.coordinates.lat, park.coordinates.lon);
-      L.circleMarker([park.coordinates.lat, park.coordinates.lon], {
+      return L.circleMarker([park.coordinates.lat, park.coordinates.lon], {
         radius: radius || 3,
         color: "#0f172a",
         fillColor: COLOR.park,
         fillOpacity: 0.75,
         weight: 1.2,
-      })
-        .bindPopup(
-          `<strong>${park.name}</strong><br>${park.category}<br>${park.acres.toLocaleString()} acres${mapLinks}`,
-          { maxWidth: 260 }
-        )
-        .addTo(layers.parks);
-    });
+      }).bindPopup(
+        `<strong>${park.name}</strong><br>${park.category}<br>${park.acres.toLocaleString()} acres${mapLinks}`,
+        { maxWidth: 260 }
+      );
+    },
+    { color: COLOR.park, noun: "parks" }
+  );
 
   const businessEntries = businessNeighborhoods
     .map((entry) => {
@@ -508,70 +970,79 @@ function createResourceMap(parks, businessNeighborhoods, centroidLookup, facilit
     addMarkerReference(sharedState.resourceBusinessMarkers, entry.neighborhood, marker);
   });
 
-  facilities
-    .filter((facility) => facility.coordinates?.lat && facility.coordinates?.lon)
-    .forEach((facility) => {
+  drawPointLayer(
+    map,
+    layers.facilities,
+    facilities,
+    (index) => {
+      const facility = facilities.record(index);
       const mapLinks = buildMapLinks(facility.coordinates.lat, facility.coordinates.lon);
-      L.circleMarker([facility.coordinates.lat, facility.coordinates.lon], {
+      return L.circleMarker([facility.coordinates.lat, facility.coordinates.lon], {
         radius: 5,
         color: "#0f172a",
         fillColor: COLOR.facility,
         fillOpacity: 0.75,
         weight: 1.1,
-      })
-        .bindPopup(
-          `<strong>${facility.name}</strong><br>${facility.address || "Address not provided"}<br>District ${
-            facility.district || "N/A"
-          }${mapLinks}`,
-          { maxWidth: 280 }
-        )
-        .addTo(layers.facilities);
-    });
-
-  (sharedState.schools || [])
-    .filter((school) => school.coordinates?.lat && school.coordinates?.lon)
-    .forEach((school) => {
-      const mapLinks = buildMapLinks(school.coordinates.lat, school.coordinates.lon);
-      L.circleMarker([school.coordinates.lat, school.coordinates.lon], {
-        radius: 5,
-        color: "#0f172a",
-        fillColor: "#e9c46a",
-        fillOpacity: 0.8,
-        weight: 1.1,
-      })
-        .bindPopup(
-          `<strong>${school.name}</strong><br>${school.address || "Address not provided"}<br>${
-            school.ownership || "School"
-          }${mapLinks}`,
-          { maxWidth: 280 }
-        )
-        .addTo(layers.schools);
-    });
+      }).bindPopup(
+        `<strong>${facility.name}</strong><br>${facility.address || "Address not provided"}<br>District ${
+          facility.district || "N/A"
+        }${mapLinks}`,
+        { maxWidth: 280 }
+      );
+    },
+    { color: COLOR.facility, noun: "facilities" }
+  );
 
   Object.values(layers).forEach((layer) => layer.addTo(map));
 
-  const bounds = [];
-  const cityBounds = [];
-  const recordLatLng = (latlng) => {
-    bounds.push(latlng);
+  // Fit to the data itself rather than to drawn markers, which tiled layers only hold for the view.
+  const bounds = L.latLngBounds([]);
+  const cityBounds = L.latLngBounds([]);
+  [parks, facilities].forEach((layer) => extendPointBounds(layer, bounds, cityBounds));
+  layers.businesses.eachLayer((layer) => {
+    const latlng = layer.getLatLng();
+    bounds.extend(latlng);
     if (isWithinSFBounds(latlng.lat, latlng.lng)) {
-      cityBounds.push(latlng);
+      cityBounds.extend(latlng);
     }
-  };
-
-  layers.parks.eachLayer((layer) => recordLatLng(layer.getLatLng()));
-  layers.businesses.eachLayer((layer) => recordLatLng(layer.getLatLng()));
-  layers.facilities.eachLayer((layer) => recordLatLng(layer.getLatLng()));
-  layers.schools.eachLayer((layer) => recordLatLng(layer.getLatLng()));
+  });
 
-  const fitTargets = cityBounds.length ? cityBounds : bounds;
-  if (fitTargets.length) {
-    map.fitBounds(L.latLngBounds(fitTargets), { padding: [36, 36] });
+  const fitTargets = cityBounds.isValid() ? cityBounds : bounds;
+  if (fitTargets.isValid()) {
+    map.fitBounds(fitTargets, { padding: [36, 36] });
   }
 
   map._customLayers = layers;
 }
 
+// Add the schools point layer to the resource map once it has loaded (see init).
+function drawSchoolLayer(map, schools) {
+  const group = map?._customLayers?.schools;
+  if (!group || !schools) return;
+  drawPointLayer(
+    map,
+    group,
+    schools,
+    (index) => {
+      const school = schools.record(index);
+      const mapLinks = buildMapLinks(school.coordinates.lat, school.coordinates.lon);
+      return L.circleMarker([school.coordinates.lat, school.coordinates.lon], {
+        radius: 5,
+        color: "#0f172a",
+        fillColor: "#e9c46a",
+        fillOpacity: 0.8,
+        weight: 1.1,
+      }).bindPopup(
+        `<strong>${school.name}</strong><br>${school.address || "Address not provided"}<br>${
+          school.ownership || "School"
+        }${mapLinks}`,
+        { maxWidth: 280 }
+      );
+    },
+    { color: "#e9c46a", noun: "schools" }
+  );
+}
+
 // Rent-by-ZIP bubble map with color ramp for change since 2020 and radius for current rent.
 function renderRentZipMap(rentZipData) {
   const container = document.getElementById("rent-map");
@@ -2650,14 +3121,31 @@ function initializeZipSearch() {
   const addressButton = document.getElementById("address-search");
   const addressList = document.getElementById("address-options");
 
-  if (addressInput && addressList && !addressList.dataset.filled) {
-    sharedState.addressPoints.slice(0, 500).forEach((point) => {
+  const fillAddressOptions = (indexes) => {
+    const points = sharedState.addressPoints;
+    addressList.replaceChildren();
+    indexes.forEach((i) => {
+      const label = points.value("label", i);
+      const address = points.value("address", i);
       const option = document.createElement("option");
-      option.value = point.address || point.label;
-      option.label = point.label || point.address || "Address";
+      option.value = address || label;
+      option.label = label || address || "Address";
       addressList.appendChild(option);
     });
+  };
+
+  if (addressInput && addressList && !addressList.dataset.filled) {
+    const count = Math.min(500, sharedState.addressPoints?.length || 0);
+    fillAddressOptions(Array.from({ length: count }, (_, i) => i));
     addressList.dataset.filled = "true";
+    if (sharedState.addressSearch) {
+      // Type-ahead from the prebuilt prefix table instead of a fixed first-500 list.
+      addressInput.addEventListener("input", () => {
+        const prefix = addressInput.value.trim().toLowerCase();
+        if (prefix.length < 2) return;
+        fillAddressOptions(sharedState.addressSearch.suggest(prefix, 50));
+      });
+    }
   }
 
   const handleAddressSearch = () => {
@@ -2714,32 +3202,136 @@ function normalizeZipInput(value) {
 function findAddressPoint(query) {
   if (!query) return null;
   const normalized = query.toLowerCase();
-  const points = sharedState.addressPoints || [];
-  if (!points.length) return null;
+  const points = sharedState.addressPoints;
+  if (!points?.length) return null;
 
-  let bestPoint = null;
+  if (sharedState.addressSearch && normalized.length >= SEARCH_GRAM) {
+    const bestIndex = sharedState.addressSearch.find(points, normalized);
+    return bestIndex >= 0 ? addressRecord(points, bestIndex) : null;
+  }
+
+  let bestIndex = -1;
   let bestScore = -Infinity;
-  points.forEach((point) => {
-    const label = (point.label || "").toLowerCase();
-    const address = (point.address || "").toLowerCase();
-    let score = 0;
-    if (label === normalized || address === normalized) {
-      score = 200;
-    } else if (label.startsWith(normalized) || address.startsWith(normalized)) {
-      score = 140;
-    } else if (label.includes(normalized) || address.includes(normalized)) {
-      score = 100;
-    }
-    if (point.zip && normalized.includes(point.zip)) {
-      score += 25;
-    }
+  for (let i = 0; i < points.length; i += 1) {
+    const score = scoreAddressPoint(points, i, normalized);
     if (score > bestScore) {
       bestScore = score;
-      bestPoint = point;
+      bestIndex = i;
     }
-  });
+  }
 
-  return bestScore > 0 ? bestPoint : null;
+  return bestScore > 0 ? addressRecord(points, bestIndex) : null;
+}
+
+// Keep the point's position: entry i of address_accessibility.json describes entry i of address_points.json.
+function addressRecord(points, index) {
+  return { ...points.record(index), index };
+}
+
+// Exact 200 / prefix 140 / substring 100 on label or address, +25 when the point's ZIP is in the query.
+function scoreAddressPoint(points, index, normalized) {
+  const label = (points.value("label", index) || "").toLowerCase();
+  const address = (points.value("address", index) || "").toLowerCase();
+  const zip = points.value("zip", index);
+  let score = 0;
+  if (label === normalized || address === normalized) {
+    score = 200;
+  } else if (label.startsWith(normalized) || address.startsWith(normalized)) {
+    score = 140;
+  } else if (label.includes(normalized) || address.includes(normalized)) {
+    score = 100;
+  }
+  if (zip && normalized.includes(zip)) {
+    score += 25;
+  }
+  return score;
+}
+
+const SEARCH_GRAM = 3;
+
+// Prebuilt address index (see scripts/search_index.py): sorted normalized keys for exact and
+// prefix lookups, trigram posting lists for substring candidates, and the first point per ZIP.
+class SearchIndex {
+  constructor(payload) {
+    this.keys = payload.keys;
+    this.keyOffsets = readLittleEndian(decodeBase64(payload.key_offsets), "uint32", this.keys.length + 1);
+    this.keyPoints = readLittleEndian(decodeBase64(payload.key_points), "uint32", this.keyOffsets[this.keys.length]);
+    const trigrams = payload.trigrams;
+    this.trigramOffsets = readLittleEndian(decodeBase64(payload.trigram_offsets), "uint32", trigrams.length + 1);
+    this.trigramPoints = readLittleEndian(
+      decodeBase64(payload.trigram_points),
+      "uint32",
+      this.trigramOffsets[trigrams.length]
+    );
+    this.trigrams = new Map(trigrams.map((gram, position) => [gram, position]));
+    this.zips = Object.entries(payload.zips || {});
+  }
+
+  // First key position >= prefix in the sorted key list.
+  lowerBound(prefix) {
+    let low = 0;
+    let high = this.keys.length;
+    while (low < high) {
+      const mid = (low + high) >> 1;
+      if (this.keys[mid] < prefix) low = mid + 1;
+      else high = mid;
+    }
+    return low;
+  }
+
+  // Up to `limit` point indexes whose label or address starts with `prefix`, in key order.
+  suggest(prefix, limit) {
+    const seen = new Set();
+    for (let k = this.lowerBound(prefix); k < this.keys.length && this.keys[k].startsWith(prefix); k += 1) {
+      for (let p = this.keyOffsets[k]; p < this.keyOffsets[k + 1] && seen.size < limit; p += 1) {
+        seen.add(this.keyPoints[p]);
+      }
+      if (seen.size >= limit) break;
+    }
+    return Array.from(seen);
+  }
+
+  // Points that could contain `normalized` (length >= SEARCH_GRAM): intersection of its trigram lists.
+  candidates(normalized) {
+    const lists = [];
+    for (let start = 0; start + SEARCH_GRAM <= normalized.length; start += 1) {
+      const position = this.trigrams.get(normalized.slice(start, start + SEARCH_GRAM));
+      if (position === undefined) return [];
+      lists.push(this.trigramPoints.subarray(this.trigramOffsets[position], this.trigramOffsets[position + 1]));
+    }
+    lists.sort((a, b) => a.length - b.length);
+    const contains = (list, value) => {
+      let low = 0;
+      let high = list.length;
+      while (low < high) {
+        const mid = (low + high) >> 1;
+        if (list[mid] < value) low = mid + 1;
+        else high = mid;
+      }
+      return low < list.length && list[low] === value;
+    };
+    return Array.from(lists[0]).filter((index) => lists.every((list) => contains(list, index)));
+  }
+
+  // Same winner as scoring every point with scoreAddressPoint: highest score, earliest point on
+  // ties, -1 when nothing scores. Points outside the candidates can only earn the ZIP bonus, and
+  // among those the earliest point of each matching ZIP is the one a full scan would keep.
+  find(points, normalized) {
+    let bestIndex = -1;
+    let bestScore = 0;
+    const consider = (index) => {
+      const score = scoreAddressPoint(points, index, normalized);
+      if (score > bestScore || (score === bestScore && score > 0 && index < bestIndex)) {
+        bestScore = score;
+        bestIndex = index;
+      }
+    };
+    this.candidates(normalized).forEach(consider);
+    this.zips.forEach(([zip, index]) => {
+      if (normalized.includes(zip)) consider(index);
+    });
+    return bestIndex;
+  }
 }
 
 // Pan both resource and rent maps to a chosen address and drop a marker.
@@ -2891,8 +3483,10 @@ function renderZipSummary(entry, options = {}) {
         <p>This address is outside the business dataset's ZIP coverage but nearby resources are listed below.</p>
         <div class="address-insight">
           <ul>${lines.join("")}</ul>
+          <ul class="address-access"></ul>
         </div>
       `;
+      renderAddressAccess(summaryEl.querySelector(".address-access"), point.index);
     } else {
       summaryEl.innerHTML = `
         <h3>ZIP-specific insight</h3>
@@ -2920,6 +3514,8 @@ function renderZipSummary(entry, options = {}) {
     const detailText = detailParts.length ? detailParts.join(", ") : "Breakdown not available";
     schoolHtml = `<li><strong>Schools in ZIP:</strong> ${schoolStats.total} (${detailText})</li>`;
   }
+  const access = sharedState.accessByZip.get(entry.zip);
+  const accessHtml = access ? accessLines(access, "the ZIP centre").join("") : "";
 
   let addressHtml = "";
   if (addressCtx?.addressPoint) {
@@ -2953,6 +3549,7 @@ function renderZipSummary(entry, options = {}) {
       <div class="address-insight">
         <h4>Address insight</h4>
         <ul>${lines.join("")}</ul>
+        <ul class="address-access"></ul>
       </div>
     `;
   }
@@ -2989,11 +3586,132 @@ function renderZipSummary(entry, options = {}) {
       <li><strong>Top sectors:</strong> ${sectorNames.length ? formatList(sectorNames) : "Data not available"}</li>
       <li><strong>Dominant neighborhoods:</strong> ${neighborhoodNames.length ? formatList(neighborhoodNames) : "Data not available"}</li>
       ${schoolHtml}
+      ${accessHtml}
     </ul>
     ${compareHtml}
+    <div class="zip-detail"></div>
     <p class="chart-reference">Maps and charts now spotlight ZIP ${entry.zip}. Hover elsewhere to compare.</p>
     ${addressHtml}
   `;
+  renderZipDetail(summaryEl.querySelector(".zip-detail"), entry.zip);
+  if (addressCtx?.addressPoint) {
+    renderAddressAccess(summaryEl.querySelector(".address-access"), addressCtx.addressPoint.index);
+  }
+}
+
+// Summary lines for one accessibility entry: counts within 1 km and the nearest of each amenity.
+function accessLines(access, origin) {
+  const counts = [];
+  const nearest = [];
+  [
+    ["parks", "park", "parks"],
+    ["facilities", "facility", "facilities"],
+    ["schools", "school", "schools"],
+  ].forEach(([key, singular, plural]) => {
+    const layer = access[key];
+    if (!layer) return;
+    const count = layer.within_km?.["1"] ?? 0;
+    const acres = layer.acres_within_km?.["1"];
+    counts.push(`${count} ${count === 1 ? singular : plural}${acres ? ` (${Math.round(acres).toLocaleString()} acres)` : ""}`);
+    if (layer.nearest_km !== null && layer.nearest_km !== undefined) {
+      nearest.push(`${singular} ${formatDistance(layer.nearest_km)}`);
+    }
+  });
+  const lines = [];
+  if (counts.length) lines.push(`<li><strong>Within 1 km of ${origin}:</strong> ${formatList(counts)}</li>`);
+  if (nearest.length) lines.push(`<li><strong>Closest to ${origin}:</strong> ${nearest.join(", ")}</li>`);
+  return lines;
+}
+
+// Per-address access is only fetched on the first address lookup.
+function loadAddressAccess() {
+  if (!sharedState.addressAccess) {
+    sharedState.addressAccess = fetchJSON(DATA_PATHS.addressAccessibility).catch(() => {
+      sharedState.addressAccess = null; // retry on the next lookup
+      return null;
+    });
+  }
+  return sharedState.addressAccess;
+}
+
+async function renderAddressAccess(container, index) {
+  if (!container || index === undefined) return;
+  const payload = await loadAddressAccess();
+  const access = payload?.entries?.length === sharedState.addressPoints?.length ? payload.entries[index] : null;
+  if (!access || !container.isConnected) return;
+  container.innerHTML = accessLines(access, "this address").join("");
+}
+
+// Fetch a ZIP's shard (full rent history and school records) the first time it is focused.
+function loadZipShard(zip) {
+  if (!sharedState.zipShardManifest?.zips?.[zip]) return Promise.resolve(null);
+  if (!sharedState.zipShards.has(zip)) {
+    const request = fetchJSON(`${DATA_PATHS.zipShards}/${zip}.json`).catch(() => {
+      sharedState.zipShards.delete(zip); // retry on the next focus
+      return null;
+    });
+    sharedState.zipShards.set(zip, request);
+  }
+  return sharedState.zipShards.get(zip);
+}
+
+// Fill the ZIP card's detail block with a rent sparkline and the ZIP's schools once its shard arrives.
+async function renderZipDetail(container, zip) {
+  if (!container || !sharedState.zipShardManifest?.zips?.[zip]) return;
+  container.innerHTML = '<p class="zip-detail-status">Loading rent history and schools…</p>';
+  const shard = await loadZipShard(zip);
+  if (!container.isConnected) return; // the card was redrawn for another ZIP meanwhile
+  container.replaceChildren();
+  if (!shard) {
+    container.innerHTML = '<p class="zip-detail-status">Rent history and school detail unavailable.</p>';
+    return;
+  }
+
+  const parseDate = d3.timeParse("%Y-%m-%d");
+  const formatCurrency = new Intl.NumberFormat("en-US", { style: "currency", currency: "USD", maximumFractionDigits: 0 });
+  const points = (shard.rent_history || [])
+    .slice(-60)
+    .map((item) => ({ date: parseDate(item.date), value: item.zori }))
+    .filter((item) => item.date && typeof item.value === "number");
+  if (points.length > 1) {
+    const width = 280;
+    const height = 64;
+    const x = d3.scaleTime().domain(d3.extent(points, (d) => d.date)).range([4, width - 4]);
+    const y = d3.scaleLinear().domain(d3.extent(points, (d) => d.value)).nice().range([height - 4, 4]);
+    const first = points[0];
+    const last = points[points.length - 1];
+    const block = d3.select(container).append("div").attr("class", "zip-rent-history");
+    block.append("h4").text(`Typical rent, last ${points.length} months`);
+    block
+      .append("svg")
+      .attr("viewBox", `0 0 ${width} ${height}`)
+      .attr("role", "img")
+      .attr("aria-label", `Rent in ZIP ${zip} from ${formatCurrency.format(first.value)} to ${formatCurrency.format(last.value)}`)
+      .append("path")
+      .datum(points)
+      .attr("d", d3.line().x((d) => x(d.date)).y((d) => y(d.value)))
+      .attr("fill", "none")
+      .attr("stroke", COLOR.business)
+      .attr("stroke-width", 2);
+    block
+      .append("p")
+      .attr("class", "zip-detail-status")
+      .text(`${d3.timeFormat("%b %Y")(first.date)}: ${formatCurrency.format(first.value)} → ${d3.timeFormat("%b %Y")(last.date)}: ${formatCurrency.format(last.value)}`);
+  }
+
+  const schools = shard.schools || [];
+  if (schools.length) {
+    const shown = 8;
+    const block = d3.select(container).append("div").attr("class", "zip-schools");
+    block.append("h4").text(`Schools in ZIP ${zip}`);
+    const list = block.append("ul");
+    schools.slice(0, shown).forEach((school) => {
+      list.append("li").text(`${school.name}${school.grades ? ` (${school.grades})` : ""}`);
+    });
+    if (schools.length > shown) {
+      block.append("p").attr("class", "zip-detail-status").text(`and ${schools.length - shown} more`);
+    }
+  }
 }
 
 // Fallback centroid: prefer precomputed centroid, else average linked neighborhoods.
@@ -3083,18 +3801,23 @@ function clearAddressMarker() {
   sharedState.addressMarker = null;
 }
 
-// Simple nearest-neighbor search by haversine distance; returns sorted subset.
-function findNearest(entries, coords, limit = 1) {
-  if (!entries?.length || !coords) return [];
-  const results = [];
-  entries.forEach((entry) => {
-    const point = entry.coordinates || entry;
-    if (!point?.lat || !point?.lon) return;
-    const distanceKm = haversineDistance(coords.lat, coords.lon, point.lat, point.lon);
-    results.push({ item: entry, distanceKm });
-  });
-  results.sort((a, b) => a.distanceKm - b.distanceKm);
-  return results.slice(0, limit);
+// Nearest-neighbor search by haversine distance over a PointLayer; returns sorted subset.
+// Uses the layer's spatial grid when loaded, otherwise scans every point.
+function findNearest(layer, coords, limit = 1) {
+  if (!layer?.length || !coords) return [];
+  let results;
+  if (layer.grid) {
+    results = layer.grid.nearest(layer, coords, limit);
+  } else {
+    results = [];
+    for (let i = 0; i < layer.length; i += 1) {
+      if (!layer.hasLocation(i)) continue;
+      results.push({ index: i, distanceKm: haversineDistance(coords.lat, coords.lon, layer.lat(i), layer.lon(i)) });
+    }
+    results.sort((a, b) => a.distanceKm - b.distanceKm);
+    results = results.slice(0, limit);
+  }
+  return results.map(({ index, distanceKm }) => ({ item: layer.record(index), distanceKm }));
 }
 
 // Distance in kilometers between two lat/lon points.
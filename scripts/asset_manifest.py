@@ -0,0 +1,92 @@
+"""
+Content-hashed names for the files in ``data/processed``.
+
+``publish_assets`` gives every top-level JSON output (``parks.json``,
+``parks.columnar.json``, ...) a copy under ``hashed/`` whose name carries a
+prefix of its SHA-256, e.g. ``hashed/parks.3f2a9c81d0e4.json``, and writes
+``assets.json`` mapping each logical name to that copy::
+
+    {"format": "assets", "version": 1, "files": {"parks.json": "hashed/parks.3f2a9c81d0e4.json", ...}}
+
+A hashed file never changes content, so it can be served with a long-lived
+``immutable`` cache header (``serve.py`` does), and a deploy only has to
+upload names it has not seen before. The page fetches ``assets.json`` first,
+revalidating it, and resolves every ``DATA_PATHS`` entry through it; without
+it the plain names are used.
+
+Copies are hard links where the filesystem allows, so they take no extra
+space, and the ``.gz``/``.br`` sidecars get matching names. Hashed files
+listed by neither the new nor the previous ``assets.json`` are removed, so a
+page still holding the previous one can finish loading. Directories of many
+small files (``tiles/``, ``zips/``) keep their plain names.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Set
+
+from build_manifest import hash_file
+from json_writer import SIDECAR_SUFFIXES, write_json
+
+ASSETS_VERSION = 1
+ASSETS_NAME = "assets.json"
+HASHED_DIR = "hashed"
+HASH_LENGTH = 12
+
+
+def hashed_name(name: str, digest: str) -> str:
+    """``parks.columnar.json`` -> ``parks.columnar.<digest prefix>.json``."""
+    path = Path(name)
+    return f"{path.stem}.{digest[:HASH_LENGTH]}{path.suffix}"
+
+
+def read_assets(directory: Path) -> Dict[str, str]:
+    try:
+        payload = json.loads((directory / ASSETS_NAME).read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return payload.get("files", {}) if payload.get("version") == ASSETS_VERSION else {}
+
+
+def link_or_copy(source: Path, target: Path) -> None:
+    if target.exists():  # same name, same content
+        return
+    tmp_path = target.with_name(f".{target.name}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copy2(source, tmp_path)
+    os.replace(tmp_path, target)
+
+
+def publish_assets(directory: Path) -> Dict[str, str]:
+    """Refresh ``hashed/`` and ``assets.json`` under ``directory``; returns the name mapping."""
+    hashed_dir = directory / HASHED_DIR
+    hashed_dir.mkdir(parents=True, exist_ok=True)
+    previous = read_assets(directory)
+    files: Dict[str, str] = {}
+    for path in sorted(directory.glob("*.json")):
+        if path.name == ASSETS_NAME:
+            continue
+        name = hashed_name(path.name, hash_file(path))
+        for suffix in ("",) + SIDECAR_SUFFIXES:
+            source = path.with_name(path.name + suffix)
+            if source.exists():
+                link_or_copy(source, hashed_dir / (name + suffix))
+        files[path.name] = f"{HASHED_DIR}/{name}"
+
+    keep: Set[str] = set()
+    for relative in (*files.values(), *previous.values()):
+        name = Path(relative).name
+        keep.update(name + suffix for suffix in ("",) + SIDECAR_SUFFIXES)
+    for stale in hashed_dir.iterdir():
+        if stale.name not in keep:
+            stale.unlink()
+
+    write_json(directory / ASSETS_NAME, {"format": "assets", "version": ASSETS_VERSION, "files": files})
+    return files
@@ -0,0 +1,473 @@
+"""
+Synthetic-scale benchmark for ``preprocess_data.py``.
+
+Run from project root:
+
+    python3 scripts/benchmark.py --rows 10k 1m
+    python3 scripts/benchmark.py --rows 10k --compare data/.bench/results.json --output /tmp/results.json
+
+For each size a seeded generator writes raw files with the column layouts the
+stages read (business registry, Rec & Park properties, facilities, schools,
+CHAS, the wide ZORI/ZHVI files and the FHFA HPI) into ``data/.bench/<rows>/``.
+Row-per-record files get ``rows`` records; the wide Zillow files get
+``rows // WIDE_ROW_CELLS`` regions, so they hold roughly as many cells. The same
+seed always produces the same files, and generated trees are reused until
+``GENERATOR_VERSION`` changes.
+
+Every stage then runs cold (no build manifest, empty ``processed``) in its own
+spawned process, in dependency order, so its peak RSS is its own, with the
+run options given here (``--chunk-workers``, ``--top-k-capacity``,
+``--sqlite``) passed as ``preprocess_data.py`` would. The ``run_report.py``
+figures (wall and CPU time, rows, bytes written, peak RSS) plus rows read per
+second are written per stage as JSON, to ``data/.bench/results.json`` unless
+``--output`` says otherwise; ``--compare`` checks the new timings against an
+earlier results file and exits non-zero when a stage slowed down by more than
+``--threshold``.
+
+Some stages grow faster than their input: accessibility measures every
+address against every amenity layer, and takes minutes at 100k rows and
+hours at 1M or 10M. Sizes above a stage's ``STAGE_ROW_LIMITS`` entry skip
+it (recorded as skipped) unless ``--no-stage-limits`` is given.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import preprocess_data as pipeline
+from run_report import instrumented
+
+GENERATOR_VERSION = 1
+RESULTS_VERSION = 1
+WIDE_ROW_CELLS = 100
+MONTHS = 120
+SIZE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+# Largest benchmark size each stage is run at by default.
+STAGE_ROW_LIMITS = {"accessibility": 100_000}
+
+NEIGHBORHOODS = [
+    "Bayview Hunters Point",
+    "Castro/Upper Market",
+    "Chinatown",
+    "Financial District/South Beach",
+    "Mission",
+    "Noe Valley",
+    "Outer Richmond",
+    "South of Market",
+    "Sunset/Parkside",
+    "Tenderloin",
+]
+SF_ZIPS = [f"941{suffix:02d}" for suffix in range(2, 35)]
+SECTORS = [
+    "Accommodations",
+    "Construction",
+    "Food Services",
+    "Private Education and Health Services",
+    "Professional, Scientific, and Technical Services",
+    "Real Estate and Rental and Leasing Services",
+    "Retail Trade",
+    "",
+]
+
+
+def parse_rows(value: str) -> int:
+    """Accept ``10000``, ``10k`` or ``1m``."""
+    text = value.strip().lower().replace("_", "")
+    if text and text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def random_point(rnd: random.Random) -> Tuple[float, float]:
+    return 37.70 + rnd.random() * 0.11, -122.51 + rnd.random() * 0.14
+
+
+def month_ends(count: int) -> List[str]:
+    dates = []
+    for offset in range(count):
+        year, month = 2015 + offset // 12, offset % 12 + 1
+        first_of_next = datetime.date(year + month // 12, month % 12 + 1, 1)
+        dates.append((first_of_next - datetime.timedelta(days=1)).isoformat())
+    return dates
+
+
+def write_csv(path: Path, header: List[str], rows) -> None:
+    with path.open("w", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def generate_businesses(path: Path, rows: int, rnd: random.Random) -> None:
+    header = [
+        "UniqueID",
+        "DBA Name",
+        "Street Address",
+        "City",
+        "State",
+        "Source Zipcode",
+        "Business Start Date",
+        "Business End Date",
+        "NAICS Code Description",
+        "Neighborhoods - Analysis Boundaries",
+        "Business Location",
+    ]
+
+    def records():
+        for index in range(rows):
+            city = "San Francisco" if rnd.random() < 0.9 else rnd.choice(["Oakland", "Daly City"])
+            # Now and then a quoted name with an embedded newline, as in the real export.
+            name = f'Shop "{index}", Inc\nSuite 2' if index % 997 == 0 else f"Business {index}"
+            lat, lon = random_point(rnd)
+            yield [
+                index,
+                name,
+                f"{index % 3000} Market St",
+                city,
+                "CA",
+                rnd.choice(SF_ZIPS) if rnd.random() < 0.97 else "",
+                f"{rnd.randint(1, 12):02d}/{rnd.randint(1, 28):02d}/{rnd.randint(1970, 2024)}",
+                "" if rnd.random() < 0.7 else f"{rnd.randint(1, 12):02d}/{rnd.randint(1, 28):02d}/{rnd.randint(2010, 2025)}",
+                rnd.choice(SECTORS),
+                rnd.choice(NEIGHBORHOODS) if rnd.random() < 0.95 else "",
+                f"POINT ({lon:.6f} {lat:.6f})",
+            ]
+
+    write_csv(path, header, records())
+
+
+def generate_parks(path: Path, rows: int, rnd: random.Random) -> None:
+    header = [
+        "objectid",
+        "property_name",
+        "propertytype",
+        "acres",
+        "longitude",
+        "latitude",
+        "analysis_neighborhood",
+        "supdist",
+        "address",
+        "zipcode",
+        "shape",
+    ]
+
+    def records():
+        for index in range(rows):
+            lat, lon = random_point(rnd)
+            ring = [(lon + 0.001 * math.cos(step * math.pi / 3), lat + 0.001 * math.sin(step * math.pi / 3)) for step in range(7)]
+            shape = "MULTIPOLYGON (((" + ", ".join(f"{x:.6f} {y:.6f}" for x, y in ring) + ")))"
+            yield [
+                index,
+                f"Park {index}",
+                rnd.choice(["Neighborhood Park or Playground", "Civic Plaza or Square", "Mini Park"]),
+                f"{rnd.random() ** 3 * 300:.2f}",
+                f"{lon:.8f}" if index % 101 else "",  # a few unusable coordinates
+                f"{lat:.8f}",
+                rnd.choice(NEIGHBORHOODS),
+                rnd.choice(["1", "2", "5", "10", "3, 5"]),
+                f"{index % 3000} Park Ave" if index % 5 else "",
+                rnd.choice(SF_ZIPS),
+                shape,
+            ]
+
+    write_csv(path, header, records())
+
+
+def generate_facilities(path: Path, rows: int, rnd: random.Random) -> None:
+    def records():
+        for index in range(rows):
+            lat, lon = random_point(rnd)
+            yield [
+                f"Facility {index}",
+                f"{index % 3000} Main St" if index % 9 else "",
+                rnd.choice(SF_ZIPS),
+                str(rnd.randint(1, 11)),
+                f"{lon:.8f}" if index % 103 else "n/a",
+                f"{lat:.8f}",
+            ]
+
+    write_csv(path, ["common_name", "address", "zip_code", "supervisor_district", "longitude", "latitude"], records())
+
+
+def generate_schools(path: Path, rows: int, rnd: random.Random) -> None:
+    def records():
+        for index in range(rows):
+            lat, lon = random_point(rnd)
+            zip_code = rnd.choice(SF_ZIPS)
+            yield [
+                f"School {index}",
+                rnd.choice(["SFUSD", "Private", "Public"]),
+                rnd.choice(["USD Grades K-5", "Independent / Private", "USD PreK/TK"]),
+                rnd.choice(["ES", "MS", "HS", "PK"]),
+                "K-5",
+                f"{index % 3000} School St, San Francisco, CA {zip_code}",
+                f"({lat:.6f}, {lon:.6f})" if index % 107 else "",
+            ]
+
+    header = ["Campus Name", "CCSF Entity", "Category", "General Type", "Grade Range", "Campus Address", "Location 1"]
+    write_csv(path, header, records())
+
+
+def generate_chas(path: Path, rows: int, rnd: random.Random) -> None:
+    path.write_text(
+        "Title,,,\n"
+        "Housing Cost Burden Overview 3,Owner,Renter,Total\n"
+        'Cost Burden <=30%,"100,000","150,000","250,000"\n'
+        'Cost Burden >30% to <=50%,"30,000","50,000","80,000"\n'
+        'Cost Burden >50%,"20,000","60,000","80,000"\n'
+        'Total,"150,000","260,000","410,000"\n'
+    )
+
+
+def series(rnd: random.Random, base: float, months: int) -> List[str]:
+    value = base
+    cells = []
+    for _ in range(months):
+        value *= 1 + (rnd.random() - 0.45) / 50
+        cells.append("" if rnd.random() < 0.03 else f"{value:.4f}")
+    return cells
+
+
+def generate_city_wide(base: float) -> Callable[[Path, int, random.Random], None]:
+    def generate(path: Path, rows: int, rnd: random.Random) -> None:
+        dates = month_ends(MONTHS)
+        regions = max(1, rows // WIDE_ROW_CELLS)
+        header = ["RegionID", "SizeRank", "RegionName", "RegionType", "StateName", "State", "Metro", "CountyName"]
+
+        def records():
+            for index in range(regions):
+                name = "San Francisco" if index == regions // 2 else f"City {index}"
+                yield [1000 + index, index, name, "city", "CA", "CA", "Metro", "County"] + series(rnd, base + index, MONTHS)
+
+        write_csv(path, header + dates, records())
+
+    return generate
+
+
+def generate_zip_zori(path: Path, rows: int, rnd: random.Random) -> None:
+    dates = month_ends(MONTHS)
+    regions = max(1, rows // WIDE_ROW_CELLS)
+    stride = max(1, regions // len(SF_ZIPS))
+    header = ["RegionID", "SizeRank", "RegionName", "RegionType", "StateName", "State", "City", "Metro", "CountyName"]
+
+    def records():
+        for index in range(regions):
+            if index % stride == 0 and index // stride < len(SF_ZIPS):
+                zip_code, city = SF_ZIPS[index // stride], "San Francisco"
+            else:
+                zip_code, city = f"{10000 + index % 89999:05d}", "Elsewhere"
+            yield [5000 + index, index, zip_code, "zip", "CA", "CA", city, "Metro", "County"] + series(rnd, 2500 + index % 1000, MONTHS)
+
+    write_csv(path, header + dates, records())
+
+
+def generate_hpi(path: Path, rows: int, rnd: random.Random) -> None:
+    header = ["hpi_type", "hpi_flavor", "frequency", "level", "place_name", "place_id", "yr", "period", "index_nsa", "index_sa"]
+
+    def records():
+        places = max(1, rows // 40)  # 40 quarters per place
+        for place in range(places):
+            place_id = pipeline.SF_HPI_PLACE_ID if place == 0 else str(10000 + place)
+            for quarter in range(40):
+                yield [
+                    "traditional",
+                    "all-transactions",
+                    "quarterly",
+                    "MSA",
+                    f"Place {place_id}",
+                    place_id,
+                    2015 + quarter // 4,
+                    quarter % 4 + 1,
+                    f"{100 + quarter * 2 + rnd.random():.2f}",
+                    "",
+                ]
+
+    write_csv(path, header, records())
+
+
+# Raw file -> (generator, rows it receives for a benchmark size).
+DATASETS: Dict[str, Tuple[Callable[[Path, int, random.Random], None], Callable[[int], int]]] = {
+    pipeline.BUSINESS_CSV: (generate_businesses, lambda rows: rows),
+    pipeline.PARKS_CSV: (generate_parks, lambda rows: rows),
+    pipeline.FACILITIES_CSV: (generate_facilities, lambda rows: rows),
+    pipeline.SCHOOLS_CSV: (generate_schools, lambda rows: rows),
+    pipeline.CHAS_CSV: (generate_chas, lambda rows: 4),
+    pipeline.CITY_ZORI_CSV: (generate_city_wide(2000.0), lambda rows: max(1, rows // WIDE_ROW_CELLS)),
+    pipeline.CITY_ZHVI_CSV: (generate_city_wide(900_000.0), lambda rows: max(1, rows // WIDE_ROW_CELLS)),
+    pipeline.ZIP_ZORI_CSV: (generate_zip_zori, lambda rows: max(1, rows // WIDE_ROW_CELLS)),
+    pipeline.HPI_CSV: (generate_hpi, lambda rows: max(1, rows // 40) * 40),
+}
+
+
+def generate(data_dir: Path, rows: int, seed: int) -> Dict[str, int]:
+    """Write every raw file for ``rows`` into ``data_dir`` (reused when already generated); return rows per file."""
+    marker = data_dir / "generated.json"
+    stamp = {"generator": GENERATOR_VERSION, "rows": rows, "seed": seed}
+    counts = {name: records(rows) for name, (_, records) in DATASETS.items()}
+    if marker.exists() and json.loads(marker.read_text()) == stamp:
+        return counts
+    shutil.rmtree(data_dir, ignore_errors=True)
+    data_dir.mkdir(parents=True)
+    for offset, (name, (generator, _)) in enumerate(DATASETS.items()):
+        started = time.perf_counter()
+        generator(data_dir / name, rows, random.Random(seed + offset))
+        print(f"  generated {name} ({counts[name]:,} rows) in {time.perf_counter() - started:.1f}s")
+    marker.write_text(json.dumps(stamp))
+    return counts
+
+
+def measure_stage(name: str, kwargs: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Run one stage in this (fresh) process; return its values and measurements."""
+    stage = next(stage for stage in pipeline.STAGES if stage.name == name)
+    result, metrics = instrumented(stage.func, kwargs)
+    return pipeline._stage_values(stage, result), metrics
+
+
+def run_size(rows: int, work_dir: Path, seed: int, options: Dict[str, Any], limits: Dict[str, int]) -> Dict[str, Any]:
+    """Run every stage cold on the ``rows`` inputs, skipping stages whose entry in ``limits`` is below ``rows``."""
+    data_dir = work_dir / str(rows)
+    generate(data_dir, rows, seed)
+    shutil.rmtree(data_dir / "processed", ignore_errors=True)
+    shutil.rmtree(data_dir / ".build", ignore_errors=True)
+    # Spawned workers read this when they import preprocess_data.
+    os.environ["PREPROCESS_DATA_DIR"] = str(data_dir)
+
+    deps = pipeline.stage_dependencies(pipeline.STAGES)
+    values: Dict[str, Any] = {}
+    done: set = set()
+    pending = list(pipeline.STAGES)
+    stages: Dict[str, Dict[str, Any]] = {}
+    while pending:
+        stage = next(stage for stage in pending if all(dep in done for dep in deps[stage.name]))
+        pending.remove(stage)
+        done.add(stage.name)
+        if rows > limits.get(stage.name, rows):
+            stages[stage.name] = {"status": "skipped", "row_limit": limits[stage.name]}
+            print(f"  {stage.name:<15} skipped above {limits[stage.name]:,} rows")
+            continue
+        kwargs = {key: values.get(key) for key in stage.requires}
+        kwargs.update({param: options.get(param) for param in stage.params})
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            stage_values, metrics = pool.submit(measure_stage, stage.name, kwargs).result()
+        values.update(stage_values)
+        metrics["rows_per_second"] = round(metrics["rows_read"] / metrics["seconds"]) if metrics["rows_read"] and metrics["seconds"] else None
+        stages[stage.name] = metrics
+        rate = f"{metrics['rows_per_second']:,} rows/s" if metrics["rows_per_second"] else "-"
+        peak = f"{metrics['peak_rss_mb']:,.1f} MB" if metrics["peak_rss_mb"] is not None else "-"
+        print(f"  {stage.name:<15} {metrics['seconds']:>9.3f}s  {rate:>18}  peak {peak}")
+    return {"rows": rows, "options": options, "stages": stages}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=pipeline.ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Stages at least ``threshold`` times slower than in ``baseline``, as printable lines."""
+    previous = {run["rows"]: run["stages"] for run in baseline.get("runs", [])}
+    regressions = []
+    for run in current["runs"]:
+        for name, metrics in run["stages"].items():
+            before = previous.get(run["rows"], {}).get(name)
+            if not before or not before.get("seconds") or "seconds" not in metrics:
+                continue
+            ratio = metrics["seconds"] / before["seconds"]
+            line = f"  {run['rows']:>10,} {name:<15} {before['seconds']:>9.3f}s -> {metrics['seconds']:>9.3f}s  x{ratio:.2f}"
+            print(line)
+            if ratio >= threshold:
+                regressions.append(line)
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--rows",
+        nargs="+",
+        type=parse_rows,
+        default=[10_000],
+        metavar="N",
+        help="benchmark sizes, e.g. 10k 1m 10m (default: 10k)",
+    )
+    parser.add_argument("--seed", type=int, default=171, help="generator seed (default: 171)")
+    parser.add_argument(
+        "--work-dir",
+        type=Path,
+        default=pipeline.ROOT / "data" / ".bench",
+        help="where generated inputs and outputs live (default: data/.bench)",
+    )
+    parser.add_argument("--output", type=Path, help="results file to write (default: results.json in --work-dir)")
+    parser.add_argument("--compare", type=Path, help="earlier results file to check for regressions")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="slowdown ratio that counts as a regression with --compare (default: 1.25)",
+    )
+    parser.add_argument("--chunk-workers", type=int, default=None, help="passed to the stages that parse the business registry")
+    parser.add_argument("--top-k-capacity", type=int, default=None, metavar="N", help="passed to the businesses stage")
+    parser.add_argument("--sqlite", action="store_true", help="also benchmark loading records.sqlite (records_db stage)")
+    parser.add_argument(
+        "--no-stage-limits",
+        dest="stage_limits",
+        action="store_false",
+        help="run every stage at every size, ignoring STAGE_ROW_LIMITS",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    results: Dict[str, Any] = {
+        "version": RESULTS_VERSION,
+        "generator_version": GENERATOR_VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "runs": [],
+    }
+    options = {"chunk_workers": args.chunk_workers, "top_k_capacity": args.top_k_capacity, "sqlite": args.sqlite}
+    limits = STAGE_ROW_LIMITS if args.stage_limits else {}
+    for rows in args.rows:
+        print(f"{rows:,} rows:")
+        results["runs"].append(run_size(rows, args.work_dir, args.seed, options, limits))
+
+    output = args.output or args.work_dir / "results.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    print("Results saved to", output)
+
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} stage(s) slowed down by x{args.threshold:.2f} or more:")
+            print("\n".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Build manifest for incremental runs of ``preprocess_data.py``.
+
+The manifest records, per stage, a content hash of every raw input it read, a
+digest of the upstream values it consumed, a hash of the source files its code
+can reach (``source_files``), and a hash of each file it wrote to
+``data/processed``. A stage whose fingerprint and outputs still match can be
+skipped; its in-memory values are restored from a pickle next to the manifest.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import os
+import pickle
+import types
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+MANIFEST_VERSION = 1
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _digest_or_str(value: Any) -> str:
+    # Values that are not plain JSON can supply their own content hash (``PointTable.digest``).
+    digest = getattr(value, "digest", None)
+    return digest() if callable(digest) else str(value)
+
+
+def hash_value(value: Any) -> str:
+    """Stable digest of a JSON-like value handed between stages."""
+    payload = json.dumps(value, sort_keys=True, separators=(",", ":"), default=_digest_or_str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def hash_sources(paths: Iterable[Path]) -> str:
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _local_imports(path: Path) -> Dict[str, str]:
+    """Names bound by ``path``'s imports of modules in its own directory, mapped to those modules."""
+    bound: Dict[str, str] = {}
+    for node in ast.walk(ast.parse(path.read_text())):
+        if isinstance(node, ast.Import):
+            pairs = [(alias.asname or alias.name, alias.name) for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            pairs = [(alias.asname or alias.name, node.module) for alias in node.names]
+        else:
+            continue
+        bound.update((name, module) for name, module in pairs if (path.parent / f"{module}.py").exists())
+    return bound
+
+
+def source_files(func: Callable[..., Any]) -> List[Path]:
+    """Source files whose code ``func`` can run: its own module plus the local modules it reaches.
+
+    Follows the names used by ``func`` and by the functions and classes of its
+    module that it calls, so a stage picks up the local modules it imports
+    from, and then those modules' own imports. Other scripts next to the
+    pipeline (the server, the benchmark) never enter a stage's code hash.
+    """
+    home = Path(func.__code__.co_filename).resolve()
+    imported = _local_imports(home)
+    namespace = func.__globals__
+    modules: Set[str] = set()
+    seen: Set[types.CodeType] = set()
+    pending = [func.__code__]
+    while pending:
+        code = pending.pop()
+        if code in seen:
+            continue
+        seen.add(code)
+        pending.extend(const for const in code.co_consts if isinstance(const, types.CodeType))
+        for name in code.co_names:
+            value = namespace.get(name)
+            if name in imported:
+                modules.add(imported[name])
+            elif isinstance(value, types.FunctionType) and value.__globals__ is namespace:
+                pending.append(value.__code__)
+            elif isinstance(value, type) and value.__module__ == func.__module__:
+                pending.extend(member.__code__ for member in vars(value).values() if isinstance(member, types.FunctionType))
+    files = {home}
+    while modules:
+        path = home.parent / f"{modules.pop()}.py"
+        if path not in files:
+            files.add(path)
+            modules.update(_local_imports(path).values())
+    return sorted(files)
+
+
+class BuildManifest:
+    """Load, query and persist ``manifest.json`` plus cached stage values."""
+
+    def __init__(self, build_dir: Path) -> None:
+        self.build_dir = build_dir
+        self.path = build_dir / "manifest.json"
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        # Input records made by this instance, shared by every stage reading the same file.
+        self.input_records: Dict[Path, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                payload = json.loads(self.path.read_text())
+            except json.JSONDecodeError:
+                payload = {}
+            if payload.get("version") == MANIFEST_VERSION:
+                self.stages = payload.get("stages", {})
+
+    def input_record(self, path: Path) -> Optional[Dict[str, Any]]:
+        """Describe ``path``; ``None`` when the file is absent.
+
+        Hashing a multi-gigabyte CSV is itself expensive, so a hash already
+        taken in this run, or recorded by any stage in an earlier one, is reused
+        when size and mtime are unchanged: each file is hashed at most once.
+        """
+        if not path.exists():
+            return None
+        stat = path.stat()
+        known = [self.input_records.get(path)] + [entry.get("inputs", {}).get(path.name) for entry in self.stages.values()]
+        sha256 = next(
+            (
+                previous["sha256"]
+                for previous in known
+                if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns
+            ),
+            None,
+        )
+        record = {"sha256": sha256 or hash_file(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        self.input_records[path] = record
+        return record
+
+    @staticmethod
+    def stage_key(code: str, inputs: Dict[str, Optional[Dict[str, Any]]], upstream: Dict[str, str]) -> str:
+        fingerprint = {
+            "code": code,
+            "inputs": {name: record and record["sha256"] for name, record in inputs.items()},
+            "upstream": upstream,
+        }
+        return hash_value(fingerprint)
+
+    @staticmethod
+    def output_hashes(processed_dir: Path, outputs: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Hash of each output, ``None`` when absent.
+
+        A name ending in ``/`` is a directory written whole (cluster tiles, ZIP
+        shards): every file under it is hashed under its own name, so deleting
+        any one of them makes the stage stale.
+        """
+        hashes: Dict[str, Optional[str]] = {}
+        for name in outputs:
+            path = processed_dir / name
+            if not name.endswith("/"):
+                hashes[name] = hash_file(path) if path.exists() else None
+                continue
+            files = sorted(item for item in path.rglob("*") if item.is_file()) if path.is_dir() else []
+            if not files:
+                hashes[name] = None
+            hashes.update((item.relative_to(processed_dir).as_posix(), hash_file(item)) for item in files)
+        return hashes
+
+    def _values_path(self, stage: str) -> Path:
+        return self.build_dir / f"{stage}.pickle"
+
+    def is_fresh(self, stage: str, key: str, processed_dir: Path) -> bool:
+        entry = self.stages.get(stage)
+        if not entry or entry.get("key") != key or not self._values_path(stage).exists():
+            return False
+        recorded = entry.get("outputs", {})
+        return self.output_hashes(processed_dir, recorded) == recorded
+
+    def load_values(self, stage: str) -> Dict[str, Any]:
+        with self._values_path(stage).open("rb") as fh:
+            return pickle.load(fh)
+
+    def record(
+        self,
+        stage: str,
+        key: str,
+        inputs: Dict[str, Optional[Dict[str, Any]]],
+        upstream: Dict[str, str],
+        outputs: Dict[str, Optional[str]],
+        values: Dict[str, Any],
+    ) -> None:
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        with self._values_path(stage).open("wb") as fh:
+            pickle.dump(values, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        self.stages[stage] = {"key": key, "inputs": inputs, "upstream": upstream, "outputs": outputs}
+        self.save()
+
+    def save(self) -> None:
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps({"version": MANIFEST_VERSION, "stages": self.stages}, indent=2, sort_keys=True))
+        os.replace(tmp_path, self.path)
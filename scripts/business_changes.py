@@ -0,0 +1,128 @@
+"""
+Openings and closures across dated snapshots of the business registry.
+
+Each export (``Registered_Business_Locations_-_San_Francisco_YYYYMMDD.csv``)
+is a full listing. A location counts as active while it is in San Francisco
+and has neither a ``Business End Date`` nor a ``Location End Date``. Between
+consecutive snapshots, a location is an opening if it is active only in the
+newer one and a closure if it is active only in the older one (including
+records that disappear). Openings are attributed to the newer record's ZIP
+and sector, closures to the older one's. A location active in both whose ZIP
+or sector changed is neither; it just moves between the active counts.
+
+``ChangeHistory`` is the running state: the active set of the last snapshot
+applied (``UniqueID -> (zip, sector)``), active counts per ZIP and sector, and
+one change entry per snapshot after the first. It is pickled under
+``data/.build`` together with the size and mtime of every snapshot it has
+absorbed. A later run that finds those snapshots unchanged, plus newer ones,
+only parses and diffs the new files, so adding one export costs about one
+snapshot's parse however long the history is. Any other change to the list
+(a snapshot edited, removed or inserted earlier) rebuilds from the oldest one.
+"""
+
+from __future__ import annotations
+
+import pickle
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+HISTORY_VERSION = 2
+
+Active = Dict[str, Tuple[str, str]]
+
+
+def snapshot_record(path: Path, date: str) -> Dict[str, Any]:
+    stat = path.stat()
+    return {"name": path.name, "date": date, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def breakdown(opened: Counter, closed: Counter, active: Counter, label: str) -> List[Dict[str, Any]]:
+    """Per-key rows for every key with an opening or closure, sorted by key."""
+    return [
+        {label: key, "opened": opened[key], "closed": closed[key], "net": opened[key] - closed[key], "active": active[key]}
+        for key in sorted(set(opened) | set(closed))
+        if key
+    ]
+
+
+class ChangeHistory:
+    def __init__(self) -> None:
+        self.snapshots: List[Dict[str, Any]] = []
+        self.active: Active = {}
+        self.active_by_zip: Counter[str] = Counter()
+        self.active_by_sector: Counter[str] = Counter()
+        self.entries: List[Dict[str, Any]] = []
+
+    @classmethod
+    def load(cls, path: Path, snapshots: List[Dict[str, Any]]) -> "ChangeHistory":
+        """Saved history if it covers a prefix of ``snapshots`` (same files, same order), else an empty one."""
+        if path.exists():
+            try:
+                with path.open("rb") as fh:
+                    payload = pickle.load(fh)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                payload = None
+            if isinstance(payload, dict) and payload.get("version") == HISTORY_VERSION:
+                history = payload["history"]
+                if history.snapshots == snapshots[: len(history.snapshots)]:
+                    return history
+        return cls()
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with tmp_path.open("wb") as fh:
+            pickle.dump({"version": HISTORY_VERSION, "history": self}, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+
+    def apply(self, snapshot: Dict[str, Any], active: Active) -> Optional[Dict[str, Any]]:
+        """Diff ``active`` against the running state, then make it the running state.
+
+        Returns the change entry, or ``None`` for the first snapshot (the baseline).
+        """
+        previous = self.active
+        opened_ids = active.keys() - previous.keys()
+        closed_ids = previous.keys() - active.keys()
+        opened_zip: Counter[str] = Counter(active[uid][0] for uid in opened_ids)
+        opened_sector: Counter[str] = Counter(active[uid][1] for uid in opened_ids)
+        closed_zip: Counter[str] = Counter(previous[uid][0] for uid in closed_ids)
+        closed_sector: Counter[str] = Counter(previous[uid][1] for uid in closed_ids)
+        self.active_by_zip.update(opened_zip)
+        self.active_by_zip.subtract(closed_zip)
+        self.active_by_sector.update(opened_sector)
+        self.active_by_sector.subtract(closed_sector)
+        for uid in active.keys() & previous.keys():
+            (old_zip, old_sector), (new_zip, new_sector) = previous[uid], active[uid]
+            if old_zip != new_zip:
+                self.active_by_zip[old_zip] -= 1
+                self.active_by_zip[new_zip] += 1
+            if old_sector != new_sector:
+                self.active_by_sector[old_sector] -= 1
+                self.active_by_sector[new_sector] += 1
+
+        entry = None
+        if self.snapshots:
+            entry = {
+                "date": snapshot["date"],
+                "previous": self.snapshots[-1]["date"],
+                "opened": len(opened_ids),
+                "closed": len(closed_ids),
+                "net": len(opened_ids) - len(closed_ids),
+                "active": len(active),
+                "by_zip": breakdown(opened_zip, closed_zip, self.active_by_zip, "zip"),
+                "by_sector": breakdown(opened_sector, closed_sector, self.active_by_sector, "sector"),
+            }
+            self.entries.append(entry)
+        self.snapshots.append(snapshot)
+        self.active = active
+        return entry
+
+    def payload(self) -> Dict[str, Any]:
+        baseline = self.snapshots[0] if self.snapshots else None
+        first_active = self.entries[0]["active"] - self.entries[0]["net"] if self.entries else len(self.active)
+        return {
+            "snapshots": [snapshot["date"] for snapshot in self.snapshots],
+            "baseline": {"date": baseline["date"], "active": first_active} if baseline else None,
+            "entries": self.entries,
+        }
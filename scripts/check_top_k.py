@@ -0,0 +1,114 @@
+"""
+Compare exact and Space-Saving business tallies on the same registry.
+
+Run from project root:
+
+    python3 scripts/check_top_k.py --capacity 16
+    python3 scripts/check_top_k.py --capacity 8 --chunks 4 --path data/.bench/1000000/<registry>.csv
+
+Aggregates the business registry twice, once with ``Counter`` and once with
+``SpaceSaving(capacity)`` tallies, split into ``--chunks`` record-aligned ranges
+(4 by default, so summaries are merged as with chunk workers) and merged like
+the pipeline does. For the citywide top 10 and every ZIP's top
+3 sectors and neighborhoods it then reports:
+
+* how many ranked lists came out identical;
+* whether every approximate count satisfies ``count - error <= exact <= count``;
+* whether every item seen more than ``total / capacity`` times is still tracked;
+* how many items each mode holds in memory.
+
+Exits non-zero if a bound is violated. Ranking differences are expected once
+a tally overflows its capacity and are reported, not treated as failures.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import preprocess_data as pipeline
+from fast_csv import split_records
+from heavy_hitters import SpaceSaving
+
+
+def aggregate(path: Path, chunks: int, capacity: Optional[int]) -> Dict[str, Any]:
+    header, ranges = split_records(path, chunks)
+    return pipeline.merge_business_partials(
+        (pipeline.aggregate_business_range(path, start, end, header, capacity) for start, end in ranges), capacity
+    )
+
+
+def tally_pairs(exact: Dict[str, Any], approx: Dict[str, Any]) -> List[Tuple[str, Any, SpaceSaving, int]]:
+    """``(label, exact Counter, approximate tally, n)`` for every ranked list in the output."""
+    pairs = [("citywide sectors", exact["naics_rollup"], approx["naics_rollup"], 10)]
+    for zipcode, info in exact["business_by_zip"].items():
+        pairs.append((f"{zipcode} sectors", info["sectors"], approx["business_by_zip"][zipcode]["sectors"], 3))
+    for zipcode, counts in exact["zip_neighborhoods"].items():
+        pairs.append((f"{zipcode} neighborhoods", counts, approx["zip_neighborhoods"][zipcode], 3))
+    return pairs
+
+
+def check(exact: Dict[str, Any], approx: Dict[str, Any], capacity: int) -> Tuple[int, List[str], List[str]]:
+    """Return the number of identical ranked lists, the differing ones and any bound violations."""
+    identical = 0
+    differing: List[str] = []
+    violations: List[str] = []
+    for label, counts, tally, n in tally_pairs(exact, approx):
+        if counts.most_common(n) == tally.most_common(n):
+            identical += 1
+        else:
+            differing.append(f"  {label}: exact {counts.most_common(n)} vs approximate {tally.most_common(n)}")
+        for item, count in tally.items():
+            if not count - tally.error(item) <= counts[item] <= count:
+                violations.append(f"  {label}: {item!r} exact {counts[item]} outside [{count - tally.error(item)}, {count}]")
+        threshold = sum(counts.values()) / capacity
+        for item, count in counts.items():
+            if count > threshold and item not in tally:
+                violations.append(f"  {label}: {item!r} seen {count} times (> {threshold:.1f}) but not tracked")
+    return identical, differing, violations
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--capacity", type=int, default=16, help="Space-Saving capacity per tally (default: 16)")
+    parser.add_argument("--chunks", type=int, default=4, help="record-aligned ranges to aggregate and merge (default: 4)")
+    parser.add_argument(
+        "--path",
+        type=Path,
+        default=pipeline.DATA_DIR / pipeline.BUSINESS_CSV,
+        help="business registry CSV (default: the pipeline's)",
+    )
+    parser.add_argument("--verbose", action="store_true", help="print every ranked list that differs")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if not args.path.exists():
+        print(f"{args.path} not found", file=sys.stderr)
+        return 2
+    exact = aggregate(args.path, args.chunks, None)
+    approx = aggregate(args.path, args.chunks, args.capacity)
+    identical, differing, violations = check(exact, approx, args.capacity)
+
+    exact_items = len(exact["naics_rollup"]) + sum(len(info["sectors"]) for info in exact["business_by_zip"].values())
+    exact_items += sum(len(counts) for counts in exact["zip_neighborhoods"].values())
+    approx_items = len(approx["naics_rollup"]) + sum(len(info["sectors"]) for info in approx["business_by_zip"].values())
+    approx_items += sum(len(tally) for tally in approx["zip_neighborhoods"].values())
+    print(f"capacity {args.capacity}, {args.chunks} chunk(s)")
+    print(f"  tracked items: exact {exact_items:,}, Space-Saving {approx_items:,}")
+    print(f"  ranked lists identical: {identical} of {identical + len(differing)}")
+    if args.verbose and differing:
+        print("\n".join(differing))
+    if violations:
+        print(f"{len(violations)} bound violation(s):")
+        print("\n".join(violations))
+        return 1
+    print("  all counts within their error bounds")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
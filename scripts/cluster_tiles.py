@@ -0,0 +1,123 @@
+"""
+Zoom-level cluster tiles for the map's point layers.
+
+For each zoom from ``MIN_ZOOM`` to ``MAX_ZOOM`` points are projected to Web
+Mercator pixels (the scheme Leaflet's tile layers use) and grouped into square
+cells of ``CELL_PX`` pixels. Each non-empty cell becomes one cluster with its
+point count and mean lat/lon, and clusters are bucketed into the standard
+256-pixel ``z/x/y`` tiles. A cluster of a single point, and every cluster at
+``MAX_ZOOM``, also lists its point indexes (positions in the layer's
+``entries``) so the page can draw the real markers there.
+
+The map then fetches only the tiles covering the viewport at its zoom, so
+what it draws scales with the view rather than the size of the layer.
+``TileLayer`` writes them, with a ``meta.json`` listing them, into
+``tiles/<name>/`` beside a layer streamed by ``json_writer``.
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+from json_writer import OutputOptions, entry_point, write_json_tree
+
+TILES_VERSION = 1
+TILE_SIZE = 256
+CELL_PX = 64
+MIN_ZOOM = 10
+MAX_ZOOM = 16
+MAX_LATITUDE = 85.05112878
+
+TileKey = Tuple[int, int, int]
+
+
+def mercator_pixels(lat: float, lon: float, zoom: int) -> Tuple[float, float]:
+    """Global pixel position of ``lat``/``lon`` at ``zoom`` (origin at the north-west corner)."""
+    scale = TILE_SIZE * 2**zoom
+    sin_lat = math.sin(math.radians(max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))))
+    x = (lon + 180.0) / 360.0 * scale
+    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+    return x, y
+
+
+def build_tiles(coordinates: Sequence[float]) -> Tuple[Dict[str, Any], Dict[TileKey, Dict[str, Any]]]:
+    """Cluster interleaved ``[lat0, lon0, ...]`` into ``(meta, {(z, x, y): tile})``.
+
+    Points with a missing coordinate are left out, as in the spatial grid.
+    """
+    located = [
+        (index, coordinates[2 * index], coordinates[2 * index + 1])
+        for index in range(len(coordinates) // 2)
+        if math.isfinite(coordinates[2 * index]) and math.isfinite(coordinates[2 * index + 1])
+    ]
+    # Project once at the deepest zoom; shallower zooms just scale down.
+    pixels = [mercator_pixels(lat, lon, MAX_ZOOM) for _, lat, lon in located]
+
+    tiles: Dict[TileKey, Dict[str, Any]] = {}
+    for zoom in range(MIN_ZOOM, MAX_ZOOM + 1):
+        factor = 2.0 ** (zoom - MAX_ZOOM)
+        cells: Dict[Tuple[int, int], List[Any]] = {}
+        for (index, lat, lon), (x, y) in zip(located, pixels):
+            key = (int(x * factor // CELL_PX), int(y * factor // CELL_PX))
+            cell = cells.get(key)
+            if cell is None:
+                cell = cells[key] = [0, 0.0, 0.0, []]
+            cell[0] += 1
+            cell[1] += lat
+            cell[2] += lon
+            cell[3].append(index)
+
+        per_tile = TILE_SIZE // CELL_PX
+        for (cell_x, cell_y), (count, lat_sum, lon_sum, indexes) in sorted(cells.items()):
+            cluster: Dict[str, Any] = {"count": count, "lat": round(lat_sum / count, 6), "lon": round(lon_sum / count, 6)}
+            if count == 1 or zoom == MAX_ZOOM:
+                cluster["points"] = indexes
+            tile_key = (zoom, cell_x // per_tile, cell_y // per_tile)
+            tile = tiles.get(tile_key)
+            if tile is None:
+                tile = tiles[tile_key] = {"z": zoom, "x": tile_key[1], "y": tile_key[2], "clusters": []}
+            tile["clusters"].append(cluster)
+
+    listing: Dict[str, List[str]] = {str(zoom): [] for zoom in range(MIN_ZOOM, MAX_ZOOM + 1)}
+    for zoom, x, y in sorted(tiles):
+        listing[str(zoom)].append(f"{x}/{y}")
+    meta = {
+        "format": "tiles",
+        "version": TILES_VERSION,
+        "count": len(located),
+        "min_zoom": MIN_ZOOM,
+        "max_zoom": MAX_ZOOM,
+        "tile_size": TILE_SIZE,
+        "cell_px": CELL_PX,
+        "tiles": listing,
+    }
+    return meta, tiles
+
+
+def tiles_dir(path: Path) -> Path:
+    return path.parent / "tiles" / path.stem
+
+
+def write_tiles(directory: Path, coordinates: Sequence[float], options: OutputOptions) -> None:
+    """Write a layer's cluster tiles and their ``meta.json``."""
+    meta, tiles = build_tiles(coordinates)
+    files = {f"{zoom}/{x}/{y}.json": tile for (zoom, x, y), tile in tiles.items()}
+    files["meta.json"] = meta
+    write_json_tree(directory, files, options)
+
+
+class TileLayer:
+    """``JsonStream`` layer output: the entries clustered into ``tiles/<name>/``."""
+
+    def start(self, path: Path, options: OutputOptions) -> None:
+        self.directory, self.options = tiles_dir(path), options
+        self.coordinates = array("d")
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        self.coordinates.extend(entry_point(entry))
+
+    def finish(self) -> None:
+        write_tiles(self.directory, self.coordinates, self.options)
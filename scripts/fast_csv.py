@@ -0,0 +1,321 @@
+"""
+CSV helpers for the large raw exports read by ``preprocess_data.py``.
+
+``iter_columns`` resolves the handful of columns a stage needs from the header
+once and yields plain tuples instead of a dict per row; an optional
+``contains`` prefilter drops records whose raw text lacks a marker (for
+example ``"San Francisco"``) before they are parsed at all.
+
+``stream_records`` is for exports with a few enormous cells (geometry as
+WKT): it tokenizes the CSV itself, block by block, hands one column to a
+consumer piece by piece and never builds the cells of columns nobody asked
+for, so no cell is ever held whole.
+
+``split_records`` cuts a file into byte ranges that start and end on record
+boundaries (newlines inside quoted fields are respected), and ``read_range``
+parses one such range, so a file can be aggregated in parallel by worker
+processes and the partial results merged in range order.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import operator
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Protocol, Sequence, Tuple
+
+SCAN_BLOCK_SIZE = 1 << 22
+QUOTE = ord('"')
+STREAM_BLOCK_SIZE = 1 << 16
+FIELD_END = re.compile(r"[,\r\n]")
+
+
+class Sink(Protocol):
+    def feed(self, text: str) -> None: ...
+
+    def close(self) -> Any: ...
+
+
+def split_records(path: Path, chunks: int) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """Return the header fields and ``chunks`` (or fewer) record-aligned byte ranges.
+
+    Each range ends just after a newline that sits outside quoted fields. Whether
+    a newline is quoted depends on the parity of every quote before it, so this
+    makes one sequential pass over the file; that pass only counts bytes and is
+    far cheaper than the CSV parse it enables.
+    """
+    size = path.stat().st_size
+    chunks = max(1, chunks)
+    # Target 0 resolves to the end of the header record.
+    targets = [0] + [size * k // chunks for k in range(1, chunks)]
+    boundaries: List[int] = []
+
+    with path.open("rb") as fh:
+        base = 0
+        quotes = 0  # quote count in the file before ``base``
+        target_index = 0
+        while target_index < len(targets):
+            block = fh.read(SCAN_BLOCK_SIZE)
+            if not block:
+                break
+            cursor = 0
+            cursor_quotes = quotes
+            while target_index < len(targets):
+                start = max(targets[target_index] - base, cursor)
+                pos = block.find(b"\n", start)
+                found = False
+                while pos != -1:
+                    cursor_quotes += block.count(QUOTE, cursor, pos)
+                    cursor = pos
+                    if cursor_quotes % 2 == 0:
+                        found = True
+                        break
+                    pos = block.find(b"\n", pos + 1)
+                if not found:
+                    # Carry the target into the next block.
+                    targets[target_index] = base + len(block)
+                    break
+                boundary = base + pos + 1
+                if not boundaries or boundary > boundaries[-1]:
+                    boundaries.append(boundary)
+                target_index += 1
+            quotes += block.count(QUOTE)
+            base += len(block)
+
+        if not boundaries:
+            boundaries.append(size)
+        fh.seek(0)
+        header_bytes = fh.read(boundaries[0])
+
+    header = next(csv.reader(io.StringIO(header_bytes.decode("utf-8-sig"), newline="")), [])
+    ends = boundaries[1:] + [size]
+    ranges = [(start, end) for start, end in zip(boundaries, ends) if end > start]
+    return header, ranges
+
+
+def read_range(path: Path, start: int, end: int, contains: Optional[str] = None) -> Iterator[List[str]]:
+    """Yield parsed records from the byte range ``[start, end)`` of ``path``."""
+    with path.open("rb") as fh:
+        fh.seek(start)
+        data = fh.read(end - start)
+    lines: Iterable[str] = io.StringIO(data.decode("utf-8"), newline="")
+    if contains:
+        lines = prefilter_records(lines, contains)
+    for row in csv.reader(lines):
+        if row:
+            yield row
+
+
+def prefilter_records(lines: Iterable[str], contains: str) -> Iterator[str]:
+    """Pass through only the physical lines of records whose raw text contains ``contains``.
+
+    Lines are grouped into records by quote parity so a quoted field spanning
+    several lines is kept or dropped as a whole. This is a superset filter: the
+    caller still checks the parsed field.
+    """
+    pending: List[str] = []
+    quotes = 0
+    for line in lines:
+        quotes += line.count('"')
+        if quotes % 2:
+            pending.append(line)
+            continue
+        if pending:
+            pending.append(line)
+            record = "".join(pending)
+            pending = []
+        else:
+            record = line
+        quotes = 0
+        if contains in record:
+            yield record
+    if pending:
+        record = "".join(pending)
+        if contains in record:
+            yield record
+
+
+def read_header(path: Path) -> List[str]:
+    with path.open(newline="", encoding="utf-8-sig") as fh:
+        return next(csv.reader(fh), [])
+
+
+def iter_columns(
+    path: Path,
+    columns: Sequence[str],
+    contains: Optional[str] = None,
+) -> Iterator[Tuple[Optional[str], ...]]:
+    """Yield one tuple per record holding only ``columns``, in the order requested.
+
+    Cells that are absent (unknown column or a short row) come back as ``None``,
+    matching what ``csv.DictReader`` rows return from ``row.get(name)``.
+    """
+    with path.open(newline="", encoding="utf-8-sig") as fh:
+        header = next(csv.reader(fh), [])
+        project = projector(header, columns)
+        lines: Iterable[str] = fh
+        if contains:
+            lines = prefilter_records(fh, contains)
+        for row in csv.reader(lines):
+            if row:
+                yield project(row)
+
+
+def projector(header: List[str], columns: Sequence[str], missing: Any = None) -> Callable[[List[str]], Tuple[Any, ...]]:
+    """Return a function mapping a parsed row to the tuple of ``columns``.
+
+    Column positions are resolved once; unknown columns and cells past the end
+    of a short row read as ``missing``.
+    """
+    positions = column_indexes(header, list(columns))
+    indexes = [positions.get(name) for name in columns]
+    present = [index for index in indexes if index is not None]
+    width = max(present) + 1 if present else 0
+
+    if len(present) == len(indexes) and len(indexes) > 1:
+        getter = operator.itemgetter(*indexes)
+
+        def project(row: List[str]) -> Tuple[Any, ...]:
+            if len(row) < width:
+                row = row + [missing] * (width - len(row))
+            return getter(row)
+
+        return project
+
+    def project_slow(row: List[str]) -> Tuple[Any, ...]:
+        if len(row) < width:
+            row = row + [missing] * (width - len(row))
+        return tuple(missing if index is None else row[index] for index in indexes)
+
+    return project_slow
+
+
+def column_indexes(header: List[str], names: List[str]) -> Dict[str, int]:
+    """Map each requested column name to its position (last one wins, like ``DictReader``)."""
+    positions = {name: index for index, name in enumerate(header)}
+    return {name: positions[name] for name in names if name in positions}
+
+
+def stream_records(
+    path: Path,
+    columns: Sequence[str],
+    stream_column: Optional[str] = None,
+    sink_factory: Optional[Callable[[], Sink]] = None,
+    block_size: int = STREAM_BLOCK_SIZE,
+) -> Iterator[Tuple[Tuple[Optional[str], ...], Any]]:
+    """Yield ``(columns tuple, sink result)`` per record, like ``iter_columns`` plus one streamed column.
+
+    Each record gets a fresh ``sink_factory()``; the (unescaped) text of
+    ``stream_column`` goes to its ``feed`` in pieces as the file is read, and
+    what its ``close`` returns is yielded beside the other columns (``None``
+    without a stream column; the stream column's slot in the tuple, if it is
+    also requested, stays ``None``). Cells of columns not requested are
+    skipped without being built. The header must fit on one line.
+    """
+    with path.open(newline="", encoding="utf-8-sig") as fh:
+        header = next(csv.reader([fh.readline()]), [])
+        positions = column_indexes(header, list(columns))
+        stream_index = header.index(stream_column) if stream_column in header else -1
+        wanted = {
+            index: slot
+            for slot, index in enumerate(positions.get(name) for name in columns)
+            if index is not None and index != stream_index
+        }
+
+        cells: Dict[int, List[str]] = {}
+        sink: Optional[Sink] = None
+        field = 0
+        at_start = True  # at the first character of a field
+        in_quotes = False
+        pending_quote = False  # a block ended on a quote inside a quoted field
+        after_cr = False  # a record just ended on "\r"; a "\n" next belongs to it
+        content = False  # the record is more than a blank line
+
+        def emit(text: str) -> None:
+            nonlocal sink, content
+            if not text:
+                return
+            content = True
+            if field == stream_index:
+                if sink is None:
+                    sink = sink_factory()
+                sink.feed(text)
+            elif field in wanted:
+                cells.setdefault(field, []).append(text)
+
+        def end_record() -> Tuple[Tuple[Optional[str], ...], Any]:
+            nonlocal sink
+            values: List[Optional[str]] = [None] * len(columns)
+            for index, slot in wanted.items():
+                if index <= field:
+                    values[slot] = "".join(cells.get(index, ()))
+            result = None
+            if stream_index >= 0 and sink_factory is not None:
+                result = (sink or sink_factory()).close()
+            cells.clear()
+            sink = None
+            return tuple(values), result
+
+        while True:
+            text = fh.read(block_size)
+            if not text:
+                break
+            i, n = 0, len(text)
+            while i < n:
+                if after_cr:
+                    after_cr = False
+                    if text[i] == "\n":
+                        i += 1
+                        continue
+                if pending_quote:
+                    pending_quote = False
+                    if text[i] == '"':  # escaped quote split across blocks
+                        emit('"')
+                        i += 1
+                        continue
+                    in_quotes = False
+                if at_start:
+                    at_start = False
+                    if text[i] == '"':
+                        in_quotes = content = True
+                        i += 1
+                        continue
+                if in_quotes:
+                    j = text.find('"', i)
+                    if j == -1:
+                        emit(text[i:])
+                        break
+                    emit(text[i:j])
+                    if j + 1 == n:
+                        pending_quote = True
+                        break
+                    if text[j + 1] == '"':
+                        emit('"')
+                        i = j + 2
+                    else:
+                        in_quotes = False
+                        i = j + 1
+                    continue
+                match = FIELD_END.search(text, i)
+                if match is None:
+                    emit(text[i:])
+                    break
+                j = match.start()
+                emit(text[i:j])
+                i = j + 1
+                at_start = True
+                if text[j] == ",":
+                    field += 1
+                    continue
+                # "\r", "\n" and "\r\n" each end a record outside quotes, and
+                # blank lines hold none, as with csv.reader.
+                after_cr = text[j] == "\r"
+                if field or content:
+                    yield end_record()
+                cells.clear()
+                field = 0
+                content = False
+        if field or content:
+            yield end_record()
@@ -0,0 +1,128 @@
+"""
+Space-Saving heavy-hitter tallies for bounded-memory top-k counts.
+
+``SpaceSaving(capacity)`` tracks at most ``capacity`` distinct items, however
+many appear. When a new item arrives and the table is full, it replaces the
+item with the smallest count and inherits that count as its ``error``
+(Metwally, Agrawal & El Abbadi, 2005). Every reported count is then an upper
+bound on the true count, ``count - error`` is a lower bound, and any item seen
+more than ``total / capacity`` times is guaranteed to still be tracked.
+
+The class covers the parts of ``collections.Counter`` the business stage uses:
+``tally[item] += n``, ``update`` with another tally, ``items`` and
+``most_common``. That lets it stand in for a ``Counter`` in the same code.
+``update`` merges two summaries (for example partials from chunk workers) the
+standard mergeable way: an item only one side tracks may have been evicted
+from the other, so it is credited with that side's ``floor`` (its smallest
+count once full) both as count and as error; then the ``capacity`` largest
+counts are kept. Both bounds still hold after any number of merges. While no
+item has been evicted, the counts and tie order are exactly those a
+``Counter`` gives.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple, Union
+
+
+class SpaceSaving:
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.counts: Dict[Hashable, int] = {}
+        self.errors: Dict[Hashable, int] = {}
+        self.total = 0
+
+    def add(self, item: Hashable, count: int = 1, error: int = 0) -> None:
+        """Count ``count`` more occurrences of ``item``; ``error`` is overcount already in ``count``."""
+        self.total += count
+        if item in self.counts:
+            self.counts[item] += count
+            self.errors[item] += error
+            return
+        if len(self.counts) >= self.capacity:
+            # A linear scan is fine at the small capacities top-k needs.
+            floor_item = min(self.counts, key=self.counts.__getitem__)
+            floor = self.counts.pop(floor_item)
+            del self.errors[floor_item]
+            count += floor
+            error += floor
+        self.counts[item] = count
+        self.errors[item] = error
+
+    def __getitem__(self, item: Hashable) -> int:
+        return self.counts.get(item, 0)
+
+    def __setitem__(self, item: Hashable, count: int) -> None:
+        # Only ``tally[item] += n`` is supported: the assignment adds the difference.
+        self.add(item, count - self.counts.get(item, 0))
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self.counts
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def items(self) -> Iterable[Tuple[Hashable, int]]:
+        return self.counts.items()
+
+    @property
+    def floor(self) -> int:
+        """Upper bound on the count of any item not tracked: the smallest count once full, else 0."""
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def update(self, other: Union["SpaceSaving", Mapping[Hashable, int]]) -> None:
+        """Merge ``other``, another summary or exact counts, into this one (see the module docstring)."""
+        if isinstance(other, SpaceSaving):
+            other_counts, other_errors, other_floor, other_total = other.counts, other.errors, other.floor, other.total
+        else:
+            other_counts, other_errors, other_floor = dict(other.items()), {}, 0
+            other_total = sum(other_counts.values())
+        floor = self.floor
+        counts: Dict[Hashable, int] = {}
+        errors: Dict[Hashable, int] = {}
+        for item, count in self.counts.items():
+            if item in other_counts:
+                counts[item] = count + other_counts[item]
+                errors[item] = self.errors[item] + other_errors.get(item, 0)
+            else:
+                counts[item] = count + other_floor
+                errors[item] = self.errors[item] + other_floor
+        for item, count in other_counts.items():
+            if item not in counts:
+                counts[item] = count + floor
+                errors[item] = other_errors.get(item, 0) + floor
+        if len(counts) > self.capacity:
+            # Stable sort: among equal counts the first tracked stay, and survivors keep their order.
+            kept = set(sorted(counts, key=counts.__getitem__, reverse=True)[: self.capacity])
+            counts = {item: count for item, count in counts.items() if item in kept}
+        self.counts = counts
+        self.errors = {item: errors[item] for item in counts}
+        self.total += other_total
+
+    def error(self, item: Hashable) -> int:
+        """Largest possible overcount in ``self[item]``."""
+        return self.errors.get(item, 0)
+
+    @property
+    def max_error(self) -> int:
+        return max(self.errors.values(), default=0)
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[Hashable, int]]:
+        """Like ``Counter.most_common``: by count, ties in first-tracked order."""
+        ranked = sorted(self.counts.items(), key=lambda pair: pair[1], reverse=True)
+        return ranked if n is None else ranked[:n]
+
+    def __repr__(self) -> str:
+        return f"SpaceSaving(capacity={self.capacity}, total={self.total}, tracked={len(self.counts)})"
+
+
+def top_counts(tally: Any, n: int, label: str) -> List[Dict[str, Any]]:
+    """``tally.most_common(n)`` as ``[{label: item, "count": count}]``.
+
+    For a ``SpaceSaving`` tally each row also carries its ``error`` bound.
+    """
+    if isinstance(tally, SpaceSaving):
+        return [{label: item, "count": count, "error": tally.error(item)} for item, count in tally.most_common(n)]
+    return [{label: item, "count": count} for item, count in tally.most_common(n)]
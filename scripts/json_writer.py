@@ -0,0 +1,311 @@
+"""
+Streaming JSON output for ``data/processed``.
+
+``JsonStream`` writes a ``{..., "entries": [...], ...}`` payload one entry at a
+time, so a stage never has to hold its full output list just to serialize it.
+Files are written to a temporary path and moved into place when complete,
+unless the existing file already holds the same bytes: then the new copy is
+dropped and the old file (and its mtime) left alone, so an unchanged output is
+never rewritten and sync/deploy tools see nothing to upload. Output is
+byte-stable: the same entries in the same order always serialize identically
+(gzip sidecars carry no timestamp or file name).
+
+Output style is set once per process with ``configure``:
+
+* pretty (default): byte-for-byte what ``json.dumps(payload, indent=2)`` gives;
+* compact: no whitespace, and every ``lat``/``lon`` rounded to ``precision``
+  decimals (6 decimals is ~0.1 m, far below what the maps can show).
+
+With ``sidecars`` enabled each file also gets ``.gz`` and, when the optional
+``brotli`` package is installed, ``.br`` siblings compressed on the fly for
+servers that support precompressed static files. Stale sidecars are removed
+whenever they are not rewritten.
+
+Point layers pass ``layers``: ``LayerOutput`` objects that see every entry
+as it is written and, once the file is complete, write their own outputs
+beside it. Each comes from the module that owns its format:
+``columnar.ColumnarLayer`` (a ``<name>.columnar.json`` twin, with the
+``columnar`` option), ``spatial_index.GridLayer`` (a ``<name>.grid.json``
+spatial grid) and ``cluster_tiles.TileLayer`` (``tiles/<name>/{z}/{x}/{y}.json``
+map tiles plus a ``meta.json`` listing them).
+"""
+
+from __future__ import annotations
+
+import filecmp
+import gzip
+import json
+import math
+import os
+import shutil
+from collections import Counter
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, NamedTuple, Optional, Protocol, Sequence, Tuple
+
+try:  # Optional: pip install brotli
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COORDINATE_KEYS = ("lat", "lon")
+SIDECAR_SUFFIXES = (".gz", ".br")
+
+# Files, bytes (sidecars included) and ``entries`` items written by this
+# process, plus files left in place because their content was unchanged;
+# run_report.py reads the difference across each stage.
+WRITTEN: Counter[str] = Counter()
+
+
+class OutputOptions(NamedTuple):
+    compact: bool = False
+    precision: int = 6
+    sidecars: bool = True
+    columnar: bool = False
+
+
+OPTIONS = OutputOptions()
+
+
+class LayerOutput(Protocol):
+    def start(self, path: Path, options: OutputOptions) -> None: ...
+
+    def add(self, entry: Dict[str, Any]) -> None: ...
+
+    def finish(self) -> None: ...
+
+
+def configure(options: Optional[OutputOptions]) -> None:
+    """Set the output style for this process (also used as a pool initializer)."""
+    global OPTIONS
+    OPTIONS = options or OutputOptions()
+
+
+def compact_options(options: Optional[OutputOptions] = None) -> OutputOptions:
+    """``options`` (default: this process's) in compact style, for payloads pretty-printing would bloat."""
+    return (options or OPTIONS)._replace(compact=True)
+
+
+def round_coordinates(value: Any, precision: int) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: round(item, precision) if key in COORDINATE_KEYS and isinstance(item, float) else round_coordinates(item, precision)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [round_coordinates(item, precision) for item in value]
+    return value
+
+
+def entry_point(entry: Dict[str, Any]) -> Tuple[float, float]:
+    """``(lat, lon)`` of a point entry's ``coordinates``, NaN where missing."""
+    coordinates = entry.get("coordinates") or {}
+    lat, lon = (coordinates.get(key) for key in COORDINATE_KEYS)
+    return (math.nan if lat is None else float(lat), math.nan if lon is None else float(lon))
+
+
+def replace_if_changed(tmp_path: Path, target: Path) -> bool:
+    """Move ``tmp_path`` onto ``target`` unless ``target`` already has the same bytes; ``True`` if replaced."""
+    if target.is_file() and filecmp.cmp(tmp_path, target, shallow=False):
+        tmp_path.unlink()
+        return False
+    os.replace(tmp_path, target)
+    return True
+
+
+def same_tree(left: Path, right: Path) -> bool:
+    """Whether two directories hold the same file names with the same bytes."""
+    if not right.is_dir():
+        return False
+    compared = filecmp.dircmp(left, right)
+    if compared.left_only or compared.right_only or compared.funny_files:
+        return False
+    _, mismatch, errors = filecmp.cmpfiles(left, right, compared.common_files, shallow=False)
+    return not mismatch and not errors and all(same_tree(left / name, right / name) for name in compared.common_dirs)
+
+
+def write_json_tree(directory: Path, files: Dict[str, Dict[str, Any]], options: Optional[OutputOptions] = None) -> None:
+    """Write ``{relative path: payload}`` into a staging directory, then swap it in whole.
+
+    Files from an earlier run that are not in ``files`` disappear with the old
+    directory. When the staged tree is identical to the existing one, the
+    existing one is kept instead.
+    """
+    staging = directory.with_name(f".{directory.name}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    written = Counter(WRITTEN)
+    for name, payload in files.items():
+        write_json(staging / name, payload, options)
+    if same_tree(staging, directory):
+        shutil.rmtree(staging)
+        # Nothing reached ``directory``: count the staged files as unchanged instead.
+        WRITTEN["unchanged"] += WRITTEN["files"] - written["files"]
+        WRITTEN["files"], WRITTEN["bytes"] = written["files"], written["bytes"]
+        return
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(staging, directory)
+
+
+def remove_output(path: Path) -> None:
+    """Delete ``path`` and its compressed sidecars, if present."""
+    path.unlink(missing_ok=True)
+    for suffix in SIDECAR_SUFFIXES:
+        path.with_name(path.name + suffix).unlink(missing_ok=True)
+
+
+class JsonStream:
+    """Context manager that streams ``entries`` between optional ``head`` and ``tail`` keys.
+
+    With ``key=None`` no list is streamed and the object is just ``head`` + ``tail``.
+    ``layers`` mark the entries as a point layer (see the module docstring);
+    they finish only when the file itself was written successfully.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        head: Optional[Dict[str, Any]] = None,
+        tail: Optional[Dict[str, Any]] = None,
+        key: Optional[str] = "entries",
+        options: Optional[OutputOptions] = None,
+        layers: Sequence[LayerOutput] = (),
+    ) -> None:
+        self.path = path
+        self.head = head or {}
+        self.tail = tail or {}
+        self.key = key
+        self.options = options or OPTIONS
+        self.count = 0
+        self.bytes_written = 0
+        self._sinks: List[BinaryIO] = []
+        self._tmp_paths: Dict[Path, Path] = {}
+        self._gzip: Optional[gzip.GzipFile] = None
+        self._brotli: Any = None
+        self._brotli_fh: Optional[BinaryIO] = None
+        self.layers = layers
+
+    # Formatting -----------------------------------------------------------
+
+    def _dumps(self, value: Any, depth: int) -> str:
+        if self.options.compact:
+            return json.dumps(round_coordinates(value, self.options.precision), separators=(",", ":"))
+        return json.dumps(value, indent=2).replace("\n", "\n" + "  " * depth)
+
+    def _member(self, name: str, value: Any) -> str:
+        if self.options.compact:
+            return f"{json.dumps(name)}:{self._dumps(value, 1)}"
+        return f"\n  {json.dumps(name)}: {self._dumps(value, 1)}"
+
+    # Output ---------------------------------------------------------------
+
+    def _emit(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.bytes_written += len(data)
+        self._raw.write(data)
+        if self._gzip is not None:
+            self._gzip.write(data)
+        if self._brotli is not None:
+            self._brotli_fh.write(self._brotli.process(data))
+
+    def _temp(self, target: Path) -> Path:
+        tmp_path = target.with_name(f".{target.name}.tmp")
+        self._tmp_paths[target] = tmp_path
+        return tmp_path
+
+    def __enter__(self) -> "JsonStream":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._raw = self._temp(self.path).open("wb")
+        if self.options.sidecars:
+            gz_fh = self._temp(self.path.with_name(self.path.name + ".gz")).open("wb")
+            self._sinks.append(gz_fh)
+            self._gzip = gzip.GzipFile(filename="", mode="wb", fileobj=gz_fh, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self._brotli_fh = self._temp(self.path.with_name(self.path.name + ".br")).open("wb")
+                self._brotli = brotli.Compressor(quality=11)
+
+        opening = "{" + ",".join(self._member(name, value) for name, value in self.head.items())
+        if self.key is not None:
+            if self.head:
+                opening += ","
+            opening += f"{json.dumps(self.key)}:[" if self.options.compact else f"\n  {json.dumps(self.key)}: ["
+        self._emit(opening)
+        for layer in self.layers:
+            layer.start(self.path, self.options)
+        return self
+
+    def write(self, entry: Any) -> None:
+        prefix = "," if self.count else ""
+        if self.options.compact:
+            self._emit(prefix + self._dumps(entry, 0))
+        else:
+            self._emit(f"{prefix}\n    {self._dumps(entry, 2)}")
+        for layer in self.layers:
+            layer.add(entry)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            closing = ""
+            if self.key is not None:
+                closing = "]" if self.options.compact or not self.count else "\n  ]"
+            members = [self._member(name, value) for name, value in self.tail.items()]
+            if members:
+                closing += ("," if self.key is not None or self.head else "") + ",".join(members)
+            if not self.options.compact and (self.key is not None or self.head or self.tail):
+                closing += "\n"
+            self._emit(closing + "}")
+        self._close()
+        if exc_type is not None:
+            for tmp_path in self._tmp_paths.values():
+                tmp_path.unlink(missing_ok=True)
+            return
+        for target, tmp_path in self._tmp_paths.items():
+            size = tmp_path.stat().st_size
+            if replace_if_changed(tmp_path, target):
+                WRITTEN["files"] += 1
+                WRITTEN["bytes"] += size
+            else:
+                WRITTEN["unchanged"] += 1
+        WRITTEN["entries"] += self.count
+        for suffix in SIDECAR_SUFFIXES:
+            sidecar = self.path.with_name(self.path.name + suffix)
+            if sidecar not in self._tmp_paths:
+                sidecar.unlink(missing_ok=True)
+        for layer in self.layers:
+            layer.finish()
+
+    def _close(self) -> None:
+        self._raw.close()
+        if self._gzip is not None:
+            self._gzip.close()
+        if self._brotli is not None:
+            self._brotli_fh.write(self._brotli.finish())
+            self._brotli_fh.close()
+        for sink in self._sinks:
+            sink.close()
+
+
+def write_json(
+    path: Path,
+    payload: Dict[str, Any],
+    options: Optional[OutputOptions] = None,
+    layers: Sequence[LayerOutput] = (),
+) -> int:
+    """Write ``payload`` through ``JsonStream``; returns the bytes written.
+
+    A list under ``entries`` is streamed item by item, keeping the keys before
+    and after it in place. ``layers`` are passed on to ``JsonStream``.
+    """
+    if not isinstance(payload.get("entries"), list):
+        with JsonStream(path, head=payload, key=None, options=options) as stream:
+            pass
+        return stream.bytes_written
+
+    keys = list(payload)
+    split = keys.index("entries")
+    head = {key: payload[key] for key in keys[:split]}
+    tail = {key: payload[key] for key in keys[split + 1 :]}
+    with JsonStream(path, head=head, tail=tail, options=options, layers=layers) as stream:
+        for entry in payload["entries"]:
+            stream.write(entry)
+    return stream.bytes_written
@@ -0,0 +1,160 @@
+"""
+Column store for the point records handed between pipeline stages.
+
+The parks, facilities and schools stages hand their address points (and the
+schools stage its school records) to later stages. As lists of dicts each
+row costs a dict, a nested ``coordinates`` dict and two boxed floats, which
+is several hundred bytes of overhead per row. A ``PointTable`` holds the
+same records column by column:
+
+* ``coordinates``: lat/lon interleaved in one ``array("d")``, the layout
+  ``GridIndex`` and the grid/tile writers already use;
+* categorical fields (named by the caller): each distinct value stored once
+  in a table, plus one integer code per row in an ``array`` that widens from
+  uint8 to uint16/uint32 as the table grows (as in ``columnar.py``);
+* everything else: one plain list per field.
+
+Rows are read through ``PointRow`` views (``__slots__``, nothing copied) or
+rebuilt one at a time as JSON entries by ``entries()``, with the fields in
+declaration order followed by ``coordinates``, so a writer produces the
+same bytes as it did from the dicts. Tables pickle as raw array bytes, which
+keeps handing one to a worker process or caching it in the build manifest
+cheap, and ``digest`` gives the manifest a stable content hash.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from array import array
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Sequence, Tuple
+
+from columnar import CODE_TYPES
+
+
+class PointRow:
+    """Read-only view of one row of a ``PointTable``."""
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: "PointTable", index: int) -> None:
+        self.table = table
+        self.index = index
+
+    @property
+    def lat(self) -> float:
+        return self.table.coordinates[2 * self.index]
+
+    @property
+    def lon(self) -> float:
+        return self.table.coordinates[2 * self.index + 1]
+
+    def __getitem__(self, name: str) -> Any:
+        return self.table.value(name, self.index)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.table.value(name, self.index) if name in self.table.fields else default
+
+    def entry(self) -> Dict[str, Any]:
+        return self.table.entry(self.index)
+
+
+class PointTable:
+    """Records with a fixed set of ``fields`` plus a coordinate pair, stored column-wise."""
+
+    __slots__ = ("fields", "categorical", "coordinates", "values", "codes", "tables", "lookups")
+
+    def __init__(self, fields: Sequence[str], categorical: Sequence[str] = ()) -> None:
+        self.fields = tuple(fields)
+        self.categorical = frozenset(categorical)
+        self.coordinates = array("d")
+        self.values: Dict[str, List[Any]] = {name: [] for name in self.fields if name not in self.categorical}
+        self.codes: Dict[str, array] = {name: array(CODE_TYPES[0][0]) for name in self.fields if name in self.categorical}
+        self.tables: Dict[str, List[Hashable]] = {name: [] for name in self.codes}
+        # value -> code, rebuilt on unpickling rather than stored
+        self.lookups: Dict[str, Dict[Hashable, int]] = {name: {} for name in self.codes}
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        return self.fields, self.categorical, self.coordinates, self.values, self.codes, self.tables
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        self.fields, self.categorical, self.coordinates, self.values, self.codes, self.tables = state
+        self.lookups = {name: {value: code for code, value in enumerate(table)} for name, table in self.tables.items()}
+
+    def append(self, lat: float, lon: float, *values: Any) -> None:
+        """Add a row: its coordinates, then one value per field in ``fields`` order."""
+        self.coordinates.append(lat)
+        self.coordinates.append(lon)
+        for name, value in zip(self.fields, values):
+            if name not in self.codes:
+                self.values[name].append(value)
+                continue
+            lookup = self.lookups[name]
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(lookup)
+                self.tables[name].append(value)
+                codes = self.codes[name]
+                if code >= next(limit for typecode, _, limit in CODE_TYPES if typecode == codes.typecode):
+                    # The table outgrew the code width: move to the next one up.
+                    wider = next(typecode for typecode, _, limit in CODE_TYPES if code < limit)
+                    self.codes[name] = array(wider, codes)
+            self.codes[name].append(code)
+
+    def __len__(self) -> int:
+        return len(self.coordinates) // 2
+
+    def __getitem__(self, index: int) -> PointRow:
+        if not -len(self) <= index < len(self):
+            raise IndexError("PointTable index out of range")
+        return PointRow(self, index % len(self))
+
+    def __iter__(self) -> Iterator[PointRow]:
+        return (PointRow(self, index) for index in range(len(self)))
+
+    def value(self, name: str, index: int) -> Any:
+        if name in self.codes:
+            return self.tables[name][self.codes[name][index]]
+        return self.values[name][index]
+
+    def column(self, name: str) -> Iterator[Any]:
+        if name in self.codes:
+            table = self.tables[name]
+            return (table[code] for code in self.codes[name])
+        return iter(self.values[name])
+
+    def points(self) -> Iterator[Tuple[float, float]]:
+        """``(lat, lon)`` of every row, in order."""
+        coordinates = self.coordinates
+        return ((coordinates[k], coordinates[k + 1]) for k in range(0, len(coordinates), 2))
+
+    def entry(self, index: int) -> Dict[str, Any]:
+        """Row ``index`` as a JSON entry: the fields, then ``coordinates``."""
+        entry = {name: self.value(name, index) for name in self.fields}
+        entry["coordinates"] = {"lat": self.coordinates[2 * index], "lon": self.coordinates[2 * index + 1]}
+        return entry
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        return (self.entry(index) for index in range(len(self)))
+
+    def take(self, order: Iterable[int]) -> "PointTable":
+        """New table holding the rows at ``order``, in that order."""
+        table = PointTable(self.fields, self.categorical)
+        for index in order:
+            table.append(self.coordinates[2 * index], self.coordinates[2 * index + 1], *(self.value(name, index) for name in self.fields))
+        return table
+
+    def sorted(self, key: Callable[[PointRow], Any]) -> "PointTable":
+        return self.take(sorted(range(len(self)), key=lambda index: key(PointRow(self, index))))
+
+    def digest(self) -> str:
+        """SHA-256 of the table's contents, for the build manifest's upstream hashes."""
+        digest = hashlib.sha256(json.dumps([self.fields, sorted(self.categorical)]).encode())
+        digest.update(self.coordinates.tobytes())
+        for name in self.fields:
+            if name in self.codes:
+                digest.update(json.dumps(self.tables[name]).encode())
+                digest.update(array("I", self.codes[name]).tobytes())
+            else:
+                digest.update(json.dumps(self.values[name]).encode())
+        return digest.hexdigest()
@@ -4,21 +4,116 @@ Generate lightweight JSON summaries used by the San Francisco resource dashboard
 Run from project root:
 
     python3 scripts/preprocess_data.py
+
+Stages run on a process pool in dependency order; pass ``--jobs 1`` to run
+them serially in-process (handy for debugging). Stages whose raw inputs,
+upstream values and code are unchanged since the last run are skipped (see
+``build_manifest.py``); ``--force STAGE`` rebuilds one anyway.
+
+Each run writes ``data/.build/run_report.json`` with per-stage wall and CPU
+time, rows read/skipped/emitted, bytes written and peak memory (see
+``run_report.py``). ``--profile STAGE`` rebuilds that stage under cProfile, or
+tracemalloc with ``--profile-mode tracemalloc``. ``--sqlite`` also loads the
+normalized records into an indexed ``records.sqlite`` (see ``record_store.py``).
+
+Outputs whose bytes are unchanged are not rewritten. After every build each
+top-level output also gets a content-hashed copy under ``hashed/``, listed in
+``assets.json`` (see ``asset_manifest.py``), for long-lived HTTP caching.
+
+``--watch`` keeps running after the build and, whenever a CSV in ``data/``
+changes, rebuilds only the stages it feeds and their dependents (see
+``watcher.py``); ``serve.py`` pushes each rebuild to the open page.
 """
 
 from __future__ import annotations
 
+import argparse
 import csv
 import json
+import os
 import re
+import traceback
 from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import ExitStack
+from functools import partial
+from itertools import chain
 from pathlib import Path
-from typing import Dict, Iterable, Tuple, List, Any
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Sequence, Tuple, List, Any
+
+from accessibility import ACCESS_VERSION, RADII_KM, Layer, measure_points
+from asset_manifest import publish_assets
+from build_manifest import BuildManifest, hash_sources, hash_value, source_files
+from business_changes import ChangeHistory, snapshot_record
+from cluster_tiles import TileLayer
+from columnar import ColumnarLayer
+from fast_csv import iter_columns, projector, read_range, split_records, stream_records
+from heavy_hitters import SpaceSaving, top_counts
+from json_writer import JsonStream, LayerOutput, OutputOptions, compact_options, configure as configure_output, remove_output, write_json, write_json_tree
+from point_table import PointTable
+from record_store import TABLES, RecordStore
+from run_report import PROFILE_MODES, RunReport, count_rows, instrumented
+from search_index import build_search_index
+from shapes import LEVELS as SHAPE_LEVELS, SHAPES_VERSION, ShapeSimplifier, encode_polygons, level_quantum
+from spatial_index import GridLayer
+from timeseries import SeriesMatrix, change, quarter_end_date, value_range
+from watcher import publish_changes, stages_downstream, stages_upstream, watch
 
 ROOT = Path(__file__).resolve().parents[1]
-DATA_DIR = ROOT / "data"
+# PREPROCESS_DATA_DIR points the pipeline at another raw-data tree (benchmark.py uses this).
+DATA_DIR = Path(os.environ.get("PREPROCESS_DATA_DIR") or ROOT / "data")
 PROCESSED_DIR = DATA_DIR / "processed"
-PROCESSED_DIR.mkdir(exist_ok=True)
+PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+BUILD_DIR = DATA_DIR / ".build"
+# Byte-offset sidecars for the wide Zillow files (see region_index.py).
+INDEX_DIR = BUILD_DIR / "index"
+REPORT_PATH = BUILD_DIR / "run_report.json"
+PROFILE_DIR = BUILD_DIR / "profile"
+CHANGES_PATH = BUILD_DIR / "changes.json"
+
+# Address points (parks, facilities, schools) and school records travel between stages as
+# ``PointTable``s with these fields; the categorical ones are also the columnar sidecars' tables.
+ADDRESS_FIELDS = ("label", "address", "zip", "type")
+ADDRESS_CATEGORIES = ("zip", "type")
+SCHOOL_FIELDS = ("name", "zip", "ownership", "category", "general_type", "grades", "address")
+SCHOOL_CATEGORIES = ("zip", "ownership", "category", "general_type", "grades")
+
+
+def point_layer(categorical: Sequence[str], tiles: bool = False) -> Tuple[LayerOutput, ...]:
+    """What a point layer's ``JsonStream`` writes beside it: columnar twin, spatial grid and, for map layers, tiles."""
+    return (ColumnarLayer(categorical), GridLayer()) + ((TileLayer(),) if tiles else ())
+
+BUSINESS_SNAPSHOT_PATTERN = re.compile(r"^Registered_Business_Locations_-_San_Francisco_(\d{4})(\d{2})(\d{2})\.csv$")
+
+
+def business_snapshots() -> List[Tuple[str, str]]:
+    """Dated business registry exports in ``data/`` as ``(YYYY-MM-DD, filename)``, oldest first."""
+    found = []
+    for path in DATA_DIR.glob("Registered_Business_Locations_-_San_Francisco_*.csv"):
+        match = BUSINESS_SNAPSHOT_PATTERN.match(path.name)
+        if match:
+            found.append(("-".join(match.groups()), path.name))
+    return sorted(found)
+
+
+BUSINESS_SNAPSHOTS = business_snapshots()
+# Current-state rollups read the newest export.
+BUSINESS_CSV = BUSINESS_SNAPSHOTS[-1][1] if BUSINESS_SNAPSHOTS else "Registered_Business_Locations_-_San_Francisco_20251028.csv"
+PARKS_CSV = "Recreation_and_Parks_Properties_20251027.csv"
+FACILITIES_CSV = "City_Facilities_-_Recreation_and_Parks_Jurisdiction_or_Leased_20251027.csv"
+SCHOOLS_CSV = "Schools_20251027.csv"
+CHAS_CSV = "chas_440994.csv"
+CITY_ZORI_CSV = "City_zori_uc_sfrcondomfr_sm_month.csv"
+ZIP_ZORI_CSV = "Zip_zori_uc_sfrcondomfr_sm_month.csv"
+CITY_ZHVI_CSV = "City_zhvi_uc_sfrcondo_tier_0.33_0.67_sm_sa_month.csv"
+HPI_CSV = "hpi_master.csv"
+RECORDS_DB = "records.sqlite"
+ZIP_SHARDS_VERSION = 1
+
+RENT_BASELINE_DATE = "2020-01-31"
+HPI_BASELINE_DATE = "2020-03-31"
+# FHFA place id for the San Francisco-San Mateo-Redwood City metro division.
+SF_HPI_PLACE_ID = "41884"
 
 
 def load_neighborhood_centroid_lookup() -> Dict[str, Dict[str, float]]:
@@ -66,40 +161,77 @@ def load_business_centroids() -> Dict[str, Dict[str, float]]:
     return lookup
 
 
-def load_csv(path: Path) -> Iterable[Dict[str, str]]:
-    with path.open(newline="") as fh:
-        reader = csv.DictReader(fh)
-        for row in reader:
-            yield row
-
-
-def preprocess_businesses() -> None:
-    path = DATA_DIR / "Registered_Business_Locations_-_San_Francisco_20251027.csv"
-    if not path.exists():
-        return
-
+BUSINESS_COLUMNS = ["City", "Source Zipcode", "Neighborhoods - Analysis Boundaries", "NAICS Code Description"]
+# Ranges smaller than this are not worth shipping to another process.
+MIN_CHUNK_BYTES = 8 << 20
+
+
+def map_record_ranges(path: Path, func: Callable[..., Any], chunk_workers: Optional[int], *args: Any) -> Iterator[Any]:
+    """Yield ``func(path, start, end, header, *args)`` for record-aligned ranges of ``path``, in file order.
+
+    Ranges run on up to ``chunk_workers`` processes (default: CPU count); files
+    too small to be worth splitting are read in-process as one range.
+    """
+    workers = chunk_workers or os.cpu_count() or 1
+    chunks = min(workers * 2, max(1, path.stat().st_size // MIN_CHUNK_BYTES)) if workers > 1 else 1
+    header, ranges = split_records(path, chunks)
+    if len(ranges) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+            futures = [pool.submit(func, path, start, end, header, *args) for start, end in ranges]
+            for future in futures:
+                yield future.result()
+    else:
+        for start, end in ranges:
+            yield func(path, start, end, header, *args)
+
+
+def business_tally(top_k_capacity: Optional[int] = None) -> Callable[[], Any]:
+    """Factory for the sector/neighborhood tallies: exact ``Counter`` or bounded ``SpaceSaving``."""
+    return Counter if top_k_capacity is None else partial(SpaceSaving, top_k_capacity)
+
+
+def aggregate_business_range(
+    path: Path,
+    start: int,
+    end: int,
+    header: List[str],
+    top_k_capacity: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Aggregate one record-aligned byte range of the business registry into partial counters."""
+    tally = business_tally(top_k_capacity)
     business_by_zip: Dict[str, Dict] = {}
     business_by_neighborhood: Dict[str, Dict] = {}
-    naics_rollup: Counter[str] = Counter()
-    zip_neighborhoods: Dict[str, Counter[str]] = defaultdict(Counter)
-
-    for row in load_csv(path):
-        if row.get("City") != "San Francisco":
+    naics_rollup = tally()
+    zip_neighborhoods: Dict[str, Any] = defaultdict(tally)
+    # ZIP centroids need exact neighborhood counts; only Space-Saving tallies need a separate copy.
+    neighborhood_weights: Optional[Dict[str, Counter]] = defaultdict(Counter) if top_k_capacity is not None else None
+
+    project = projector(header, BUSINESS_COLUMNS, missing="")
+    rows_read = rows_skipped = 0
+    # No raw-text prefilter here: nearly every registry row is in San Francisco,
+    # so the check would cost more than the parsing it saves.
+    for row in read_range(path, start, end):
+        rows_read += 1
+        city, zipcode, neighborhood, naics_desc = project(row)
+        if city != "San Francisco":
+            rows_skipped += 1
             continue
-        zipcode = (row.get("Source Zipcode") or "").strip()
-        neighborhood = (row.get("Neighborhoods - Analysis Boundaries") or "").strip()
-        naics_desc = (row.get("NAICS Code Description") or "").strip()
+        zipcode = zipcode.strip()
+        neighborhood = neighborhood.strip()
+        naics_desc = naics_desc.strip()
 
         if zipcode:
             entry = business_by_zip.setdefault(
                 zipcode,
-                {"count": 0, "sectors": Counter()},
+                {"count": 0, "sectors": tally()},
             )
             entry["count"] += 1
             if naics_desc:
                 entry["sectors"][naics_desc] += 1
             if neighborhood:
                 zip_neighborhoods[zipcode][neighborhood] += 1
+                if neighborhood_weights is not None:
+                    neighborhood_weights[zipcode][neighborhood] += 1
 
         if neighborhood:
             entry = business_by_neighborhood.setdefault(
@@ -111,26 +243,145 @@ def preprocess_businesses() -> None:
         if naics_desc:
             naics_rollup[naics_desc] += 1
 
+    return {
+        "business_by_zip": business_by_zip,
+        "business_by_neighborhood": business_by_neighborhood,
+        "naics_rollup": naics_rollup,
+        "zip_neighborhoods": zip_neighborhoods,
+        "neighborhood_weights": neighborhood_weights,
+        "rows_read": rows_read,
+        "rows_skipped": rows_skipped,
+    }
+
+
+BUSINESS_RECORD_COLUMNS = BUSINESS_COLUMNS + ["Supervisor District", "Business Start Date", "Business Location"]
+WKT_POINT = re.compile(r"POINT \(\s*([-\d.]+)\s+([-\d.]+)\s*\)")
+US_DATE = re.compile(r"^\s*(\d{1,2})/(\d{1,2})/(\d{4})")
+ISO_DATE = re.compile(r"^\s*(\d{4})[-/](\d{2})[-/](\d{2})")
+
+
+def registry_date(value: str) -> str:
+    """``MM/DD/YYYY`` (or ISO) registry dates as ``YYYY-MM-DD``; ``""`` when unparseable."""
+    match = US_DATE.match(value)
+    if match:
+        month, day, year = match.groups()
+        return f"{year}-{int(month):02d}-{int(day):02d}"
+    match = ISO_DATE.match(value)
+    return "-".join(match.groups()) if match else ""
+
+
+def read_business_range(path: Path, start: int, end: int, header: List[str]) -> List[Tuple[Any, ...]]:
+    """``(zip, neighborhood, sector, district, start_date, lat, lon)`` for the San Francisco rows of one byte range.
+
+    Same projection and city filter as ``aggregate_business_range``; the query
+    server (``serve.py``) and the SQLite store load the registry through this.
+    Coordinates come from the ``POINT (lon lat)`` location and are ``None``
+    when it is missing.
+    """
+    project = projector(header, BUSINESS_RECORD_COLUMNS, missing="")
+    labels: Dict[str, str] = {}
+    records = []
+    for row in read_range(path, start, end):
+        city, zipcode, neighborhood, naics_desc, district, start_date, location = project(row)
+        if city != "San Francisco":
+            continue
+        # Share one string object per distinct label across the records.
+        fields = (zipcode.strip(), neighborhood.strip(), naics_desc.strip(), district.strip())
+        point = WKT_POINT.search(location)
+        lat, lon = (float(point.group(2)), float(point.group(1))) if point else (None, None)
+        records.append(tuple(labels.setdefault(field, field) for field in fields) + (registry_date(start_date), lat, lon))
+    return records
+
+
+def empty_business_partial(top_k_capacity: Optional[int] = None) -> Dict[str, Any]:
+    tally = business_tally(top_k_capacity)
+    return {
+        "business_by_zip": {},
+        "business_by_neighborhood": {},
+        "naics_rollup": tally(),
+        "zip_neighborhoods": defaultdict(tally),
+        "neighborhood_weights": defaultdict(Counter) if top_k_capacity is not None else None,
+        "rows_read": 0,
+        "rows_skipped": 0,
+    }
+
+
+def merge_business_partials(partials: Iterable[Dict[str, Any]], top_k_capacity: Optional[int] = None) -> Dict[str, Any]:
+    """Fold partial aggregates together in range order.
+
+    Merging in file order keeps every dict and Counter in first-seen order, so
+    ties in the sorts and ``most_common`` calls downstream resolve exactly as a
+    single serial pass would.
+    """
+    tally = business_tally(top_k_capacity)
+    merged = empty_business_partial(top_k_capacity)
+    for chunk in partials:
+        for zipcode, info in chunk["business_by_zip"].items():
+            entry = merged["business_by_zip"].setdefault(zipcode, {"count": 0, "sectors": tally()})
+            entry["count"] += info["count"]
+            entry["sectors"].update(info["sectors"])
+        for neighborhood, info in chunk["business_by_neighborhood"].items():
+            merged["business_by_neighborhood"].setdefault(neighborhood, {"count": 0})["count"] += info["count"]
+        merged["naics_rollup"].update(chunk["naics_rollup"])
+        for zipcode, counts in chunk["zip_neighborhoods"].items():
+            merged["zip_neighborhoods"][zipcode].update(counts)
+        for zipcode, counts in (chunk["neighborhood_weights"] or {}).items():
+            merged["neighborhood_weights"][zipcode].update(counts)
+        merged["rows_read"] += chunk["rows_read"]
+        merged["rows_skipped"] += chunk["rows_skipped"]
+    return merged
+
+
+def preprocess_businesses(
+    neighborhood_centroids: Optional[Dict[str, Dict[str, float]]] = None,
+    chunk_workers: Optional[int] = None,
+    top_k_capacity: Optional[int] = None,
+) -> Dict[str, Any]:
+    """ZIP and neighborhood business rollups.
+
+    Sector and neighborhood tallies are exact by default. With
+    ``top_k_capacity`` they are Space-Saving summaries of that many items
+    each (see ``heavy_hitters.py``): memory no longer grows with the number of
+    distinct categories, and every reported count carries its ``error`` bound.
+    The ZIP centroids still come from exact per-ZIP neighborhood counts, so
+    they, and the stages using them, are the same in either mode.
+    """
+    path = DATA_DIR / BUSINESS_CSV
+    if not path.exists():
+        return {}
+
+    # Map: aggregate record-aligned byte ranges in worker processes.
+    # Reduce: merge the partial counters in file order.
+    merged = merge_business_partials(map_record_ranges(path, aggregate_business_range, chunk_workers, top_k_capacity), top_k_capacity)
+    count_rows(merged["rows_read"], merged["rows_skipped"])
+
+    business_by_zip: Dict[str, Dict] = merged["business_by_zip"]
+    business_by_neighborhood: Dict[str, Dict] = merged["business_by_neighborhood"]
+    naics_rollup = merged["naics_rollup"]
+    zip_neighborhoods: Dict[str, Any] = merged["zip_neighborhoods"]
+    # Centroids are weighted by exact counts even when the top-k lists are approximate.
+    neighborhood_weights: Dict[str, Counter] = zip_neighborhoods if top_k_capacity is None else merged["neighborhood_weights"]
+
     total_businesses = sum(info["count"] for info in business_by_zip.values())
     total_businesses = total_businesses or 1
 
-    neighborhood_centroids = load_neighborhood_centroid_lookup()
+    if neighborhood_centroids is None:
+        neighborhood_centroids = load_neighborhood_centroid_lookup()
 
     biz_zip_output = []
     for zipcode, info in sorted(business_by_zip.items(), key=lambda x: (-x[1]["count"], x[0])):
         share = info["count"] / total_businesses
-        top_sectors = [{"sector": name, "count": count} for name, count in info["sectors"].most_common(3)]
-        top_neighborhoods = [
-            {"neighborhood": name, "count": count} for name, count in zip_neighborhoods.get(zipcode, Counter()).most_common(3)
-        ]
+        top_sectors = top_counts(info["sectors"], 3, "sector")
+        top_neighborhoods = top_counts(zip_neighborhoods.get(zipcode, Counter()), 3, "neighborhood")
 
         centroid = None
-        weights = zip_neighborhoods.get(zipcode, Counter())
+        weights = neighborhood_weights.get(zipcode, Counter())
         if weights:
             lat_sum = 0.0
             lon_sum = 0.0
             total_weight = 0
-            for neighborhood, weight in weights.items():
+            # Fixed summation order keeps the rounded centroid independent of how chunks were merged.
+            for neighborhood, weight in sorted(weights.items()):
                 coords = neighborhood_centroids.get(neighborhood)
                 if not coords:
                     continue
@@ -154,109 +405,228 @@ def preprocess_businesses() -> None:
             }
         )
 
-    (PROCESSED_DIR / "business_by_zip.json").write_text(
-        json.dumps(
-            {
-                "total_businesses": total_businesses,
-                "top_naics_citywide": [{"sector": name, "count": count} for name, count in naics_rollup.most_common(10)],
-                "entries": biz_zip_output,
-            },
-            indent=2,
-        )
-    )
+    payload: Dict[str, Any] = {
+        "total_businesses": total_businesses,
+        "top_naics_citywide": top_counts(naics_rollup, 10, "sector"),
+    }
+    if top_k_capacity is not None:
+        tallies = [naics_rollup, *(info["sectors"] for info in business_by_zip.values()), *zip_neighborhoods.values()]
+        payload["top_k"] = {"capacity": top_k_capacity, "max_error": max(tally.max_error for tally in tallies)}
+    payload["entries"] = biz_zip_output
+    write_json(PROCESSED_DIR / "business_by_zip.json", payload)
 
     biz_neighborhood_output = [
         {"neighborhood": name, "business_count": info["count"]}
-        for name, info in sorted(business_by_neighborhood.items(), key=lambda x: -x[1]["count"])
+        for name, info in sorted(business_by_neighborhood.items(), key=lambda x: (-x[1]["count"], x[0]))
     ]
 
-    (PROCESSED_DIR / "business_neighborhoods.json").write_text(
-        json.dumps({"entries": biz_neighborhood_output}, indent=2)
-    )
+    write_json(PROCESSED_DIR / "business_neighborhoods.json", {"entries": biz_neighborhood_output})
 
+    zip_centroids = {entry["zip"]: entry["centroid"] for entry in biz_zip_output if entry["centroid"]}
+    return {"zip_centroids": zip_centroids}
 
-def preprocess_parks() -> None:
-    path = DATA_DIR / "Recreation_and_Parks_Properties_20251027.csv"
-    if not path.exists():
-        return
 
-    csv.field_size_limit(15_000_000)
-    parks_output = []
-    acres_by_district: Dict[str, float] = defaultdict(float)
-    centroid_by_neighborhood: Dict[str, Tuple[float, float, int]] = defaultdict(lambda: (0.0, 0.0, 0))
-    address_points = []
+SNAPSHOT_COLUMNS = ["UniqueID", "City", "Source Zipcode", "NAICS Code Description", "Business End Date", "Location End Date"]
 
-    def size_category(acres: float) -> str:
-        if acres >= 100:
-            return "Regional Park (100+ acres)"
-        if acres >= 10:
-            return "Neighborhood Park (10-99 acres)"
-        return "Mini Park (<10 acres)"
 
-    number_pattern = re.compile(r"\d+")
+def read_active_range(path: Path, start: int, end: int, header: List[str]) -> Tuple[Dict[str, Tuple[str, str]], int, int]:
+    """Active San Francisco locations (``UniqueID -> (zip, sector)``) in one byte range, plus rows read and skipped."""
+    project = projector(header, SNAPSHOT_COLUMNS, missing="")
+    active: Dict[str, Tuple[str, str]] = {}
+    # One shared tuple per distinct (zip, sector) keeps the running state small.
+    labels: Dict[Tuple[str, str], Tuple[str, str]] = {}
+    rows_read = rows_skipped = 0
+    for row in read_range(path, start, end):
+        rows_read += 1
+        uid, city, zipcode, sector, business_end, location_end = project(row)
+        if city != "San Francisco" or not uid or business_end.strip() or location_end.strip():
+            rows_skipped += 1
+            continue
+        label = (zipcode.strip(), sector.strip())
+        active[uid] = labels.setdefault(label, label)
+    return active, rows_read, rows_skipped
 
-    with path.open(newline="") as fh:
-        reader = csv.DictReader(fh)
-        for row in reader:
-            try:
-                lon = float((row.get("longitude") or "").strip())
-                lat = float((row.get("latitude") or "").strip())
-            except ValueError:
-                continue
 
-            acres_str = (row.get("acres") or "0").replace(",", "")
-            try:
-                acres = float(acres_str)
-            except ValueError:
-                acres = 0.0
+def preprocess_business_changes(chunk_workers: Optional[int] = None) -> None:
+    """Openings, closures and net change per ZIP and sector across every dated registry snapshot.
+
+    Only snapshots newer than the saved running state are parsed (see
+    ``business_changes.py``).
+    """
+    snapshots = [snapshot_record(DATA_DIR / name, date) for date, name in BUSINESS_SNAPSHOTS if (DATA_DIR / name).exists()]
+    if not snapshots:
+        return
 
-            neighborhood = (row.get("analysis_neighborhood") or "").strip()
+    history_path = BUILD_DIR / "business_history.pickle"
+    history = ChangeHistory.load(history_path, snapshots)
+    new_snapshots = snapshots[len(history.snapshots) :]
+    for snapshot in new_snapshots:
+        active: Dict[str, Tuple[str, str]] = {}
+        for chunk, rows_read, rows_skipped in map_record_ranges(DATA_DIR / snapshot["name"], read_active_range, chunk_workers):
+            active.update(chunk)
+            count_rows(rows_read, rows_skipped)
+        history.apply(snapshot, active)
+    if new_snapshots:
+        history.save(history_path)
+
+    write_json(PROCESSED_DIR / "business_changes.json", history.payload())
+
+
+def park_size_category(acres: float) -> str:
+    if acres >= 100:
+        return "Regional Park (100+ acres)"
+    if acres >= 10:
+        return "Neighborhood Park (10-99 acres)"
+    return "Mini Park (<10 acres)"
+
+
+DISTRICT_NUMBER = re.compile(r"\d+")
+
+
+def read_parks(path: Path, shapes: bool = False) -> Iterator[Dict[str, Any]]:
+    """Yield one normalized record per park row with usable coordinates.
+
+    Shared by the parks stage and the query server (``serve.py``). The export
+    carries each park's outline as a (possibly huge) WKT ``shape`` cell, read
+    through ``stream_records`` so it is never held whole: skipped by default,
+    or with ``shapes`` simplified on the fly into the record's ``shape`` (a
+    ``shapes.ShapeSimplifier``).
+    """
+    columns = [
+        "longitude",
+        "latitude",
+        "acres",
+        "analysis_neighborhood",
+        "supdist",
+        "property_name",
+        "propertytype",
+        "address",
+        "zipcode",
+    ]
+    rows_read = rows_skipped = 0
+    records = stream_records(path, columns, "shape", ShapeSimplifier) if shapes else stream_records(path, columns)
+    for (longitude, latitude, acres_raw, neighborhood, supdist, name, property_type, address, zipcode), shape in records:
+        rows_read += 1
+        try:
+            lon = float((longitude or "").strip())
+            lat = float((latitude or "").strip())
+        except ValueError:
+            rows_skipped += 1
+            continue
+
+        acres_str = (acres_raw or "0").replace(",", "")
+        try:
+            acres = float(acres_str)
+        except ValueError:
+            acres = 0.0
+
+        park = {
+            "name": name,
+            "acres": acres,
+            "category": park_size_category(acres),
+            "type": property_type,
+            "districts": DISTRICT_NUMBER.findall(supdist or ""),
+            "neighborhood": (neighborhood or "").strip(),
+            "address": address,
+            "zip": (zipcode or "").strip(),
+            "lat": lat,
+            "lon": lon,
+        }
+        if shapes:
+            park["shape"] = shape
+        yield park
+    count_rows(rows_read, rows_skipped)
+
+
+def preprocess_parks() -> Dict[str, Any]:
+    path = DATA_DIR / PARKS_CSV
+    if not path.exists():
+        return {}
+
+    acres_by_district: Dict[str, float] = defaultdict(float)
+    centroid_by_neighborhood: Dict[str, Tuple[float, float, int]] = defaultdict(lambda: (0.0, 0.0, 0))
+    address_points = PointTable(ADDRESS_FIELDS, ADDRESS_CATEGORIES)
+    # Every located park, with or without an address, for the accessibility stage.
+    sites = PointTable(("acres",))
+    quanta = [level_quantum(tolerance) for _, tolerance in SHAPE_LEVELS]
+    shape_vertices = [0] * len(SHAPE_LEVELS)
+    source_vertices = 0
+
+    # Park entries and outlines stream straight to disk; only the small rollups stay in memory.
+    with ExitStack() as outputs:
+        parks_out = outputs.enter_context(JsonStream(PROCESSED_DIR / "parks.json", layers=point_layer(("category", "type"), tiles=True)))
+        # Always compact: pretty-printed, every quantized coordinate would take a line.
+        shapes_out = [
+            outputs.enter_context(
+                JsonStream(
+                    PROCESSED_DIR / f"park_shapes.{level}.json",
+                    head={"format": "park_shapes", "version": SHAPES_VERSION, "level": level, "quantum": quanta[level]},
+                    options=compact_options(),
+                )
+            )
+            for level in range(len(SHAPE_LEVELS))
+        ]
+        for park in read_parks(path, shapes=True):
+            lat, lon = park["lat"], park["lon"]
+            neighborhood = park["neighborhood"]
             if neighborhood:
                 lon_sum, lat_sum, count = centroid_by_neighborhood[neighborhood]
                 centroid_by_neighborhood[neighborhood] = (lon_sum + lon, lat_sum + lat, count + 1)
 
-            districts = number_pattern.findall(row.get("supdist") or "")
+            districts = park["districts"]
             if districts:
-                share = acres / len(districts) if districts else 0.0
+                share = park["acres"] / len(districts)
                 for district in districts:
                     acres_by_district[district] += share
 
-            parks_output.append(
+            parks_out.write(
                 {
-                    "name": row.get("property_name"),
-                    "acres": round(acres, 2),
-                    "category": size_category(acres),
-                    "type": row.get("propertytype"),
+                    "name": park["name"],
+                    "acres": round(park["acres"], 2),
+                    "category": park["category"],
+                    "type": park["type"],
                     "districts": districts,
                     "coordinates": {"lat": lat, "lon": lon},
                 }
             )
-            if row.get("address"):
-                address_points.append(
-                    {
-                        "label": row.get("property_name"),
-                        "address": row.get("address"),
-                        "zip": (row.get("zipcode") or "").strip(),
-                        "type": "Park",
-                        "coordinates": {"lat": lat, "lon": lon},
-                    }
-                )
-
-    (PROCESSED_DIR / "parks.json").write_text(
-        json.dumps({"entries": parks_output}, indent=2)
-    )
+            shape = park["shape"]
+            source_vertices += shape.vertices
+            for level, shape_out in enumerate(shapes_out):
+                polygons = encode_polygons(shape.polygons[level], quanta[level])
+                if polygons:
+                    shape_out.write({"name": park["name"], "category": park["category"], "acres": round(park["acres"], 2), "polygons": polygons})
+                    shape_vertices[level] += sum(len(ring) // 2 for polygon in polygons for ring in polygon)
+            sites.append(lat, lon, park["acres"])
+            if park["address"]:
+                address_points.append(lat, lon, park["name"], park["address"], park["zip"], "Park")
 
     district_summary = [
         {"district": district, "total_acres": round(total, 2)}
         for district, total in sorted(acres_by_district.items(), key=lambda x: int(x[0]))
     ]
 
-    (PROCESSED_DIR / "park_acres_by_district.json").write_text(
-        json.dumps({"entries": district_summary}, indent=2)
+    write_json(PROCESSED_DIR / "park_acres_by_district.json", {"entries": district_summary})
+    write_json(
+        PROCESSED_DIR / "park_shapes.json",
+        {
+            "format": "park_shapes_index",
+            "version": SHAPES_VERSION,
+            "source_vertices": source_vertices,
+            "levels": [
+                {
+                    "file": f"park_shapes.{level}.json",
+                    "min_zoom": min_zoom,
+                    "tolerance_m": tolerance,
+                    "parks": shapes_out[level].count,
+                    "vertices": shape_vertices[level],
+                }
+                for level, (min_zoom, tolerance) in enumerate(SHAPE_LEVELS)
+            ],
+        },
     )
 
     centroids = []
-    for name, (lon_sum, lat_sum, count) in centroid_by_neighborhood.items():
+    for name, (lon_sum, lat_sum, count) in sorted(centroid_by_neighborhood.items()):
         if count:
             centroids.append(
                 {
@@ -268,132 +638,163 @@ def preprocess_parks() -> None:
                 }
             )
 
-    (PROCESSED_DIR / "neighborhood_centroids.json").write_text(
-        json.dumps({"entries": centroids}, indent=2)
-    )
-
-    return address_points
+    write_json(PROCESSED_DIR / "neighborhood_centroids.json", {"entries": centroids})
 
-def preprocess_facilities() -> List[Dict[str, Any]]:
-    path = DATA_DIR / "City_Facilities_-_Recreation_and_Parks_Jurisdiction_or_Leased_20251027.csv"
-    if not path.exists():
-        return
+    return {
+        "park_points": address_points,
+        "park_sites": sites,
+        "neighborhood_centroids": {entry["neighborhood"]: entry["centroid"] for entry in centroids},
+    }
 
-    facility_entries = []
-    facility_counts: Dict[str, int] = defaultdict(int)
-    address_points = []
 
-    for row in load_csv(path):
+def read_facilities(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield one normalized record per facility row with usable coordinates."""
+    columns = ["longitude", "latitude", "supervisor_district", "common_name", "address", "zip_code"]
+    rows_read = rows_skipped = 0
+    for longitude, latitude, district, name, address, zip_code in iter_columns(path, columns):
+        rows_read += 1
         try:
-            lon = float((row.get("longitude") or "").strip())
-            lat = float((row.get("latitude") or "").strip())
+            lon = float((longitude or "").strip())
+            lat = float((latitude or "").strip())
         except ValueError:
+            rows_skipped += 1
             continue
+        yield {
+            "name": name,
+            "district": (district or "").strip(),
+            "address": address,
+            "zip": (zip_code or "").strip(),
+            "lat": lat,
+            "lon": lon,
+        }
+    count_rows(rows_read, rows_skipped)
+
+
+def preprocess_facilities() -> Dict[str, Any]:
+    path = DATA_DIR / FACILITIES_CSV
+    if not path.exists():
+        return {}
 
-        district = (row.get("supervisor_district") or "").strip()
-        if district:
-            facility_counts[district] += 1
+    facility_counts: Dict[str, int] = defaultdict(int)
+    address_points = PointTable(ADDRESS_FIELDS, ADDRESS_CATEGORIES)
+    sites = PointTable(())
 
-        facility_entries.append(
-            {
-                "name": row.get("common_name"),
-                "district": district,
-                "address": row.get("address"),
-                "coordinates": {"lat": lat, "lon": lon},
-            }
-        )
-        if row.get("address"):
-            address_points.append(
+    with JsonStream(PROCESSED_DIR / "facilities.json", layers=point_layer(("district",), tiles=True)) as facilities_out:
+        for facility in read_facilities(path):
+            name, district, address = facility["name"], facility["district"], facility["address"]
+            lat, lon = facility["lat"], facility["lon"]
+            if district:
+                facility_counts[district] += 1
+
+            facilities_out.write(
                 {
-                    "label": row.get("common_name") or row.get("address"),
-                    "address": row.get("address"),
-                    "zip": (row.get("zip_code") or "").strip(),
-                    "type": "City Facility",
+                    "name": name,
+                    "district": district,
+                    "address": address,
                     "coordinates": {"lat": lat, "lon": lon},
                 }
             )
-
-    (PROCESSED_DIR / "facilities.json").write_text(json.dumps({"entries": facility_entries}, indent=2))
+            sites.append(lat, lon)
+            if address:
+                address_points.append(lat, lon, name or address, address, facility["zip"], "City Facility")
 
     summary = [{"district": district, "facility_count": count} for district, count in sorted(facility_counts.items(), key=lambda x: int(x[0]))]
-    (PROCESSED_DIR / "facility_counts_by_district.json").write_text(json.dumps({"entries": summary}, indent=2))
+    write_json(PROCESSED_DIR / "facility_counts_by_district.json", {"entries": summary})
 
-    return address_points
+    return {"facility_points": address_points, "facility_sites": sites}
 
 
-def preprocess_schools() -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
-    path = DATA_DIR / "Schools_20251027.csv"
-    if not path.exists():
-        return [], {}
+SCHOOL_LOCATION = re.compile(r"\(([-\d\.]+),\s*([-\d\.]+)\)")
+SF_ZIP = re.compile(r"\b94\d{3}\b")
 
-    schools = []
-    counts_by_zip: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"total": 0, "public": 0, "private": 0, "grades": Counter(), "types": Counter()})
-    address_points = []
 
-    location_pattern = re.compile(r"\(([-\d\.]+),\s*([-\d\.]+)\)")
-    zip_pattern = re.compile(r"\b94\d{3}\b")
+def read_schools(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield one normalized record per school row whose ``Location 1`` holds a coordinate pair."""
+    columns = ["Location 1", "Campus Address", "CCSF Entity", "Category", "General Type", "Campus Name", "Grade Range"]
+    rows_read = rows_skipped = 0
+    for location_str, address, ownership, category, general_type, name, grades in iter_columns(path, columns):
+        rows_read += 1
+        location_match = SCHOOL_LOCATION.search(location_str or "")
+        if not location_match:
+            rows_skipped += 1
+            continue
+        lat, lon = map(float, location_match.groups())
+
+        address = address or ""
+        zip_match = SF_ZIP.search(address)
+        yield {
+            "name": name or "School",
+            "zip": zip_match.group(0) if zip_match else "",
+            "ownership": (ownership or "").strip(),
+            "category": (category or "").strip(),
+            "general_type": (general_type or "").strip(),
+            "grades": grades,
+            "address": address,
+            "lat": lat,
+            "lon": lon,
+        }
+    count_rows(rows_read, rows_skipped)
+
+
+def preprocess_schools() -> Dict[str, Any]:
+    path = DATA_DIR / SCHOOLS_CSV
+    if not path.exists():
+        return {}
 
-    with path.open(newline="") as fh:
-        reader = csv.DictReader(fh)
-        for row in reader:
-            location_str = row.get("Location 1") or ""
-            location_match = location_pattern.search(location_str)
-            if not location_match:
-                continue
-            lat, lon = map(float, location_match.groups())
-
-            address = row.get("Campus Address") or ""
-            zip_match = zip_pattern.search(address)
-            zip_code = zip_match.group(0) if zip_match else ""
-
-            ownership = (row.get("CCSF Entity") or "").strip()
-            category = (row.get("Category") or "").strip()
-            general_type = (row.get("General Type") or "").strip()
-            name = row.get("Campus Name") or "School"
-
-            school_entry = {
-                "name": name,
-                "zip": zip_code,
-                "ownership": ownership,
-                "category": category,
-                "general_type": general_type,
-                "grades": row.get("Grade Range"),
-                "address": address,
-                "coordinates": {"lat": lat, "lon": lon},
-            }
-            schools.append(school_entry)
-
-            if zip_code:
-                stats = counts_by_zip[zip_code]
-                stats["total"] += 1
-                if ownership.upper().startswith("SFUSD") or ownership.upper() == "PUBLIC":
-                    stats["public"] += 1
-                else:
-                    stats["private"] += 1
-                if category:
-                    stats["types"][category] += 1
-                if general_type:
-                    stats["grades"][general_type] += 1
-
-            address_points.append(
+    schools = PointTable(SCHOOL_FIELDS, SCHOOL_CATEGORIES)
+    counts_by_zip: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"total": 0, "public": 0, "private": 0, "grades": Counter(), "types": Counter()})
+    address_points = PointTable(ADDRESS_FIELDS, ADDRESS_CATEGORIES)
+
+    for school in read_schools(path):
+        name, zip_code, address = school["name"], school["zip"], school["address"]
+        ownership, category, general_type = school["ownership"], school["category"], school["general_type"]
+        lat, lon = school["lat"], school["lon"]
+
+        schools.append(lat, lon, name, zip_code, ownership, category, general_type, school["grades"], address)
+
+        if zip_code:
+            stats = counts_by_zip[zip_code]
+            stats["total"] += 1
+            if ownership.upper().startswith("SFUSD") or ownership.upper() == "PUBLIC":
+                stats["public"] += 1
+            else:
+                stats["private"] += 1
+            if category:
+                stats["types"][category] += 1
+            if general_type:
+                stats["grades"][general_type] += 1
+
+        address_points.append(lat, lon, name, address, zip_code, "School")
+
+    schools = school_entry_list_with_sort(schools)
+    if schools:
+        with JsonStream(PROCESSED_DIR / "schools.json", layers=point_layer(SCHOOL_CATEGORIES, tiles=True)) as schools_out:
+            for entry in schools.entries():
+                schools_out.write(entry)
+    if counts_by_zip:
+        school_counts_output = []
+        for zip_code, stats in sorted(counts_by_zip.items(), key=lambda x: x[0]):
+            school_counts_output.append(
                 {
-                    "label": name,
-                    "address": address,
                     "zip": zip_code,
-                    "type": "School",
-                    "coordinates": {"lat": lat, "lon": lon},
+                    "total": stats["total"],
+                    "public": stats["public"],
+                    "private": stats["private"],
+                    "types": dict(sorted(stats["types"].items())),
+                    "grades": dict(sorted(stats["grades"].items())),
                 }
             )
+        write_json(PROCESSED_DIR / "school_counts_by_zip.json", {"entries": school_counts_output})
 
-    return school_entry_list_with_sort(schools), counts_by_zip, address_points
+    return {"school_points": address_points, "school_records": schools}
 
 
-def school_entry_list_with_sort(schools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    return sorted(schools, key=lambda s: (s.get("zip") or "", s.get("name") or ""))
+def school_entry_list_with_sort(schools: PointTable) -> PointTable:
+    return schools.sorted(key=lambda s: (s["zip"] or "", s["name"] or ""))
 
 
 def preprocess_housing() -> None:
-    path = DATA_DIR / "chas_440994.csv"
+    path = DATA_DIR / CHAS_CSV
     if not path.exists():
         return
 
@@ -401,10 +802,12 @@ def preprocess_housing() -> None:
         return int(value.replace(",", "").strip())
 
     moderate = severe = totals = None
+    rows_read = 0
     with path.open() as fh:
         reader = csv.reader(fh)
         in_section = False
         for row in reader:
+            rows_read += 1
             if not row or not row[0]:
                 continue
             key = row[0].strip()
@@ -420,6 +823,7 @@ def preprocess_housing() -> None:
                 moderate = {"owner": to_int(row[1]), "renter": to_int(row[2]), "total": to_int(row[3])}
             if key == "Cost Burden >50%":
                 severe = {"owner": to_int(row[1]), "renter": to_int(row[2]), "total": to_int(row[3])}
+    count_rows(rows_read)
 
     payload = {
         "total_households": totals,
@@ -431,161 +835,786 @@ def preprocess_housing() -> None:
     if totals and severe:
         payload["severe_burden_share"] = {key: round(severe[key] / totals[key], 4) for key in totals}
 
-    (PROCESSED_DIR / "housing_burden.json").write_text(json.dumps(payload, indent=2))
+    write_json(PROCESSED_DIR / "housing_burden.json", payload)
+
+
+def load_city_series(path: Path) -> SeriesMatrix:
+    """San Francisco's row of a city-level Zillow file (ZORI or ZHVI)."""
+    csv.field_size_limit(15_000_000)
+    matrix = SeriesMatrix.from_wide_csv(
+        path,
+        ["RegionName", "RegionType"],
+        keep=lambda key: key == ("San Francisco", "city"),
+        contains="San Francisco",
+        index_dir=INDEX_DIR,
+        where={"region_type": "city", "region_name": "San Francisco"},
+    )
+    count_rows(matrix.records_read, matrix.records_skipped)
+    return matrix
+
+
+def load_zip_rent_series(path: Path) -> SeriesMatrix:
+    """San Francisco ZIP rows of the ZIP-level ZORI file, keyed ``(City, RegionType, RegionName)``."""
+    csv.field_size_limit(15_000_000)
+    matrix = SeriesMatrix.from_wide_csv(
+        path,
+        ["City", "RegionType", "RegionName"],
+        keep=lambda key: key[0] == "San Francisco" and key[1] == "zip" and bool((key[2] or "").strip()),
+        contains="San Francisco",
+        index_dir=INDEX_DIR,
+        where={"region_type": "zip", "city": "San Francisco"},
+    )
+    count_rows(matrix.records_read, matrix.records_skipped)
+    return matrix
+
+
+def load_hpi_series(path: Path) -> SeriesMatrix:
+    """The San Francisco metro division's quarterly all-transactions HPI."""
+    # FHFA only publishes quarterly all-transactions indexes at the metro level.
+    matrix = SeriesMatrix.from_long_csv(
+        path,
+        ["hpi_flavor", "frequency", "place_id", "place_name"],
+        ["yr", "period"],
+        "index_nsa",
+        to_date=quarter_end_date,
+        keep=lambda key: key[:3] == ("all-transactions", "quarterly", SF_HPI_PLACE_ID),
+        contains=SF_HPI_PLACE_ID,
+    )
+    count_rows(matrix.records_read, matrix.records_skipped)
+    return matrix
 
 
 def preprocess_rent_trend() -> None:
-    path = DATA_DIR / "City_zori_uc_sfrcondomfr_sm_month.csv"
+    path = DATA_DIR / CITY_ZORI_CSV
     if not path.exists():
         return
 
-    csv.field_size_limit(15_000_000)
-    entries = []
-    matched_row = None
-    with path.open(newline="") as fh:
-        reader = csv.DictReader(fh)
-        for row in reader:
-            if row.get("RegionName") == "San Francisco" and row.get("RegionType") == "city":
-                matched_row = row
-                for key, value in row.items():
-                    if re.match(r"^\d{4}-\d{2}-\d{2}$", key or "") and value:
-                        entries.append({"date": key, "zori": float(value)})
-                break
-
-    if not entries and matched_row:
-        for key, value in matched_row.items():
-            key_clean = (key or "").strip()
-            if re.match(r"^\d{4}-\d{2}-\d{2}$", key_clean) and value:
-                entries.append({"date": key_clean, "zori": float(value)})
+    matrix = load_city_series(path)
+    entries = [{"date": date, "zori": value} for date, value in matrix.observations(0)] if len(matrix) else []
+    write_json(PROCESSED_DIR / "rent_trend.json", {"entries": entries})
+
+
+def series_summary(matrix: SeriesMatrix, row: int, value_key: str, periods_per_year: int, baseline_date: str) -> Dict[str, Any]:
+    """Timeline plus latest, year-over-year and since-2020 change for one matrix row."""
+    latest = matrix.latest()
+    yoy_abs, yoy_pct = change(latest, matrix.observations_back(periods_per_year))
+    since_abs, since_pct = change(latest, matrix.at_date(baseline_date))
+    entries = [{"date": date, value_key: value} for date, value in matrix.observations(row)]
+    payload: Dict[str, Any] = {"latest": entries[-1] if entries else None, "entries": entries}
+    if yoy_pct[row] is not None:
+        payload["yoy_change_pct"] = yoy_pct[row]
+        payload["yoy_change_abs"] = yoy_abs[row]
+    if since_pct[row] is not None:
+        payload["change_since_2020_pct"] = since_pct[row]
+        payload["change_since_2020_abs"] = since_abs[row]
+    return payload
+
+
+def preprocess_home_values() -> None:
+    path = DATA_DIR / CITY_ZHVI_CSV
+    if not path.exists():
+        return
 
-    entries.sort(key=lambda x: x["date"])
-    (PROCESSED_DIR / "rent_trend.json").write_text(json.dumps({"entries": entries}, indent=2))
+    matrix = load_city_series(path)
+    if not len(matrix) or matrix.latest_index()[0] < 0:
+        return
+    payload = series_summary(matrix, 0, "zhvi", periods_per_year=12, baseline_date=RENT_BASELINE_DATE)
+    write_json(PROCESSED_DIR / "home_value_trend.json", payload)
 
 
-def preprocess_zip_rent() -> None:
-    path = DATA_DIR / "Zip_zori_uc_sfrcondomfr_sm_month.csv"
+def preprocess_hpi() -> None:
+    path = DATA_DIR / HPI_CSV
     if not path.exists():
         return
 
-    csv.field_size_limit(15_000_000)
-    date_pattern = re.compile(r"^\d{4}-\d{2}-\d{2}$")
-    centroids = load_business_centroids()
-    entries: List[Dict[str, Any]] = []
-    latest_values: List[float] = []
-    change_values: List[float] = []
-    yoy_values: List[float] = []
-    latest_month_seen = None
+    matrix = load_hpi_series(path)
+    if not len(matrix):
+        return
+    payload = {"place": matrix.keys[0][3], "frequency": "quarterly"}
+    payload.update(series_summary(matrix, 0, "index", periods_per_year=4, baseline_date=HPI_BASELINE_DATE))
+    write_json(PROCESSED_DIR / "hpi_trend.json", payload)
 
-    with path.open(newline="") as fh:
-        reader = csv.DictReader(fh)
-        for row in reader:
-            if row.get("City") != "San Francisco" or row.get("RegionType") != "zip":
-                continue
-            zip_code = (row.get("RegionName") or "").strip()
-            if not zip_code:
-                continue
 
-            history = []
-            for key, value in row.items():
-                key_clean = (key or "").strip()
-                if not date_pattern.match(key_clean) or not value:
-                    continue
-                try:
-                    val = float(value)
-                except ValueError:
-                    continue
-                history.append({"date": key_clean, "zori": val})
+def preprocess_zip_rent(zip_centroids: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, Any]:
+    path = DATA_DIR / ZIP_ZORI_CSV
+    if not path.exists():
+        return {}
 
-            if not history:
-                continue
+    centroids = zip_centroids if zip_centroids is not None else load_business_centroids()
+    matrix = load_zip_rent_series(path)
 
-            history.sort(key=lambda x: x["date"])
-            latest_entry = history[-1]
-            latest_values.append(latest_entry["zori"])
-            latest_month_seen = max(latest_month_seen or latest_entry["date"], latest_entry["date"])
-
-            date_lookup = {item["date"]: item["zori"] for item in history}
-            yoy_index = len(history) - 13  # 12 months back relative to latest entry
-            yoy_change_abs = yoy_change_pct = None
-            if yoy_index >= 0:
-                yoy_value = history[yoy_index]["zori"]
-                if yoy_value:
-                    yoy_change_abs = round(latest_entry["zori"] - yoy_value, 2)
-                    yoy_change_pct = round((yoy_change_abs / yoy_value) * 100, 1)
-                    yoy_values.append(yoy_change_pct)
-
-            baseline_value = date_lookup.get("2020-01-31")
-            change_since_2020_abs = change_since_2020_pct = None
-            if baseline_value:
-                change_since_2020_abs = round(latest_entry["zori"] - baseline_value, 2)
-                if baseline_value:
-                    change_since_2020_pct = round((change_since_2020_abs / baseline_value) * 100, 1)
-                    change_values.append(change_since_2020_pct)
-
-            entry_payload: Dict[str, Any] = {
-                "zip": zip_code,
-                "latest": latest_entry,
-                "history": history[-60:],  # retain last five years
-            }
-            centroid = centroids.get(zip_code)
-            if centroid:
-                entry_payload["centroid"] = centroid
-            if yoy_change_pct is not None:
-                entry_payload["yoy_change_pct"] = yoy_change_pct
-                entry_payload["yoy_change_abs"] = yoy_change_abs
-            if change_since_2020_pct is not None:
-                entry_payload["change_since_2020_pct"] = change_since_2020_pct
-                entry_payload["change_since_2020_abs"] = change_since_2020_abs
-
-            entries.append(entry_payload)
+    # Whole-matrix metrics: one pass per metric instead of per-row lookups.
+    latest_columns = matrix.latest_index()
+    latest = matrix.take(latest_columns)
+    yoy_abs, yoy_pct = change(latest, matrix.observations_back(12))  # 12 observations back
+    since_abs, since_pct = change(latest, matrix.at_date(RENT_BASELINE_DATE))
+    trailing = matrix.trailing_mean(12)
+
+    entries: List[Dict[str, Any]] = []
+    histories: Dict[str, List[Dict[str, Any]]] = {}
+    for row, (_, _, region_name) in enumerate(matrix.keys):
+        if latest_columns[row] < 0:
+            continue
+        zip_code = region_name.strip()
+        history = [{"date": date, "zori": value} for date, value in matrix.observations(row)]
+        histories[zip_code] = history
+        entry_payload: Dict[str, Any] = {
+            "zip": zip_code,
+            "latest": history[-1],
+            "history": history[-60:],  # retain last five years
+        }
+        centroid = centroids.get(zip_code)
+        if centroid:
+            entry_payload["centroid"] = centroid
+        if yoy_pct[row] is not None:
+            entry_payload["yoy_change_pct"] = yoy_pct[row]
+            entry_payload["yoy_change_abs"] = yoy_abs[row]
+        if since_pct[row] is not None:
+            entry_payload["change_since_2020_pct"] = since_pct[row]
+            entry_payload["change_since_2020_abs"] = since_abs[row]
+        entry_payload["trailing_12m_avg"] = round(trailing[row], 2)
+
+        entries.append(entry_payload)
 
     if not entries:
-        return
+        return {}
 
     entries.sort(key=lambda x: x["zip"])
+    kept = [row for row, column in enumerate(latest_columns) if column >= 0]
+    latest_min, latest_max = value_range([latest[row] for row in kept])
+    change_min, change_max = value_range([since_pct[row] for row in kept])
+    yoy_min, yoy_max = value_range([yoy_pct[row] for row in kept])
     payload = {
-        "latest_month": latest_month_seen,
+        "latest_month": max(entry["latest"]["date"] for entry in entries),
         "entries": entries,
         "stats": {
-            "latest_min": min(latest_values) if latest_values else None,
-            "latest_max": max(latest_values) if latest_values else None,
-            "change_pct_min": min(change_values) if change_values else None,
-            "change_pct_max": max(change_values) if change_values else None,
-            "yoy_pct_min": min(yoy_values) if yoy_values else None,
-            "yoy_pct_max": max(yoy_values) if yoy_values else None,
+            "latest_min": latest_min,
+            "latest_max": latest_max,
+            "change_pct_min": change_min,
+            "change_pct_max": change_max,
+            "yoy_pct_min": yoy_min,
+            "yoy_pct_max": yoy_max,
         },
     }
-    (PROCESSED_DIR / "rent_by_zip.json").write_text(json.dumps(payload, indent=2))
+    write_json(PROCESSED_DIR / "rent_by_zip.json", payload)
+    # First-paint copy without the histories; the page loads those per ZIP from the shards.
+    summary = dict(payload, entries=[{key: value for key, value in entry.items() if key != "history"} for entry in entries])
+    write_json(PROCESSED_DIR / "rent_by_zip.summary.json", summary)
+    return {"zip_rent_history": histories}
+
+
+def write_zip_shards(
+    zip_rent_history: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+    school_records: Optional[PointTable] = None,
+) -> None:
+    """Split per-ZIP detail into ``zips/<zip>.json`` plus a ``zips/manifest.json`` listing them.
+
+    A shard holds the ZIP's full rent history and its school records, which
+    the page only fetches once that ZIP is focused.
+    """
+    histories = zip_rent_history or {}
+    schools: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for school in school_records or ():
+        if school["zip"]:
+            schools[school["zip"]].append({key: value for key, value in school.entry().items() if key != "zip"})
+    zips = sorted(set(histories) | set(schools))
+    if not zips:
+        return
+    files: Dict[str, Dict[str, Any]] = {}
+    listing: Dict[str, Dict[str, int]] = {}
+    for zip_code in zips:
+        shard = {"zip": zip_code, "rent_history": histories.get(zip_code, []), "schools": schools.get(zip_code, [])}
+        files[f"{zip_code}.json"] = shard
+        listing[zip_code] = {"rent_months": len(shard["rent_history"]), "schools": len(shard["schools"])}
+    count_rows(sum(len(history) for history in histories.values()) + sum(len(items) for items in schools.values()))
+    files["manifest.json"] = {"format": "zip_shards", "version": ZIP_SHARDS_VERSION, "zips": listing}
+    write_json_tree(PROCESSED_DIR / "zips", files)
+
+
+def address_point_tables(
+    park_points: Optional[PointTable] = None,
+    facility_points: Optional[PointTable] = None,
+    school_points: Optional[PointTable] = None,
+) -> List[PointTable]:
+    """Address point tables in ``address_points.json`` order: parks, then facilities, then schools.
+
+    Consumers walk them in sequence instead of concatenating, so the stages' tables are never copied.
+    """
+    return [table for table in (park_points, facility_points, school_points) if table]
+
+
+def write_address_points(
+    park_points: Optional[PointTable] = None,
+    facility_points: Optional[PointTable] = None,
+    school_points: Optional[PointTable] = None,
+) -> None:
+    tables = address_point_tables(park_points, facility_points, school_points)
+    if not tables:
+        return
+    count_rows(sum(len(table) for table in tables))
+    with JsonStream(PROCESSED_DIR / "address_points.json", layers=point_layer(ADDRESS_CATEGORIES)) as points_out:
+        for table in tables:
+            for entry in table.entries():
+                points_out.write(entry)
+    # Indexes refer to positions in address_points.json, so build from the same sequence.
+    write_json(PROCESSED_DIR / "address_points.search.json", build_search_index(chain.from_iterable(tables)))
+
+
+def preprocess_accessibility(
+    zip_centroids: Optional[Dict[str, Dict[str, float]]] = None,
+    park_points: Optional[PointTable] = None,
+    facility_points: Optional[PointTable] = None,
+    school_points: Optional[PointTable] = None,
+    park_sites: Optional[PointTable] = None,
+    facility_sites: Optional[PointTable] = None,
+    school_records: Optional[PointTable] = None,
+) -> None:
+    """Distance and walk-radius access to parks, facilities and schools (see ``accessibility.py``).
+
+    Measured from every ZIP centroid (``accessibility_by_zip.json``) and every
+    address point (``address_accessibility.json``, entry ``i`` describing entry
+    ``i`` of ``address_points.json``). The amenity layers hold every located
+    park, facility and school as parsed by their stages (``park_sites``,
+    ``facility_sites``, ``school_records``), not only the ones with an address.
+    """
+    layers = []
+    if park_sites is not None:
+        layers.append(Layer("parks", park_sites.points(), park_sites.column("acres")))
+    for name, sites in (("facilities", facility_sites), ("schools", school_records)):
+        if sites is not None:
+            layers.append(Layer(name, sites.points()))
+    if not layers:
+        return
+    head = {"version": ACCESS_VERSION, "radii_km": list(RADII_KM), "layers": [layer.name for layer in layers]}
 
+    centroids = sorted((zip_centroids or {}).items())
+    if centroids:
+        results = measure_points(layers, ((centroid["lat"], centroid["lon"]) for _, centroid in centroids))
+        entries = [{"zip": zip_code, "centroid": centroid, **result} for (zip_code, centroid), result in zip(centroids, results)]
+        write_json(PROCESSED_DIR / "accessibility_by_zip.json", {**head, "entries": entries})
 
-def main() -> None:
-    park_points = preprocess_parks() or []
-    preprocess_businesses()
-    facility_points = preprocess_facilities() or []
-    schools, school_counts, school_points = preprocess_schools()
-    if schools:
-        (PROCESSED_DIR / "schools.json").write_text(json.dumps({"entries": schools}, indent=2))
-    if school_counts:
-        school_counts_output = []
-        for zip_code, stats in sorted(school_counts.items(), key=lambda x: x[0]):
-            school_counts_output.append(
-                {
-                    "zip": zip_code,
-                    "total": stats["total"],
-                    "public": stats["public"],
-                    "private": stats["private"],
-                    "types": dict(stats["types"]),
-                    "grades": dict(stats["grades"]),
-                }
+    tables = address_point_tables(park_points, facility_points, school_points)
+    if tables:
+        with JsonStream(PROCESSED_DIR / "address_accessibility.json", head=head) as out:
+            for result in measure_points(layers, chain.from_iterable(table.points() for table in tables)):
+                out.write(result)
+
+
+def series_rows(series: str, matrix: SeriesMatrix, region: Callable[[Tuple[Optional[str], ...]], str]) -> Iterator[Tuple[str, str, str, float]]:
+    for row, key in enumerate(matrix.keys):
+        for date, value in matrix.observations(row):
+            yield series, region(key), date, value
+
+
+def build_record_store(sqlite: bool = False, chunk_workers: Optional[int] = None) -> None:
+    """Bulk-load every normalized record into ``records.sqlite`` (see ``record_store.py``).
+
+    Opt-in (``--sqlite``): the registry is parsed again here rather than kept
+    in memory by the businesses stage, which would cost every default run.
+    Without it, a store left by an earlier run is removed rather than left to
+    go stale.
+    """
+    if not sqlite:
+        remove_output(PROCESSED_DIR / RECORDS_DB)
+        return
+    with RecordStore(PROCESSED_DIR / RECORDS_DB) as store:
+        path = DATA_DIR / BUSINESS_CSV
+        if path.exists():
+            chunks = map_record_ranges(path, read_business_range, chunk_workers)
+            # The range readers drop non-San Francisco rows without counting them.
+            count_rows(store.insert("businesses", (record for chunk in chunks for record in chunk)))
+
+        path = DATA_DIR / PARKS_CSV
+        if path.exists():
+            # Explicit ids (the table starts empty) so park_districts can refer to them.
+            parks = list(enumerate(read_parks(path), start=1))
+            store.insert(
+                "parks",
+                (
+                    (park_id, park["name"], park["zip"], park["neighborhood"], park["type"], park["category"], park["acres"], park["address"], park["lat"], park["lon"])
+                    for park_id, park in parks
+                ),
+                columns=("id",) + TABLES["parks"].columns,
             )
-        (PROCESSED_DIR / "school_counts_by_zip.json").write_text(json.dumps({"entries": school_counts_output}, indent=2))
-    preprocess_housing()
-    preprocess_rent_trend()
-    preprocess_zip_rent()
-    combined_points = park_points + facility_points + (school_points or [])
-    if combined_points:
-        (PROCESSED_DIR / "address_points.json").write_text(json.dumps({"entries": combined_points}, indent=2))
+            store.insert("park_districts", ((park_id, district) for park_id, park in parks for district in park["districts"]))
+
+        path = DATA_DIR / FACILITIES_CSV
+        if path.exists():
+            store.insert(
+                "facilities",
+                ((item["name"], item["zip"], item["district"], item["address"], item["lat"], item["lon"]) for item in read_facilities(path)),
+            )
+
+        path = DATA_DIR / SCHOOLS_CSV
+        if path.exists():
+            store.insert(
+                "schools",
+                (
+                    (school["name"], school["zip"], school["category"], school["general_type"], school["ownership"], school["grades"], school["address"], school["lat"], school["lon"])
+                    for school in read_schools(path)
+                ),
+            )
+
+        series = (
+            ("zori_city", CITY_ZORI_CSV, load_city_series, lambda key: key[0]),
+            ("zhvi_city", CITY_ZHVI_CSV, load_city_series, lambda key: key[0]),
+            ("zori_zip", ZIP_ZORI_CSV, load_zip_rent_series, lambda key: (key[2] or "").strip()),
+            ("hpi", HPI_CSV, load_hpi_series, lambda key: key[3]),
+        )
+        for name, filename, load, region in series:
+            path = DATA_DIR / filename
+            if path.exists():
+                store.insert("observations", series_rows(name, load(path), region))
+
+
+class Stage(NamedTuple):
+    """One pipeline step.
+
+    ``func`` is called with the values named in ``requires`` as keyword arguments
+    and returns a dict holding (a subset of) the values named in ``provides``.
+    Dependencies between stages are inferred from those names. ``inputs`` are the
+    raw files read from ``data/`` and ``outputs`` the files written to
+    ``data/processed`` (a name ending in ``/``: a directory written whole, its
+    files recorded one by one); both feed the build manifest. ``params`` name run options
+    (command-line settings) passed through as keyword arguments.
+    """
+
+    name: str
+    func: Callable[..., Optional[Dict[str, Any]]]
+    requires: Tuple[str, ...] = ()
+    provides: Tuple[str, ...] = ()
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    params: Tuple[str, ...] = ()
+
+
+STAGES: Tuple[Stage, ...] = (
+    Stage(
+        "parks",
+        preprocess_parks,
+        provides=("park_points", "park_sites", "neighborhood_centroids"),
+        inputs=(PARKS_CSV,),
+        outputs=(
+            "parks.json",
+            "parks.columnar.json",
+            "parks.grid.json",
+            "tiles/parks/",
+            "park_acres_by_district.json",
+            "park_shapes.json",
+            *(f"park_shapes.{level}.json" for level in range(len(SHAPE_LEVELS))),
+            "neighborhood_centroids.json",
+        ),
+    ),
+    Stage(
+        "businesses",
+        preprocess_businesses,
+        requires=("neighborhood_centroids",),
+        provides=("zip_centroids",),
+        inputs=(BUSINESS_CSV,),
+        outputs=("business_by_zip.json", "business_neighborhoods.json"),
+        params=("chunk_workers", "top_k_capacity"),
+    ),
+    Stage(
+        "business_changes",
+        preprocess_business_changes,
+        inputs=tuple(name for _, name in BUSINESS_SNAPSHOTS),
+        outputs=("business_changes.json",),
+        params=("chunk_workers",),
+    ),
+    Stage(
+        "facilities",
+        preprocess_facilities,
+        provides=("facility_points", "facility_sites"),
+        inputs=(FACILITIES_CSV,),
+        outputs=(
+            "facilities.json",
+            "facilities.columnar.json",
+            "facilities.grid.json",
+            "tiles/facilities/",
+            "facility_counts_by_district.json",
+        ),
+    ),
+    Stage(
+        "schools",
+        preprocess_schools,
+        provides=("school_points", "school_records"),
+        inputs=(SCHOOLS_CSV,),
+        outputs=(
+            "schools.json",
+            "schools.columnar.json",
+            "schools.grid.json",
+            "tiles/schools/",
+            "school_counts_by_zip.json",
+        ),
+    ),
+    Stage("housing", preprocess_housing, inputs=(CHAS_CSV,), outputs=("housing_burden.json",)),
+    Stage("rent_trend", preprocess_rent_trend, inputs=(CITY_ZORI_CSV,), outputs=("rent_trend.json",)),
+    Stage("home_values", preprocess_home_values, inputs=(CITY_ZHVI_CSV,), outputs=("home_value_trend.json",)),
+    Stage("hpi", preprocess_hpi, inputs=(HPI_CSV,), outputs=("hpi_trend.json",)),
+    Stage(
+        "zip_rent",
+        preprocess_zip_rent,
+        requires=("zip_centroids",),
+        provides=("zip_rent_history",),
+        inputs=(ZIP_ZORI_CSV,),
+        outputs=("rent_by_zip.json", "rent_by_zip.summary.json"),
+    ),
+    Stage(
+        "zip_shards",
+        write_zip_shards,
+        requires=("zip_rent_history", "school_records"),
+        outputs=("zips/",),
+    ),
+    Stage(
+        "accessibility",
+        preprocess_accessibility,
+        requires=("zip_centroids", "park_points", "facility_points", "school_points", "park_sites", "facility_sites", "school_records"),
+        outputs=("accessibility_by_zip.json", "address_accessibility.json"),
+    ),
+    Stage(
+        "records_db",
+        build_record_store,
+        inputs=(BUSINESS_CSV, PARKS_CSV, FACILITIES_CSV, SCHOOLS_CSV, CITY_ZORI_CSV, CITY_ZHVI_CSV, ZIP_ZORI_CSV, HPI_CSV),
+        outputs=(RECORDS_DB,),
+        params=("sqlite", "chunk_workers"),
+    ),
+    Stage(
+        "address_points",
+        write_address_points,
+        requires=("park_points", "facility_points", "school_points"),
+        outputs=(
+            "address_points.json",
+            "address_points.columnar.json",
+            "address_points.grid.json",
+            "address_points.search.json",
+        ),
+    ),
+)
+
+
+def stage_dependencies(stages: Iterable[Stage]) -> Dict[str, Tuple[str, ...]]:
+    """Return mapping of stage name to the names of the stages it waits on."""
+    stages = list(stages)
+    producers: Dict[str, str] = {}
+    for stage in stages:
+        for key in stage.provides:
+            if key in producers:
+                raise ValueError(f"{key!r} is provided by both {producers[key]!r} and {stage.name!r}")
+            producers[key] = stage.name
+    deps: Dict[str, Tuple[str, ...]] = {}
+    for stage in stages:
+        missing = [key for key in stage.requires if key not in producers]
+        if missing:
+            raise ValueError(f"Stage {stage.name!r} requires unknown value(s): {', '.join(missing)}")
+        deps[stage.name] = tuple(sorted({producers[key] for key in stage.requires}))
+
+    # Reject cycles up front so the scheduler can never stall.
+    visiting: set = set()
+    visited: set = set()
+
+    def visit(name: str) -> None:
+        if name in visited:
+            return
+        if name in visiting:
+            raise ValueError(f"Stage dependency cycle through {name!r}")
+        visiting.add(name)
+        for dep in deps[name]:
+            visit(dep)
+        visiting.discard(name)
+        visited.add(name)
+
+    for name in deps:
+        visit(name)
+    return deps
+
+
+def _stage_values(stage: Stage, result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    result = result or {}
+    return {key: result[key] for key in stage.provides if key in result}
+
+
+def run_stages(
+    stages: Iterable[Stage],
+    jobs: int = 1,
+    force: Iterable[str] = (),
+    incremental: bool = True,
+    options: Optional[Dict[str, Any]] = None,
+    output: Optional[OutputOptions] = None,
+    report: Optional[RunReport] = None,
+    profile: Optional[str] = None,
+    profile_mode: str = "cprofile",
+) -> Dict[str, Any]:
+    """Run ``stages`` respecting their dependencies and return every provided value.
+
+    With ``jobs > 1`` independent stages run concurrently on a process pool and
+    values are handed to downstream stages in memory, so wall-clock time tracks
+    the longest dependency chain rather than the sum of all stages.
+
+    When ``incremental`` is set, a stage is skipped if its raw inputs, the
+    upstream values it requires and the code it runs (``source_files``) all
+    hash the same as in the build manifest and its recorded outputs are
+    untouched. Stages named in
+    ``force`` always run. ``options`` supplies the values for each stage's
+    ``params``; ``output`` sets the JSON style in every worker.
+
+    Every stage is timed and measured (see ``run_report.py``) into ``report``.
+    The stage named by ``profile`` is always rebuilt, under ``profile_mode``,
+    with its profile written to ``data/.build/profile``.
+    """
+    stages = list(stages)
+    deps = stage_dependencies(stages)
+    force = set(force)
+    if profile:
+        force.add(profile)
+    report = report if report is not None else RunReport()
+    options = options or {}
+    manifest = BuildManifest(BUILD_DIR)
+    output = output or OutputOptions()
+    configure_output(output)
+    # Output style changes every file, so it is part of each stage's fingerprint.
+    code = {stage.name: hash_value([hash_sources(source_files(stage.func)), output._asdict()]) for stage in stages}
+    values: Dict[str, Any] = {}
+    pending = {stage.name: stage for stage in stages}
+    done: set = set()
+    fingerprints: Dict[str, Tuple[str, Dict[str, Any], Dict[str, str]]] = {}
+
+    def ready() -> List[Stage]:
+        return [stage for name, stage in pending.items() if all(dep in done for dep in deps[name])]
+
+    def stage_kwargs(stage: Stage) -> Dict[str, Any]:
+        kwargs = {key: values.get(key) for key in stage.requires}
+        kwargs.update({name: options.get(name) for name in stage.params})
+        return kwargs
+
+    def try_skip(stage: Stage) -> bool:
+        inputs = {name: manifest.input_record(DATA_DIR / name) for name in stage.inputs}
+        upstream = {key: hash_value(values.get(key)) for key in stage.requires}
+        upstream.update({f"param:{name}": hash_value(options.get(name)) for name in stage.params})
+        key = manifest.stage_key(code[stage.name], inputs, upstream)
+        fingerprints[stage.name] = (key, inputs, upstream)
+        if not incremental or stage.name in force or not manifest.is_fresh(stage.name, key, PROCESSED_DIR):
+            return False
+        values.update(manifest.load_values(stage.name))
+        done.add(stage.name)
+        report.skipped(stage.name)
+        print(f"  {stage.name}: unchanged, skipped")
+        return True
+
+    def call_args(stage: Stage) -> Tuple[Any, ...]:
+        if stage.name != profile:
+            return stage.func, stage_kwargs(stage)
+        return stage.func, stage_kwargs(stage), profile_mode, PROFILE_DIR / stage.name
+
+    def finish(stage: Stage, outcome: Tuple[Optional[Dict[str, Any]], Dict[str, Any]]) -> None:
+        result, metrics = outcome
+        stage_values = _stage_values(stage, result)
+        values.update(stage_values)
+        done.add(stage.name)
+        key, inputs, upstream = fingerprints[stage.name]
+        outputs = manifest.output_hashes(PROCESSED_DIR, stage.outputs)
+        previous = manifest.stages.get(stage.name, {}).get("outputs", {})
+        metrics["changed_outputs"] = [name for name, digest in outputs.items() if digest and digest != previous.get(name)]
+        manifest.record(stage.name, key, inputs, upstream, outputs, stage_values)
+        report.rebuilt(stage.name, metrics)
+        print(
+            f"  {stage.name}: rebuilt in {metrics['seconds']:.2f}s ({metrics['rows_read']:,} rows read, "
+            f"{metrics['bytes_written']:,} bytes written, {metrics['files_unchanged']:,} files unchanged)"
+        )
+        if "profile" in metrics:
+            print(f"    profile: {metrics['profile']}")
+
+    if jobs <= 1:
+        while pending:
+            for stage in ready():
+                del pending[stage.name]
+                if try_skip(stage):
+                    continue
+                finish(stage, instrumented(*call_args(stage)))
+        return values
+
+    running = {}
+    with ProcessPoolExecutor(max_workers=jobs, initializer=configure_output, initargs=(output,)) as pool:
+        while pending or running:
+            launched = True
+            while launched:
+                # Skipping a stage can unblock its dependents immediately.
+                launched = False
+                for stage in ready():
+                    del pending[stage.name]
+                    launched = True
+                    if try_skip(stage):
+                        continue
+                    running[pool.submit(instrumented, *call_args(stage))] = stage
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                finish(stage, future.result())
+    return values
+
+
+def watch_data(stages: Sequence[Stage], interval: float, debounce: float, report_path: Path = REPORT_PATH, **run_options: Any) -> None:
+    """Rebuild the stages fed by each changed CSV in ``data/``, and everything downstream, until interrupted.
+
+    Stages upstream of that subgraph are included only so their values can be
+    restored from the build manifest; they are skipped, not rebuilt, and the
+    manifest still skips affected stages whose inputs turn out unchanged. Each
+    rebuild is published to ``changes.json`` for ``serve.py`` (see ``watcher.py``).
+    """
+    deps = stage_dependencies(stages)
+    consumers: Dict[str, List[str]] = defaultdict(list)
+    for stage in stages:
+        for name in stage.inputs:
+            consumers[name].append(stage.name)
+
+    def rebuild(changed: List[str]) -> None:
+        inputs = [name for name in changed if name in consumers]
+        ignored = [name for name in changed if name not in consumers]
+        if ignored:
+            # The stage list, including the registry snapshots, is fixed at startup.
+            print(f"Ignoring {', '.join(ignored)}: not an input of any stage (restart to pick up new snapshots)")
+        if not inputs:
+            return
+        affected = stages_downstream(deps, (name for filename in inputs for name in consumers[filename]))
+        selected = [stage for stage in stages if stage.name in stages_upstream(deps, affected)]
+        print(f"{', '.join(inputs)} changed; checking {', '.join(stage.name for stage in selected if stage.name in affected)}")
+        report = RunReport(watch=True, inputs=inputs)
+        try:
+            run_stages(selected, report=report, **run_options)
+        except Exception:
+            # A half-written CSV should not end the session; the next save retries.
+            traceback.print_exc()
+            return
+        report.write(report_path)
+        rebuilt = [name for name, metrics in report.stages.items() if metrics["status"] == "rebuilt"]
+        if not rebuilt:
+            print("Nothing to rebuild")
+            return
+        # Before the change goes out, so the page resolves the new hashed names.
+        publish_assets(PROCESSED_DIR)
+        outputs = sorted({output for name in rebuilt for output in report.stages[name]["changed_outputs"]})
+        entry = publish_changes(CHANGES_PATH, inputs, rebuilt, outputs)
+        print(f"Change {entry['sequence']}: {len(outputs)} output file(s) changed")
+
+    print(f"Watching {DATA_DIR} for CSV changes (Ctrl+C to stop)")
+    try:
+        watch(DATA_DIR, rebuild, interval=interval, debounce=debounce)
+    except KeyboardInterrupt:
+        pass
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=min(len(STAGES), os.cpu_count() or 1),
+        help="worker processes for independent stages (1 runs everything in-process)",
+    )
+    parser.add_argument(
+        "--force",
+        nargs="+",
+        default=[],
+        metavar="STAGE",
+        choices=["all"] + [stage.name for stage in STAGES],
+        help="rebuild the named stage(s) even if the build manifest says they are up to date; 'all' rebuilds everything",
+    )
+    parser.add_argument(
+        "--chunk-workers",
+        type=int,
+        default=None,
+        help="worker processes for map-reduce parsing of the business registry (default: CPU count)",
+    )
+    parser.add_argument(
+        "--top-k-capacity",
+        type=int,
+        default=None,
+        metavar="N",
+        help="track business sectors/neighborhoods with bounded Space-Saving tallies of N items instead of exact counts",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="write minified JSON with coordinates rounded to --precision decimals",
+    )
+    parser.add_argument("--precision", type=int, default=6, help="coordinate decimals kept in --compact mode (default: 6)")
+    parser.add_argument(
+        "--no-sidecars",
+        dest="sidecars",
+        action="store_false",
+        help="skip the precompressed .gz/.br copies written beside each JSON file",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="also write dictionary-encoded <layer>.columnar.json copies of the point layers",
+    )
+    parser.add_argument(
+        "--sqlite",
+        action="store_true",
+        help=f"also bulk-load the normalized records into an indexed data/processed/{RECORDS_DB}",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="after the build, keep polling data/ and rebuild only the stages affected by each changed CSV",
+    )
+    parser.add_argument("--watch-interval", type=float, default=1.0, help="seconds between polls in --watch mode (default: 1)")
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.5,
+        help="seconds a change must stay quiet before --watch rebuilds (default: 0.5)",
+    )
+    parser.add_argument(
+        "--report",
+        type=Path,
+        default=REPORT_PATH,
+        help="where to write the per-stage timing, row and memory report (default: data/.build/run_report.json)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="STAGE",
+        choices=[stage.name for stage in STAGES],
+        help="rebuild STAGE under a profiler and write the results to data/.build/profile/",
+    )
+    parser.add_argument(
+        "--profile-mode",
+        choices=PROFILE_MODES,
+        default="cprofile",
+        help="cprofile: call timings (.prof + text summary); tracemalloc: top allocation sites and traced peak",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    report = RunReport(jobs=args.jobs, force=args.force, profile=args.profile, profile_mode=args.profile_mode)
+    options = {"chunk_workers": args.chunk_workers, "top_k_capacity": args.top_k_capacity, "sqlite": args.sqlite}
+    output = OutputOptions(
+        compact=args.compact,
+        precision=args.precision,
+        sidecars=args.sidecars,
+        columnar=args.columnar,
+    )
+    run_stages(
+        STAGES,
+        jobs=args.jobs,
+        force=args.force,
+        incremental="all" not in args.force,
+        options=options,
+        output=output,
+        report=report,
+        profile=args.profile,
+        profile_mode=args.profile_mode,
+    )
+    report.write(args.report)
+    publish_assets(PROCESSED_DIR)
     print("Processed datasets saved to", PROCESSED_DIR)
+    print("Run report saved to", args.report)
+    if args.watch:
+        watch_data(STAGES, args.watch_interval, args.debounce, report_path=args.report, jobs=args.jobs, options=options, output=output)
 
 
 if __name__ == "__main__":
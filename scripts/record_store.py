@@ -0,0 +1,155 @@
+"""
+SQLite store of the normalized records behind the JSON outputs.
+
+``RecordStore`` bulk-loads rows into one SQLite file so ad-hoc analysis and
+new derived outputs can run as indexed queries instead of re-parsing the raw
+CSVs. Tables and their indexes are declared in ``TABLES``:
+
+* ``businesses``: zip, neighborhood, sector, district, start_date, lat, lon;
+* ``parks``: name, zip, neighborhood, type, category, acres, address, lat,
+  lon, with ``park_districts`` (park_id, district) for parks that span
+  several supervisor districts;
+* ``facilities``: name, zip, district, address, lat, lon;
+* ``schools``: name, zip, category, general_type, ownership, grades,
+  address, lat, lon;
+* ``observations``: series, region, date, value (rent, home value and HPI
+  time series in long form).
+
+Rows go in through ``executemany`` in batches of ``BATCH_SIZE``, one
+transaction per batch. Secondary indexes are created once every row is in,
+which is much cheaper than maintaining them during the load, and every table
+with coordinates gets a ``<table>_rtree`` R*Tree over ``(lat, lon)`` sharing
+its row ids, so a bounding box query is a join::
+
+    SELECT b.* FROM businesses b JOIN businesses_rtree r ON b.id = r.id
+    WHERE r.min_lat >= 37.77 AND r.max_lat <= 37.79
+      AND r.min_lon >= -122.42 AND r.max_lon <= -122.40;
+
+The file is built under a temporary name, with journaling and syncing off
+since a failed build is simply discarded, and moved into place on close.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+from json_writer import WRITTEN
+
+STORE_VERSION = 1
+BATCH_SIZE = 50_000
+
+
+class Table(NamedTuple):
+    columns: Tuple[str, ...]
+    # Column type affinities, parallel to ``columns``.
+    types: Tuple[str, ...]
+    indexes: Tuple[Tuple[str, ...], ...] = ()
+    spatial: bool = False
+
+
+TABLES: Dict[str, Table] = {
+    "businesses": Table(
+        ("zip", "neighborhood", "sector", "district", "start_date", "lat", "lon"),
+        ("TEXT", "TEXT", "TEXT", "TEXT", "TEXT", "REAL", "REAL"),
+        indexes=(("zip",), ("neighborhood",), ("district",), ("sector",), ("start_date",)),
+        spatial=True,
+    ),
+    "parks": Table(
+        ("name", "zip", "neighborhood", "type", "category", "acres", "address", "lat", "lon"),
+        ("TEXT", "TEXT", "TEXT", "TEXT", "TEXT", "REAL", "TEXT", "REAL", "REAL"),
+        indexes=(("zip",), ("neighborhood",), ("type",)),
+        spatial=True,
+    ),
+    "park_districts": Table(("park_id", "district"), ("INTEGER", "TEXT"), indexes=(("district",), ("park_id",))),
+    "facilities": Table(
+        ("name", "zip", "district", "address", "lat", "lon"),
+        ("TEXT", "TEXT", "TEXT", "TEXT", "REAL", "REAL"),
+        indexes=(("zip",), ("district",)),
+        spatial=True,
+    ),
+    "schools": Table(
+        ("name", "zip", "category", "general_type", "ownership", "grades", "address", "lat", "lon"),
+        ("TEXT", "TEXT", "TEXT", "TEXT", "TEXT", "TEXT", "TEXT", "REAL", "REAL"),
+        indexes=(("zip",), ("category",)),
+        spatial=True,
+    ),
+    "observations": Table(
+        ("series", "region", "date", "value"),
+        ("TEXT", "TEXT", "TEXT", "REAL"),
+        indexes=(("series", "region", "date"), ("date",)),
+    ),
+}
+
+
+class RecordStore:
+    """Context manager that builds the SQLite file at ``path`` from ``insert`` calls."""
+
+    def __init__(self, path: Path, batch_size: int = BATCH_SIZE) -> None:
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        self.batch_size = batch_size
+        self.counts: Dict[str, int] = {name: 0 for name in TABLES}
+        self.conn: Optional[sqlite3.Connection] = None
+
+    def __enter__(self) -> "RecordStore":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_path.unlink(missing_ok=True)
+        self.conn = sqlite3.connect(self.tmp_path)
+        self.conn.execute("PRAGMA journal_mode = OFF")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        with self.conn:
+            for name, table in TABLES.items():
+                columns = ", ".join(f"{column} {kind}" for column, kind in zip(table.columns, table.types))
+                self.conn.execute(f"CREATE TABLE {name} (id INTEGER PRIMARY KEY, {columns})")
+            self.conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        return self
+
+    def insert(self, name: str, rows: Iterable[Sequence[Any]], columns: Optional[Sequence[str]] = None) -> int:
+        """Append ``rows`` (values for ``columns``, by default all of the table's) and return how many went in."""
+        columns = tuple(columns or TABLES[name].columns)
+        sql = f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        rows = iter(rows)
+        inserted = 0
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            with self.conn:
+                self.conn.executemany(sql, batch)
+            inserted += len(batch)
+        self.counts[name] += inserted
+        return inserted
+
+    def finish(self) -> None:
+        with self.conn:
+            for name, table in TABLES.items():
+                for columns in table.indexes:
+                    self.conn.execute(f"CREATE INDEX {name}_{'_'.join(columns)} ON {name} ({', '.join(columns)})")
+                if table.spatial:
+                    self.conn.execute(f"CREATE VIRTUAL TABLE {name}_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)")
+                    self.conn.execute(
+                        f"INSERT INTO {name}_rtree SELECT id, lat, lat, lon, lon FROM {name} WHERE lat IS NOT NULL AND lon IS NOT NULL"
+                    )
+            meta = {"version": STORE_VERSION, **{f"rows:{name}": count for name, count in self.counts.items()}}
+            self.conn.executemany("INSERT INTO meta VALUES (?, ?)", [(key, str(value)) for key, value in meta.items()])
+        self.conn.execute("ANALYZE")
+        self.conn.close()
+        self.conn = None
+        size = self.tmp_path.stat().st_size
+        os.replace(self.tmp_path, self.path)
+        WRITTEN["files"] += 1
+        WRITTEN["bytes"] += size
+        WRITTEN["entries"] += sum(self.counts.values())
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is None:
+            self.finish()
+            return
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        self.tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,143 @@
+"""
+Byte-offset index over the wide Zillow CSVs.
+
+The national ZIP and city files are tens of megabytes, yet each stage needs a
+handful of San Francisco rows. ``RegionIndex`` scans a file once, recording
+``(RegionType, RegionName, City)`` and the byte span of every record, and saves
+that as a JSON sidecar tied to the file's size and mtime. Later runs load the
+sidecar and read only the matching spans from a memory map.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import mmap
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fast_csv import projector
+
+INDEX_VERSION = 1
+INDEX_KEYS = ("RegionType", "RegionName", "City")
+
+Span = Tuple[int, int]
+
+
+def parse_record(data: bytes) -> List[str]:
+    return next(csv.reader(io.StringIO(data.decode("utf-8-sig"), newline="")), [])
+
+
+def record_spans(mm: mmap.mmap) -> Iterator[Span]:
+    """Yield ``(start, end)`` for each record, keeping quoted newlines inside their record."""
+    size = len(mm)
+    start = 0
+    while start < size:
+        end = start
+        quotes = 0
+        while True:
+            newline = mm.find(b"\n", end)
+            stop = size if newline == -1 else newline + 1
+            quotes += mm[end:stop].count(b'"')
+            end = stop
+            if quotes % 2 == 0 or end >= size:
+                break
+        yield start, end
+        start = end
+
+
+class RegionIndex:
+    """Lookup from region keys to record byte spans for one CSV version."""
+
+    def __init__(self, path: Path, header: List[str], entries: List[List[Any]]) -> None:
+        self.path = path
+        self.header = header
+        # Each entry: [region_type, region_name, city, start, end]
+        self.entries = entries
+
+    @classmethod
+    def build(cls, path: Path) -> "RegionIndex":
+        entries: List[List[Any]] = []
+        header: List[str] = []
+        if path.stat().st_size == 0:
+            return cls(path, header, entries)
+        with path.open("rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            spans = record_spans(mm)
+            first = next(spans, None)
+            if first is None:
+                return cls(path, header, entries)
+            header = parse_record(mm[first[0] : first[1]])
+            project = projector(header, INDEX_KEYS)
+            for start, end in spans:
+                row = parse_record(mm[start:end])
+                if not row:
+                    continue
+                region_type, region_name, city = project(row)
+                entries.append([region_type, region_name, city, start, end])
+        return cls(path, header, entries)
+
+    @classmethod
+    def load_or_build(cls, path: Path, index_dir: Path) -> "RegionIndex":
+        """Reuse the sidecar for this exact file version, rebuilding it when stale."""
+        sidecar = index_dir / f"{path.name}.regions.json"
+        stat = path.stat()
+        if sidecar.exists():
+            try:
+                payload = json.loads(sidecar.read_text())
+            except json.JSONDecodeError:
+                payload = {}
+            if (
+                payload.get("version") == INDEX_VERSION
+                and payload.get("size") == stat.st_size
+                and payload.get("mtime_ns") == stat.st_mtime_ns
+            ):
+                return cls(path, payload["header"], payload["entries"])
+
+        index = cls.build(path)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        # Stages in other worker processes may build the same sidecar at
+        # once, so each writes its own temporary file; the last replace wins.
+        with tempfile.NamedTemporaryFile("w", dir=index_dir, prefix=f".{sidecar.name}.", suffix=".tmp", delete=False) as tmp:
+            json.dump(
+                {
+                    "version": INDEX_VERSION,
+                    "source": path.name,
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "header": index.header,
+                    "entries": index.entries,
+                },
+                tmp,
+                separators=(",", ":"),
+            )
+        os.replace(tmp.name, sidecar)
+        return index
+
+    def find(
+        self,
+        region_type: Optional[str] = None,
+        region_name: Optional[str] = None,
+        city: Optional[str] = None,
+    ) -> List[Span]:
+        """Spans of the records matching every key that is given, in file order."""
+        return [
+            (start, end)
+            for entry_type, entry_name, entry_city, start, end in self.entries
+            if (region_type is None or entry_type == region_type)
+            and (region_name is None or entry_name == region_name)
+            and (city is None or entry_city == city)
+        ]
+
+    def read(self, spans: Sequence[Span], columns: Sequence[str]) -> Iterator[Tuple[Optional[str], ...]]:
+        """Yield the projected ``columns`` of each span, reading through a memory map."""
+        if not spans:
+            return
+        project = projector(self.header, columns)
+        with self.path.open("rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for start, end in spans:
+                row = parse_record(mm[start:end])
+                if row:
+                    yield project(row)
@@ -0,0 +1,170 @@
+"""
+Per-stage instrumentation for ``preprocess_data.py`` runs.
+
+``instrumented`` wraps one stage call, in whichever process runs it, and
+measures:
+
+* wall and CPU time (CPU includes worker processes the stage starts itself,
+  such as the business chunk workers);
+* rows read and skipped, as reported by the stage through ``count_rows``, and
+  rows emitted (items written to ``entries`` lists, counted by ``json_writer``);
+* files and bytes written, sidecars included, and files left untouched
+  because their content had not changed (``files_unchanged``);
+* peak resident memory of the process that ran the stage. Pool workers are
+  reused, so in a parallel run this is the worker's high-water mark and an
+  upper bound for the stage; ``benchmark.py`` runs every stage in a fresh
+  process when exact per-stage figures matter. It needs the Unix-only
+  ``resource`` module and is ``None`` without it.
+
+``run_stages`` adds ``changed_outputs`` to each rebuilt stage: the declared
+outputs whose content hash differs from the previous build. ``RunReport``
+collects those figures and writes ``run_report.json``.
+
+One stage can also be run under ``cProfile`` (a ``.prof`` file for ``pstats``
+or snakeviz plus a text summary) or ``tracemalloc`` (the traced peak plus the
+largest allocation sites still live when the stage returns).
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from json_writer import WRITTEN
+
+try:  # Unix only; peak memory is reported as None elsewhere.
+    import resource
+except ImportError:  # pragma: no cover - depends on the platform
+    resource = None
+
+REPORT_VERSION = 1
+PROFILE_MODES = ("cprofile", "tracemalloc")
+PROFILE_TOP = 40
+
+# Row counts reported by stages running in this process.
+ROWS: Counter[str] = Counter()
+
+
+def count_rows(read: int = 0, skipped: int = 0) -> None:
+    """Record raw rows read, and how many of them were dropped, by the running stage."""
+    ROWS["read"] += read
+    ROWS["skipped"] += skipped
+
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def _profile_call(func: Callable[..., Any], kwargs: Dict[str, Any], mode: str, path: Path) -> Tuple[Any, Dict[str, Any]]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func, **kwargs)
+        profiler.dump_stats(path.with_suffix(".prof"))
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        path.with_suffix(".profile.txt").write_text(summary.getvalue())
+        return result, {"profile": str(path.with_suffix(".prof"))}
+
+    tracemalloc.start()
+    try:
+        result = func(**kwargs)
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    lines = [f"traced peak: {peak / (1 << 20):.1f} MB", "", "still allocated when the stage returned, by line:"]
+    lines.extend(str(stat) for stat in snapshot.statistics("lineno")[:PROFILE_TOP])
+    path.with_suffix(".tracemalloc.txt").write_text("\n".join(lines) + "\n")
+    return result, {"profile": str(path.with_suffix(".tracemalloc.txt")), "traced_peak_mb": round(peak / (1 << 20), 1)}
+
+
+def instrumented(
+    func: Callable[..., Any],
+    kwargs: Dict[str, Any],
+    profile: Optional[str] = None,
+    profile_path: Optional[Path] = None,
+) -> Tuple[Any, Dict[str, Any]]:
+    """Call ``func(**kwargs)`` and return ``(result, metrics)``.
+
+    With ``profile`` set to one of ``PROFILE_MODES`` the call runs under that
+    profiler and its output is written next to ``profile_path`` (a path stem).
+    """
+    rows = Counter(ROWS)
+    written = Counter(WRITTEN)
+    children = os.times()
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    extra: Dict[str, Any] = {}
+    if profile:
+        result, extra = _profile_call(func, kwargs, profile, profile_path or Path(func.__name__))
+    else:
+        result = func(**kwargs)
+    seconds = time.perf_counter() - wall
+    after = os.times()
+    cpu_seconds = time.process_time() - cpu + (after.children_user - children.children_user) + (after.children_system - children.children_system)
+    metrics = {
+        "seconds": round(seconds, 4),
+        "cpu_seconds": round(cpu_seconds, 4),
+        "rows_read": ROWS["read"] - rows["read"],
+        "rows_skipped": ROWS["skipped"] - rows["skipped"],
+        "rows_emitted": WRITTEN["entries"] - written["entries"],
+        "files_written": WRITTEN["files"] - written["files"],
+        "bytes_written": WRITTEN["bytes"] - written["bytes"],
+        "files_unchanged": WRITTEN["unchanged"] - written["unchanged"],
+        "peak_rss_mb": peak_rss_mb(),
+        "children_peak_rss_mb": peak_rss_mb(children=True),
+    }
+    metrics.update(extra)
+    return result, metrics
+
+
+class RunReport:
+    """Per-stage metrics for one pipeline run, in the order stages finish."""
+
+    def __init__(self, **settings: Any) -> None:
+        self.settings = settings
+        self.started = time.perf_counter()
+        self.created = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    def skipped(self, name: str) -> None:
+        self.stages[name] = {"status": "skipped"}
+
+    def rebuilt(self, name: str, metrics: Dict[str, Any]) -> None:
+        self.stages[name] = {"status": "rebuilt", **metrics}
+
+    def payload(self) -> Dict[str, Any]:
+        rebuilt = [metrics for metrics in self.stages.values() if metrics["status"] == "rebuilt"]
+        return {
+            "version": REPORT_VERSION,
+            "created": self.created,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": self.settings,
+            "seconds": round(time.perf_counter() - self.started, 4),
+            "totals": {
+                key: sum(metrics[key] for metrics in rebuilt)
+                for key in ("rows_read", "rows_skipped", "rows_emitted", "files_written", "bytes_written", "files_unchanged")
+            },
+            "stages": self.stages,
+        }
+
+    def write(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.payload(), indent=2) + "\n")
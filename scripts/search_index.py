@@ -0,0 +1,81 @@
+"""
+Search index over ``address_points.json`` for the page's address lookup.
+
+The page ranks a query against each point's lowercased ``label`` and
+``address``: exact match 200, prefix 140, substring 100, plus 25 when the
+point's ZIP appears in the query. Rather than scanning every point, it uses:
+
+* ``keys``: the distinct normalized label/address strings, sorted, each with
+  the points that carry it (exact lookups and type-ahead prefixes are a
+  binary search);
+* ``trigrams``: every three-character slice of those strings with the points
+  containing it. A query is a substring of a field only if each of its
+  trigrams occurs there, so intersecting the query's posting lists yields a
+  small superset of the substring matches, which the page then scores exactly;
+* ``zips``: the first point of each ZIP, which is all the ZIP-only bonus needs.
+
+Posting lists are stored in compressed-row form (``*_offsets`` into
+``*_points``, packed like the other point-layer sidecars) and hold point
+indexes into ``address_points.json`` in ascending order.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterable, List, Tuple
+
+from columnar import pack
+
+SEARCH_VERSION = 1
+GRAM = 3
+
+
+def normalize(value: Any) -> str:
+    return value.lower() if isinstance(value, str) else ""
+
+
+def postings(mapping: Dict[str, List[int]]) -> Tuple[List[str], str, str]:
+    """Sorted keys plus packed offsets and point indexes for each key's list."""
+    keys = sorted(mapping)
+    offsets = array("I", [0])
+    points = array("I")
+    for key in keys:
+        points.extend(mapping[key])
+        offsets.append(len(points))
+    return keys, pack(offsets), pack(points)
+
+
+def build_search_index(points: Iterable[Any]) -> Dict[str, Any]:
+    """Index ``points`` (entry dicts or ``PointRow``s) in order."""
+    by_key: Dict[str, List[int]] = {}
+    by_gram: Dict[str, List[int]] = {}
+    zips: Dict[str, int] = {}
+    count = 0
+    for index, point in enumerate(points):
+        count += 1
+        fields = {normalize(point.get("label")), normalize(point.get("address"))}
+        fields.discard("")
+        grams = set()
+        for field in fields:
+            by_key.setdefault(field, []).append(index)
+            grams.update(field[start : start + GRAM] for start in range(len(field) - GRAM + 1))
+        for gram in grams:
+            by_gram.setdefault(gram, []).append(index)
+        zip_code = point.get("zip")
+        if zip_code:
+            zips.setdefault(zip_code, index)
+
+    keys, key_offsets, key_points = postings(by_key)
+    trigrams, trigram_offsets, trigram_points = postings(by_gram)
+    return {
+        "format": "search",
+        "version": SEARCH_VERSION,
+        "count": count,
+        "keys": keys,
+        "key_offsets": key_offsets,
+        "key_points": key_points,
+        "trigrams": trigrams,
+        "trigram_offsets": trigram_offsets,
+        "trigram_points": trigram_points,
+        "zips": zips,
+    }
@@ -0,0 +1,491 @@
+"""
+Local query server for the dashboard.
+
+Run from project root:
+
+    python3 scripts/serve.py --port 8000
+
+then open http://127.0.0.1:8000/. On startup the raw CSVs are parsed once, through
+the same readers the pipeline stages use, into in-memory record tables:
+
+* ``businesses`` (newest registry snapshot): zip, neighborhood, sector,
+  district, date (business start date, ``YYYY-MM-DD``);
+* ``parks``: zip, neighborhood, district (a park can span several), type,
+  category, acres;
+* ``facilities``: zip, district;
+* ``schools``: zip, category, general_type, ownership.
+
+``GET /api/query`` answers filtered group-by counts over them::
+
+    /api/query?dataset=businesses&group_by=zip&sector=Retail%20Trade&from=2020-01-01
+    /api/query?dataset=parks&group_by=district&type=Neighborhood%20Park&sum=acres
+
+Any field can be filtered (repeat the parameter to allow several values),
+``from``/``to`` bound the date inclusively, and ``sum`` adds a numeric field
+per group. Encoded responses are kept in an LRU cache bounded by total size
+(``--cache-mb``); ``/api/datasets`` lists the tables and ``/api/cache`` the cache
+counters. Every other path is served from the project directory, preferring
+the precompressed ``.br``/``.gz`` sidecars the pipeline writes, so
+``index.html`` works unchanged. Files are revalidated on every load
+(``no-cache``) except the content-hashed copies under
+``data/processed/hashed/``, which are marked ``immutable`` for a year.
+
+``GET /api/events`` is a server-sent event stream for live reload. Alongside
+``preprocess_data.py --watch``, every rebuild it publishes to
+``data/.build/changes.json`` is pushed to the page as a ``change`` event, and
+tables whose raw file changed are reloaded first (if a reload fails, the
+tables already loaded keep serving until the next change).
+
+Standard library only (asyncio streams, HTTP/1.1 with keep-alive, GET/HEAD).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import mimetypes
+import time
+import traceback
+from collections import Counter, OrderedDict, defaultdict
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import preprocess_data as pipeline
+from asset_manifest import HASHED_DIR
+from watcher import read_changes
+
+RESERVED_PARAMS = ("dataset", "group_by", "from", "to", "sum")
+# (Accept-Encoding token, sidecar suffix), best first.
+SIDECAR_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+IDLE_TIMEOUT = 15.0
+CHANGES_POLL = 0.5
+EVENTS_KEEPALIVE = 15.0
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class QueryError(ValueError):
+    """A query the tables cannot answer; reported to the client as HTTP 400."""
+
+
+class Dataset:
+    """Records as tuples over ``fields``.
+
+    ``multi`` fields hold a tuple of values (a record matches and is grouped
+    under each), ``numeric`` fields a number that ``sum`` can total, and a
+    field named ``date`` an ISO date that ``from``/``to`` bound.
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[str],
+        records: List[Tuple[Any, ...]],
+        multi: Iterable[str] = (),
+        numeric: Iterable[str] = (),
+    ) -> None:
+        self.fields = tuple(fields)
+        self.index = {name: position for position, name in enumerate(self.fields)}
+        self.records = records
+        self.multi = frozenset(multi)
+        self.numeric = frozenset(numeric)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "records": len(self.records),
+            "fields": list(self.fields),
+            "multi": sorted(self.multi),
+            "numeric": sorted(self.numeric),
+        }
+
+    def _position(self, name: str, numeric: bool = False) -> int:
+        if name not in self.index or (name in self.numeric) != numeric:
+            kind = "numeric field" if numeric else "field"
+            raise QueryError(f"unknown {kind} {name!r}")
+        return self.index[name]
+
+    def query(
+        self,
+        group_by: Optional[str] = None,
+        filters: Optional[Dict[str, List[str]]] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        total: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        predicates: List[Callable[[Tuple[Any, ...]], bool]] = []
+        for name, values in (filters or {}).items():
+            position = self._position(name)
+            wanted = frozenset(values)
+            if name in self.multi:
+                predicates.append(lambda record, p=position, w=wanted: not w.isdisjoint(record[p]))
+            else:
+                predicates.append(lambda record, p=position, w=wanted: record[p] in w)
+        if date_from or date_to:
+            if "date" not in self.index:
+                raise QueryError("this dataset has no date to filter on")
+            position = self.index["date"]
+            low, high = date_from or "0000-00-00", date_to or "9999-99-99"
+            predicates.append(lambda record, p=position, lo=low, hi=high: bool(record[p]) and lo <= record[p] <= hi)
+        group = self._position(group_by) if group_by else None
+        amount = self._position(total, numeric=True) if total else None
+
+        counts: Counter = Counter()
+        sums: Dict[Any, float] = defaultdict(float)
+        matched = 0
+        for record in self.records:
+            if not all(predicate(record) for predicate in predicates):
+                continue
+            matched += 1
+            if group is None:
+                keys: Iterable[Any] = ("all",)
+            elif group_by in self.multi:
+                keys = record[group]
+            else:
+                keys = (record[group],)
+            for key in keys:
+                counts[key] += 1
+                if amount is not None:
+                    sums[key] += record[amount]
+
+        groups = []
+        for key, count in sorted(counts.items(), key=lambda item: (-item[1], str(item[0]))):
+            row: Dict[str, Any] = {"key": key, "count": count}
+            if amount is not None:
+                row[total] = round(sums[key], 2)
+            groups.append(row)
+        return {
+            "group_by": group_by,
+            "filters": filters or {},
+            "from": date_from,
+            "to": date_to,
+            "matched": matched,
+            "groups": groups,
+        }
+
+
+DATASET_FILES = {
+    "businesses": pipeline.BUSINESS_CSV,
+    "parks": pipeline.PARKS_CSV,
+    "facilities": pipeline.FACILITIES_CSV,
+    "schools": pipeline.SCHOOLS_CSV,
+}
+
+
+def load_dataset(name: str, path: Path, chunk_workers: Optional[int] = None) -> Dataset:
+    if name == "businesses":
+        # Coordinates (the last two fields) are not queryable here.
+        records = [record[:5] for chunk in pipeline.map_record_ranges(path, pipeline.read_business_range, chunk_workers) for record in chunk]
+        return Dataset(("zip", "neighborhood", "sector", "district", "date"), records)
+    if name == "parks":
+        records = [
+            (park["zip"], park["neighborhood"], tuple(park["districts"]), park["type"] or "", park["category"], park["acres"])
+            for park in pipeline.read_parks(path)
+        ]
+        return Dataset(("zip", "neighborhood", "district", "type", "category", "acres"), records, multi=("district",), numeric=("acres",))
+    if name == "facilities":
+        return Dataset(("zip", "district"), [(facility["zip"], facility["district"]) for facility in pipeline.read_facilities(path)])
+    records = [(school["zip"], school["category"], school["general_type"], school["ownership"]) for school in pipeline.read_schools(path)]
+    return Dataset(("zip", "category", "general_type", "ownership"), records)
+
+
+def load_datasets(chunk_workers: Optional[int] = None, names: Iterable[str] = DATASET_FILES) -> Dict[str, Dataset]:
+    """Parse the raw file behind each of ``names`` that is present into a ``Dataset``."""
+    datasets: Dict[str, Dataset] = {}
+    for name in names:
+        path = pipeline.DATA_DIR / DATASET_FILES[name]
+        if path.exists():
+            datasets[name] = load_dataset(name, path, chunk_workers)
+    return datasets
+
+
+class LRUCache:
+    """Encoded responses by key, evicting least recently used ones once their total size passes ``max_bytes``."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[Any, bytes]" = OrderedDict()
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: Any) -> Optional[bytes]:
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Any, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self.entries[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def encode(payload: Any) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+class QueryServer:
+    def __init__(
+        self,
+        datasets: Dict[str, Dataset],
+        root: Path,
+        cache_bytes: int,
+        changes_path: Path = pipeline.CHANGES_PATH,
+        chunk_workers: Optional[int] = None,
+    ) -> None:
+        self.datasets = datasets
+        self.root = root.resolve()
+        self.hashed_dir = self.root / "data" / "processed" / HASHED_DIR
+        self.cache = LRUCache(cache_bytes)
+        self.changes_path = changes_path
+        self.chunk_workers = chunk_workers
+        self.subscribers: "set[asyncio.Queue]" = set()
+
+    # Live reload ----------------------------------------------------------
+
+    async def follow_changes(self) -> None:
+        """Poll the watcher's change feed; reload stale tables, then notify every event stream."""
+        last = (read_changes(self.changes_path) or {}).get("sequence")
+        while True:
+            await asyncio.sleep(CHANGES_POLL)
+            entry = await asyncio.to_thread(read_changes, self.changes_path)
+            # Any other sequence is new, including a restart from 1 after data/.build was cleared.
+            if not entry or entry.get("sequence") == last:
+                continue
+            last = entry.get("sequence")
+            stale = [name for name, filename in DATASET_FILES.items() if filename in entry.get("inputs", ())]
+            if stale:
+                try:
+                    reloaded = await asyncio.to_thread(load_datasets, self.chunk_workers, stale)
+                except Exception:
+                    # A half-written CSV should not end the feed: keep serving the
+                    # tables already loaded, and the next change retries.
+                    traceback.print_exc()
+                    print(f"Keeping the loaded {', '.join(stale)} after change {last}")
+                else:
+                    for name in stale:
+                        self.datasets.pop(name, None)
+                    self.datasets.update(reloaded)
+                    self.cache.clear()
+                    print(f"Reloaded {', '.join(stale)} after change {last}")
+            for queue in self.subscribers:
+                queue.put_nowait(entry)
+
+    async def events(self, writer: asyncio.StreamWriter) -> None:
+        """Hold the connection open as a server-sent event stream of change entries."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self.subscribers.add(queue)
+        try:
+            # No Content-Length: the stream ends when either side closes the connection.
+            head = ["HTTP/1.1 200 OK", "Content-Type: text/event-stream", "Cache-Control: no-cache", "Connection: close"]
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+            writer.write(b"retry: 2000\n\n")
+            await writer.drain()
+            while True:
+                try:
+                    entry = await asyncio.wait_for(queue.get(), EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    writer.write(b": keep-alive\n\n")
+                else:
+                    data = json.dumps(entry, separators=(",", ":"))
+                    writer.write(f"id: {entry.get('sequence')}\nevent: change\ndata: {data}\n\n".encode("utf-8"))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.subscribers.discard(queue)
+
+    # API ------------------------------------------------------------------
+
+    async def api(self, path: str, query: str) -> Tuple[int, bytes, Dict[str, str]]:
+        if path == "/api/datasets":
+            return 200, encode({name: dataset.describe() for name, dataset in self.datasets.items()}), {}
+        if path == "/api/cache":
+            return 200, encode(self.cache.stats()), {}
+        if path != "/api/query":
+            return 404, encode({"error": f"unknown endpoint {path}"}), {}
+
+        params = parse_qs(query, keep_blank_values=True)
+        name = params.get("dataset", [""])[0]
+        dataset = self.datasets.get(name)
+        if dataset is None:
+            return 400, encode({"error": f"unknown dataset {name!r}; choose from {sorted(self.datasets)}"}), {}
+        filters = {key: sorted(set(values)) for key, values in sorted(params.items()) if key not in RESERVED_PARAMS}
+        single = {key: params[key][0] for key in RESERVED_PARAMS if key in params and params[key][0]}
+        key = (name, single.get("group_by"), tuple((field, tuple(values)) for field, values in filters.items()), single.get("from"), single.get("to"), single.get("sum"))
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return 200, cached, {"X-Cache": "hit"}
+        try:
+            # Scans run off the event loop so static files keep flowing meanwhile.
+            result = await asyncio.to_thread(
+                dataset.query, single.get("group_by"), filters, single.get("from"), single.get("to"), single.get("sum")
+            )
+        except QueryError as error:
+            return 400, encode({"error": str(error)}), {}
+        body = encode({"dataset": name, **result})
+        self.cache.put(key, body)
+        return 200, body, {"X-Cache": "miss"}
+
+    # Static files ---------------------------------------------------------
+
+    def resolve_static(self, path: str) -> Optional[Path]:
+        parts = PurePosixPath(unquote(path)).parts[1:]
+        # No dotfiles or parent references (this also keeps data/.build private).
+        if any(part.startswith(".") for part in parts):
+            return None
+        target = self.root.joinpath(*parts)
+        if target.is_dir():
+            target = target / "index.html"
+        try:
+            target = target.resolve()
+            target.relative_to(self.root)
+        except (OSError, ValueError):
+            return None
+        return target if target.is_file() else None
+
+    async def static(self, path: str, accept_encoding: str) -> Tuple[int, bytes, Dict[str, str]]:
+        target = self.resolve_static(path)
+        if target is None:
+            return 404, b"not found\n", {"Content-Type": "text/plain; charset=utf-8"}
+        content_type = mimetypes.guess_type(target.name)[0] or "application/octet-stream"
+        cache_control = IMMUTABLE_CACHE if target.parent == self.hashed_dir else "no-cache"
+        headers = {"Content-Type": content_type, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        accepted = {token.split(";")[0].strip() for token in accept_encoding.split(",")}
+        source = target
+        for encoding, suffix in SIDECAR_ENCODINGS:
+            sidecar = target.with_name(target.name + suffix)
+            if encoding in accepted and sidecar.is_file() and sidecar.stat().st_mtime_ns >= target.stat().st_mtime_ns:
+                source = sidecar
+                headers["Content-Encoding"] = encoding
+                break
+        return 200, await asyncio.to_thread(source.read_bytes), headers
+
+    # HTTP -----------------------------------------------------------------
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                except (asyncio.TimeoutError, ConnectionError, ValueError):
+                    break
+                if not request_line:
+                    break
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.respond(writer, 400, b"bad request\n", {}, head=False, keep_alive=False)
+                    break
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                if method not in ("GET", "HEAD"):
+                    await self.respond(writer, 405, b"", {"Allow": "GET, HEAD"}, head=False, keep_alive=False)
+                    break
+
+                url = urlsplit(target)
+                if url.path == "/api/events" and method == "GET":
+                    await self.events(writer)
+                    break
+                if url.path.startswith("/api/"):
+                    status, body, extra = await self.api(url.path, url.query)
+                    extra.setdefault("Content-Type", "application/json")
+                else:
+                    status, body, extra = await self.static(url.path, headers.get("accept-encoding", ""))
+                await self.respond(writer, status, body, extra, head=method == "HEAD", keep_alive=keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    async def respond(
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: bytes,
+        headers: Dict[str, str],
+        head: bool,
+        keep_alive: bool,
+    ) -> None:
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}", f"Content-Length: {len(body)}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if not head:
+            writer.write(body)
+        await writer.drain()
+
+
+async def serve(server: QueryServer, host: str, port: int) -> None:
+    listener = await asyncio.start_server(server.handle, host, port)
+    print(f"Serving {server.root} on http://{host}:{port}/ (Ctrl+C to stop)")
+    follower = asyncio.create_task(server.follow_changes())
+    async with listener:
+        try:
+            await listener.serve_forever()
+        finally:
+            follower.cancel()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on (default: 8000)")
+    parser.add_argument("--cache-mb", type=float, default=64, help="LRU cache budget for query responses (default: 64)")
+    parser.add_argument("--chunk-workers", type=int, default=None, help="worker processes for parsing the business registry")
+    parser.add_argument("--root", type=Path, default=pipeline.ROOT, help="directory to serve static files from (default: project root)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    started = time.perf_counter()
+    datasets = load_datasets(args.chunk_workers)
+    loaded = ", ".join(f"{name} ({len(dataset.records):,})" for name, dataset in datasets.items()) or "nothing"
+    print(f"Loaded {loaded} in {time.perf_counter() - started:.1f}s")
+    server = QueryServer(datasets, args.root, int(args.cache_mb * (1 << 20)), chunk_workers=args.chunk_workers)
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Streaming WKT polygon parsing and multi-resolution simplification.
+
+Park outlines arrive as ``MULTIPOLYGON``/``POLYGON`` WKT cells that can run to
+megabytes. ``ShapeSimplifier`` is a ``fast_csv.stream_records`` sink: it takes
+the cell in pieces, parses vertices as they stream past (``WktPolygons``) and
+keeps each ring only at the resolutions in ``LEVELS``:
+
+* while a ring streams in, a radial-distance filter drops every vertex closer
+  than the finest tolerance to the last one kept, so a ring is buffered at
+  roughly output resolution, never at full resolution;
+* when the ring closes, Douglas-Peucker simplifies it once per level (in
+  local metres); rings left with fewer than three distinct vertices are
+  dropped, and a polygon whose outer ring is dropped goes with it.
+
+``encode_polygons`` then snaps a level's rings to a grid of ``quantum``
+degrees and delta-encodes them as flat integer lists
+(``[x0, y0, dx1, dy1, ...]`` in quantum units, longitude first), which JSON
+stores far more compactly than raw coordinates.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from array import array
+from typing import Callable, List, Optional, Sequence, Tuple
+
+SHAPES_VERSION = 1
+METRES_PER_DEG = 111_320.0
+# (min zoom, tolerance in metres), coarse to fine: the map draws the finest
+# level whose min zoom it has reached.
+LEVELS: Tuple[Tuple[int, float], ...] = ((0, 40.0), (14, 8.0), (16, 2.0))
+# Grid steps per tolerance when quantizing a level's coordinates.
+QUANTA_PER_TOLERANCE = 4
+# Structure characters, or everything between two of them (a keyword or one vertex).
+WKT_TOKEN = re.compile(r"[(),]|[^(),]+")
+
+Ring = array  # interleaved lon, lat
+Polygon = List[Ring]  # outer ring first, then holes
+
+
+def level_quantum(tolerance_m: float) -> float:
+    """Coordinate grid step, in degrees, for a level of ``tolerance_m`` metres."""
+    return tolerance_m / QUANTA_PER_TOLERANCE / METRES_PER_DEG
+
+
+class WktPolygons:
+    """Push parser for ``POLYGON``/``MULTIPOLYGON`` WKT fed in arbitrary pieces.
+
+    Calls ``on_point(lon, lat)`` per vertex, ``on_ring()`` after each ring and
+    ``on_polygon()`` after each polygon. Z/M values are ignored.
+    """
+
+    def __init__(self, on_point: Callable[[float, float], None], on_ring: Callable[[], None], on_polygon: Callable[[], None]) -> None:
+        self.on_point = on_point
+        self.on_ring = on_ring
+        self.on_polygon = on_polygon
+        self.carry = ""  # text after the last structure character seen
+        self.depth = 0
+        self.ring_depth = 3
+        self.vertex = ""
+
+    def feed(self, text: str) -> None:
+        text = self.carry + text
+        # Hold back the tail, which may be a vertex cut in two.
+        cut = max(text.rfind("("), text.rfind(")"), text.rfind(",")) + 1
+        self.carry = text[cut:]
+        for token in WKT_TOKEN.findall(text, 0, cut):
+            if token == "(":
+                self.depth += 1
+            elif token == ")":
+                if self.depth == self.ring_depth:
+                    self._vertex()
+                    self.on_ring()
+                elif self.depth == self.ring_depth - 1:
+                    self.on_polygon()
+                self.depth -= 1
+            elif token == ",":
+                if self.depth == self.ring_depth:
+                    self._vertex()
+            else:
+                words = token.split()
+                if words and words[0][0].isalpha():
+                    keyword = words[0].upper()
+                    if keyword == "POLYGON":
+                        self.ring_depth = 2
+                    elif keyword == "MULTIPOLYGON":
+                        self.ring_depth = 3
+                elif words:
+                    self.vertex = token
+
+    def close(self) -> None:
+        self.carry = ""
+
+    def _vertex(self) -> None:
+        values = self.vertex.split()  # x y, plus any z/m
+        self.vertex = ""
+        if len(values) >= 2:
+            try:
+                self.on_point(float(values[0]), float(values[1]))
+            except ValueError:
+                pass
+
+
+def douglas_peucker(xs: Sequence[float], ys: Sequence[float], tolerance: float) -> List[int]:
+    """Indexes of the vertices kept by Douglas-Peucker at ``tolerance`` (same units as the coordinates)."""
+    n = len(xs)
+    if n < 3:
+        return list(range(n))
+    keep = bytearray(n)
+    keep[0] = keep[n - 1] = 1
+    limit = tolerance * tolerance
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = xs[first], ys[first]
+        dx, dy = xs[last] - ax, ys[last] - ay
+        length = dx * dx + dy * dy
+        farthest, index = 0.0, -1
+        for k in range(first + 1, last):
+            px, py = xs[k] - ax, ys[k] - ay
+            if length:
+                # Distance to the segment; a closed ring's first span has length 0 (distance to the point).
+                t = min(1.0, max(0.0, (px * dx + py * dy) / length))
+                px, py = px - t * dx, py - t * dy
+            distance = px * px + py * py
+            if distance > farthest:
+                farthest, index = distance, k
+        if farthest > limit:
+            keep[index] = 1
+            stack.append((first, index))
+            stack.append((index, last))
+    return [k for k in range(n) if keep[k]]
+
+
+class ShapeSimplifier:
+    """``stream_records`` sink turning one WKT cell into ``polygons`` per level of ``levels``."""
+
+    def __init__(self, levels: Sequence[Tuple[int, float]] = LEVELS) -> None:
+        self.tolerances = [tolerance for _, tolerance in levels]
+        self.min_step = min(self.tolerances)
+        self.parser = WktPolygons(self._point, self._ring, self._polygon)
+        self.ring: Ring = array("d")
+        self.last: Optional[Tuple[float, float]] = None  # last vertex seen, kept or not
+        self.scale_x = METRES_PER_DEG
+        self.current: List[Polygon] = [[] for _ in levels]  # rings of the open polygon, per level
+        self.polygons: List[List[Polygon]] = [[] for _ in levels]
+        self.vertices = 0  # vertices read, before any simplification
+
+    def feed(self, text: str) -> None:
+        self.parser.feed(text)
+
+    def close(self) -> "ShapeSimplifier":
+        self.parser.close()
+        return self
+
+    def _point(self, lon: float, lat: float) -> None:
+        self.vertices += 1
+        self.last = (lon, lat)
+        ring = self.ring
+        if not ring:
+            self.scale_x = METRES_PER_DEG * math.cos(math.radians(lat))
+        elif math.hypot((lon - ring[-2]) * self.scale_x, (lat - ring[-1]) * METRES_PER_DEG) < self.min_step:
+            return
+        ring.append(lon)
+        ring.append(lat)
+
+    def _ring(self) -> None:
+        ring = self.ring
+        if self.last is not None and (ring[-2], ring[-1]) != self.last:
+            ring.extend(self.last)  # the closing vertex always stays
+        xs = [lon * self.scale_x for lon in ring[0::2]]
+        ys = [lat * METRES_PER_DEG for lat in ring[1::2]]
+        for level, tolerance in enumerate(self.tolerances):
+            kept = douglas_peucker(xs, ys, tolerance)
+            simplified = array("d")
+            # Under 4 vertices (3 distinct plus the closing one) a ring has no area; left empty, it marks a dropped ring.
+            if len(kept) >= 4:
+                for k in kept:
+                    simplified.extend(ring[2 * k : 2 * k + 2])
+            self.current[level].append(simplified)
+        self.ring = array("d")
+        self.last = None
+
+    def _polygon(self) -> None:
+        for level, rings in enumerate(self.current):
+            # Without its outer ring a polygon is gone; dropped holes just disappear.
+            if rings and rings[0]:
+                self.polygons[level].append([ring for ring in rings if ring])
+            self.current[level] = []
+
+
+def encode_polygons(polygons: Sequence[Polygon], quantum: float) -> List[List[List[int]]]:
+    """Snap ``polygons`` to a ``quantum``-degree grid and delta-encode each ring (see the module docstring).
+
+    Vertices that snap onto their predecessor are dropped, and so are rings
+    (and polygons, for an outer ring) left without area.
+    """
+    encoded = []
+    for polygon in polygons:
+        rings = []
+        for ring in polygon:
+            flat: List[int] = []
+            previous_x = previous_y = None
+            count = 0
+            for k in range(0, len(ring), 2):
+                x, y = round(ring[k] / quantum), round(ring[k + 1] / quantum)
+                if previous_x is None:
+                    flat += (x, y)
+                elif (x, y) != (previous_x, previous_y):
+                    flat += (x - previous_x, y - previous_y)
+                else:
+                    continue
+                previous_x, previous_y = x, y
+                count += 1
+            if count >= 4:
+                rings.append(flat)
+            elif not rings:
+                break
+        if rings:
+            encoded.append(rings)
+    return encoded
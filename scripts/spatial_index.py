@@ -0,0 +1,343 @@
+"""
+Uniform lat/lon grid over a point layer, for nearest-point queries in the page.
+
+Points are bucketed into square cells of ``cell_deg`` degrees and stored in
+compressed-row form: ``points`` lists point indexes (positions in the layer's
+``entries``) grouped by cell, and cell ``c`` owns ``points[offsets[c]:offsets[c + 1]]``.
+Cells are numbered row-major from the south-west corner (``origin_lat``,
+``origin_lon``). A k-nearest query walks rings of cells outward from the
+query's cell and stops as soon as the k-th best distance is closer than
+anything outside the rings visited, so it touches a handful of cells however
+large the layer is.
+
+Cell size is picked so cells hold about ``TARGET_PER_CELL`` points on average,
+bounded below by ``MIN_CELL_DEG`` (~100 m) and above by ``MAX_CELLS`` in total.
+
+``GridLayer`` writes the grid as ``<name>.grid.json`` beside a layer streamed
+by ``json_writer``.
+
+``GridIndex`` indexes a layer in memory for queries on the Python side
+(nearest point, and the number and total weight of points within a radius,
+by haversine distance), as used by ``accessibility.py``.
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import compress, repeat
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from columnar import pack
+from json_writer import OutputOptions, entry_point, write_json
+
+GRID_VERSION = 1
+TARGET_PER_CELL = 4
+MIN_CELL_DEG = 0.001
+MAX_CELLS = 1 << 20
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = math.pi / 180 * EARTH_RADIUS_KM
+SCAN_MARGIN = 1 + 1e-9
+STRIP_POINTS = 16
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance, matching ``haversineDistance`` in ``js/main.js``."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def unit_vector(phi: float, lam: float) -> Tuple[float, float, float]:
+    """Point on the unit sphere at latitude ``phi`` and longitude ``lam`` (radians)."""
+    cos_phi = math.cos(phi)
+    return (cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi))
+
+
+class GridLayout(NamedTuple):
+    cell_deg: float
+    origin_lat: float
+    origin_lon: float
+    rows: int
+    cols: int
+    offsets: array
+    points: array
+
+
+def grid_layout(coordinates: Sequence[float]) -> Optional[GridLayout]:
+    """Bucket interleaved ``[lat0, lon0, lat1, lon1, ...]`` into cells; ``None`` when no point is located."""
+    located = [
+        index
+        for index in range(len(coordinates) // 2)
+        if math.isfinite(coordinates[2 * index]) and math.isfinite(coordinates[2 * index + 1])
+    ]
+    if not located:
+        return None
+
+    lats = [coordinates[2 * index] for index in located]
+    lons = [coordinates[2 * index + 1] for index in located]
+    min_lat, min_lon = min(lats), min(lons)
+    span_lat = max(lats) - min_lat
+    span_lon = max(lons) - min_lon
+
+    cell_deg = max(MIN_CELL_DEG, math.sqrt(span_lat * span_lon * TARGET_PER_CELL / len(located)))
+    while (math.floor(span_lat / cell_deg) + 1) * (math.floor(span_lon / cell_deg) + 1) > MAX_CELLS:
+        cell_deg *= 2
+    rows = math.floor(span_lat / cell_deg) + 1
+    cols = math.floor(span_lon / cell_deg) + 1
+
+    # Counting sort of point indexes by cell (stable, so each cell keeps layer order).
+    cells = array("I", (math.floor((lat - min_lat) / cell_deg) * cols + math.floor((lon - min_lon) / cell_deg) for lat, lon in zip(lats, lons)))
+    offsets = array("I", [0] * (rows * cols + 1))
+    for cell in cells:
+        offsets[cell + 1] += 1
+    for cell in range(rows * cols):
+        offsets[cell + 1] += offsets[cell]
+    cursor = array("I", offsets[:-1])
+    points = array("I", [0] * len(located))
+    for index, cell in zip(located, cells):
+        points[cursor[cell]] = index
+        cursor[cell] += 1
+    return GridLayout(cell_deg, min_lat, min_lon, rows, cols, offsets, points)
+
+
+def build_grid(coordinates: Sequence[float]) -> Dict[str, Any]:
+    """Index interleaved ``[lat0, lon0, lat1, lon1, ...]``; points with a missing coordinate are left out."""
+    layout = grid_layout(coordinates)
+    if layout is None:
+        return {
+            "format": "grid",
+            "version": GRID_VERSION,
+            "cell_deg": MIN_CELL_DEG,
+            "origin_lat": 0.0,
+            "origin_lon": 0.0,
+            "rows": 0,
+            "cols": 0,
+            "offsets": pack(array("I", [0])),
+            "points": pack(array("I")),
+        }
+    return {
+        "format": "grid",
+        "version": GRID_VERSION,
+        "cell_deg": layout.cell_deg,
+        # Flat keys: compact output rounds nested lat/lon, which would shift the grid.
+        "origin_lat": layout.origin_lat,
+        "origin_lon": layout.origin_lon,
+        "rows": layout.rows,
+        "cols": layout.cols,
+        "offsets": pack(layout.offsets),
+        "points": pack(layout.points),
+    }
+
+
+class GridIndex:
+    """Radius and nearest-point queries over interleaved ``[lat0, lon0, ...]`` coordinates.
+
+    Points are cut into latitude strips, each sorted by longitude and stored
+    with its latitude in radians, that latitude's cosine and a running total
+    of the weights, so a query finds the points of a strip inside any
+    longitude window by bisection and counts or sums a run of them in one
+    step. With ``weights`` (one per point), ``radius_totals`` sums them as well.
+    Each point also keeps its unit vector, since the chord between two
+    vectors orders pairs exactly as the haversine distance does.
+
+    Strips are sized from the layer's density, about ``STRIP_POINTS`` points
+    per square of strip height. Unlike grid cells their height has no lower
+    bound, so the points a query must measure one by one, those within a
+    strip's height of a circle, stay a few per strip however dense the layer.
+    """
+
+    def __init__(self, coordinates: Sequence[float], weights: Optional[Sequence[float]] = None) -> None:
+        self.coordinates = coordinates
+        self.strip_starts = array("I", [0])
+        self.indexes = array("I")
+        self.lons = array("d")
+        self.phis = array("d")
+        self.cos_phis = array("d")
+        self.vectors: List[Tuple[float, float, float]] = []
+        self.weights: Optional[array] = array("d") if weights is not None else None
+        # cumulative[j]: total weight of the points before position j.
+        self.cumulative: Optional[array] = array("d", [0.0]) if weights is not None else None
+        self.strips = 0
+        located = [
+            index
+            for index in range(len(coordinates) // 2)
+            if math.isfinite(coordinates[2 * index]) and math.isfinite(coordinates[2 * index + 1])
+        ]
+        if not located:
+            return
+
+        lats = [coordinates[2 * index] for index in located]
+        lons = [coordinates[2 * index + 1] for index in located]
+        self.origin_lat = min(lats)
+        span_lat = max(lats) - self.origin_lat
+        span_lon = max(lons) - min(lons)
+        # At most one strip per point, and one strip in all when every point shares a latitude.
+        self.strip_deg = max(math.sqrt(span_lat * span_lon * STRIP_POINTS / len(located)), span_lat / len(located)) or 1.0
+        self.strips = math.floor(span_lat / self.strip_deg) + 1
+        members: List[List[Tuple[float, int]]] = [[] for _ in range(self.strips)]
+        for index, lat, lon in zip(located, lats, lons):
+            members[math.floor((lat - self.origin_lat) / self.strip_deg)].append((lon, index))
+        for strip in members:
+            for lon, index in sorted(strip):
+                phi = math.radians(coordinates[2 * index])
+                self.indexes.append(index)
+                self.lons.append(lon)
+                self.phis.append(phi)
+                self.cos_phis.append(math.cos(phi))
+                self.vectors.append(unit_vector(phi, math.radians(lon)))
+                if self.weights is not None:
+                    self.weights.append(weights[index])
+                    self.cumulative.append(self.cumulative[-1] + weights[index])
+            self.strip_starts.append(len(self.indexes))
+
+    def radius_totals(self, lat: float, lon: float, radii: Sequence[float]) -> Tuple[List[int], List[float]]:
+        """Number of located points, and their total weight, within each of ``radii`` (ascending) km.
+
+        Per strip and radius, two longitude windows come from the haversine
+        formula: inside the inner one every point of the strip is within the
+        radius (checked at the strip's farther edge), and outside the outer one
+        none is (checked at its nearer edge). The inner run is counted whole
+        and its weights summed in one slice; only the points between the two,
+        near the circle, are measured, a slice at a time by chord length. The
+        totals are 0.0 without weights.
+        """
+        counts = [0] * len(radii)
+        totals = [0.0] * len(radii)
+        if not self.strips or not radii:
+            return counts, totals
+        lat_deg = (radii[-1] + 1e-6) / KM_PER_DEG_LAT
+        first = max(0, math.floor((lat - lat_deg - self.origin_lat) / self.strip_deg))
+        last = min(self.strips - 1, math.floor((lat + lat_deg - self.origin_lat) / self.strip_deg))
+        if first > last:
+            return counts, totals
+
+        # Haversine: a = sin²(Δφ/2) + cos φ cos φ' sin²(Δλ/2), and d <= r exactly when a <= sin²(r/2R).
+        phi = math.radians(lat)
+        cos_phi = math.cos(phi)
+        # Clamped to the poles, so every cosine below is positive.
+        edge_lats = [min(90.0, max(-90.0, self.origin_lat + strip * self.strip_deg)) for strip in range(first, last + 2)]
+        sin_terms = [math.sin((math.radians(edge) - phi) / 2) ** 2 for edge in edge_lats]
+        cos_terms = [cos_phi * math.cos(math.radians(edge)) for edge in edge_lats]
+        # On the unit sphere, d <= r exactly when the chord is at most 2 sin(r/2R).
+        query = unit_vector(phi, math.radians(lon))
+        chords = [2 * math.sin(radius / (2 * EARTH_RADIUS_KM)) for radius in radii]
+        # A millimetre of slack each way absorbs rounding: the inner run is
+        # safely inside, and the outer window misses no point.
+        inner = [math.sin((radius - 1e-6) / (2 * EARTH_RADIUS_KM)) ** 2 for radius in radii]
+        outer = [math.sin((radius + 1e-6) / (2 * EARTH_RADIUS_KM)) ** 2 for radius in radii]
+        starts, lons, vectors, weights, cumulative = self.strip_starts, self.lons, self.vectors, self.weights, self.cumulative
+        asin, sqrt, degrees, dist = math.asin, math.sqrt, math.degrees, math.dist
+
+        for k, strip in enumerate(range(first, last + 1)):
+            start, end = starts[strip], starts[strip + 1]
+            if start == end:
+                continue
+            # The strip's nearest latitude and its smallest cosine (at an edge: cos is
+            # concave) bound the haversine term of every point in it from below.
+            sin_near = 0.0 if edge_lats[k] <= lat <= edge_lats[k + 1] else min(sin_terms[k], sin_terms[k + 1])
+            cos_narrow = min(cos_terms[k], cos_terms[k + 1])
+            # Each window is the widest Δλ keeping a <= bound: sin²(Δλ/2) = (bound - sin term) / cos term.
+            for slot, chord in enumerate(chords):
+                if sin_near > outer[slot]:
+                    continue
+                ratio = (outer[slot] - sin_near) / cos_narrow
+                gap = 180.0 if ratio >= 1.0 else 2 * degrees(asin(sqrt(ratio)))
+                low = bisect_left(lons, lon - gap, start, end)
+                high = bisect_right(lons, lon + gap, low, end)
+                if low == high:
+                    continue
+                ratio = min((inner[slot] - sin_terms[k]) / cos_terms[k], (inner[slot] - sin_terms[k + 1]) / cos_terms[k + 1])
+                if ratio >= 0.0:
+                    gap = 180.0 if ratio >= 1.0 else 2 * degrees(asin(sqrt(ratio)))
+                    full_low = bisect_left(lons, lon - gap, low, high)
+                    full_high = bisect_right(lons, lon + gap, full_low, high)
+                    counts[slot] += full_high - full_low
+                    if weights is not None:
+                        totals[slot] += cumulative[full_high] - cumulative[full_low]
+                else:
+                    full_low = full_high = low
+                for band_low, band_high in ((low, full_low), (full_high, high)):
+                    if band_low == band_high:
+                        continue
+                    inside = list(map(chord.__ge__, map(dist, vectors[band_low:band_high], repeat(query))))
+                    counts[slot] += sum(inside)
+                    if weights is not None:
+                        totals[slot] += sum(compress(weights[band_low:band_high], inside))
+        return counts, totals
+
+    def nearest(self, lat: float, lon: float) -> Optional[Tuple[int, float]]:
+        """Closest located point as ``(index, km)`` (lowest index on ties), or ``None`` for an empty layer.
+
+        Scans strips outward from the query's strip and, within a strip, points
+        outward from the query's longitude, each direction stopping once the
+        latitude or longitude gap alone puts everything beyond it farther than
+        the best point found.
+        """
+        if not self.strips:
+            return None
+        starts, lons, phis, cos_phis, indexes = self.strip_starts, self.lons, self.phis, self.cos_phis, self.indexes
+        phi = math.radians(lat)
+        cos_phi = math.cos(phi)
+        half_radian = math.pi / 360
+        best_a = math.inf
+        best_index = -1
+
+        def scan(strip: int) -> bool:
+            """Offer the strip's candidates; ``False`` once it, and so every strip past it, is too far."""
+            nonlocal best_a, best_index
+            south = self.origin_lat + strip * self.strip_deg
+            north = south + self.strip_deg
+            near = 0.0 if south <= lat <= north else min(abs(south - lat), abs(north - lat))
+            sin_near = math.sin(math.radians(near) / 2) ** 2
+            # The bounds are rounded separately from the exact terms, so they
+            # only stop a scan with a margin to spare (ties must still be seen).
+            if sin_near > best_a * SCAN_MARGIN:
+                return False
+            # Smallest cosine in the strip, for a lower bound on the longitude term.
+            cos_narrow = cos_phi * min(math.cos(math.radians(south)), math.cos(math.radians(north)))
+            start, end = starts[strip], starts[strip + 1]
+            middle = bisect_left(lons, lon, start, end)
+            for side in (range(middle, end), range(middle - 1, start - 1, -1)):
+                for j in side:
+                    lon_term = math.sin((lons[j] - lon) * half_radian) ** 2
+                    if sin_near + cos_narrow * lon_term > best_a * SCAN_MARGIN:
+                        break
+                    a = math.sin((phis[j] - phi) / 2) ** 2 + cos_phi * cos_phis[j] * lon_term
+                    if a < best_a or (a == best_a and indexes[j] < best_index):
+                        best_a, best_index = a, indexes[j]
+            return True
+
+        home = min(self.strips - 1, max(0, math.floor((lat - self.origin_lat) / self.strip_deg)))
+        north_open = south_open = True
+        for step in range(max(home + 1, self.strips - home)):
+            if north_open:
+                north_open = home + step < self.strips and scan(home + step)
+            if south_open and step:
+                south_open = home - step >= 0 and scan(home - step)
+            if not north_open and not south_open:
+                break
+        if best_index < 0:
+            return None
+        coordinates = self.coordinates
+        return best_index, haversine_km(lat, lon, coordinates[2 * best_index], coordinates[2 * best_index + 1])
+
+
+def grid_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}.grid.json")
+
+
+class GridLayer:
+    """``JsonStream`` layer output: the entries' coordinates indexed into ``<name>.grid.json``."""
+
+    def start(self, path: Path, options: OutputOptions) -> None:
+        self.path, self.options = grid_path(path), options
+        self.coordinates = array("d")
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        self.coordinates.extend(entry_point(entry))
+
+    def finish(self) -> None:
+        write_json(self.path, build_grid(self.coordinates), self.options)
@@ -0,0 +1,210 @@
+"""
+Regions x periods matrices for the Zillow (ZORI/ZHVI) and FHFA HPI series.
+
+Header parsing happens once per file: date columns are resolved, sorted and
+mapped to matrix columns up front, and each kept row becomes one
+``array('d')`` with NaN marking gaps. Metrics (latest value, value N
+observations back, value at a fixed baseline date, trailing averages, min/max)
+are computed over the whole matrix at once, so adding a metric is one more
+column-wise function rather than another loop over every cell of every row.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fast_csv import iter_columns, read_header
+from region_index import RegionIndex
+
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+NAN = math.nan
+QUARTER_END = {1: "03-31", 2: "06-30", 3: "09-30", 4: "12-31"}
+
+
+def parse_value(value: Optional[str]) -> float:
+    if not value:
+        return NAN
+    try:
+        return float(value)
+    except ValueError:
+        return NAN
+
+
+class SeriesMatrix:
+    """Values for ``keys`` (one tuple of identifying columns per row) across ``dates``."""
+
+    def __init__(self, dates: List[str], keys: List[Tuple[Optional[str], ...]], rows: List[array]) -> None:
+        self.dates = dates
+        self.keys = keys
+        self.rows = rows
+        self.date_index = {date: index for index, date in enumerate(dates)}
+        # Raw records parsed while loading, and how many of those were dropped.
+        self.records_read = 0
+        self.records_skipped = 0
+
+    @classmethod
+    def from_wide_csv(
+        cls,
+        path: Path,
+        key_columns: Sequence[str],
+        keep: Callable[[Tuple[Optional[str], ...]], bool],
+        contains: Optional[str] = None,
+        index_dir: Optional[Path] = None,
+        where: Optional[Dict[str, str]] = None,
+    ) -> "SeriesMatrix":
+        """Load a Zillow-style file with one ``YYYY-MM-DD`` column per month.
+
+        With ``index_dir`` and ``where`` (keyword arguments for
+        ``RegionIndex.find``) only the matching records are read, via the
+        file's byte-offset sidecar; otherwise the whole file is scanned.
+        ``keep`` is applied either way.
+        """
+        index = RegionIndex.load_or_build(path, index_dir) if index_dir is not None and where else None
+        header = index.header if index is not None else read_header(path)
+        raw_columns = [key for key in dict.fromkeys(header) if DATE_PATTERN.match(key.strip())]
+        order = sorted(range(len(raw_columns)), key=lambda position: raw_columns[position].strip())
+        date_columns = [raw_columns[position] for position in order]
+        columns = list(key_columns) + date_columns
+        if index is not None:
+            records: Iterable[Tuple[Optional[str], ...]] = index.read(index.find(**where), columns)
+        else:
+            records = iter_columns(path, columns, contains=contains)
+        width = len(key_columns)
+        keys: List[Tuple[Optional[str], ...]] = []
+        rows: List[array] = []
+        read = 0
+        for record in records:
+            read += 1
+            key = record[:width]
+            if not keep(key):
+                continue
+            keys.append(key)
+            rows.append(array("d", map(parse_value, record[width:])))
+        matrix = cls([column.strip() for column in date_columns], keys, rows)
+        matrix.records_read, matrix.records_skipped = read, read - len(keys)
+        return matrix
+
+    @classmethod
+    def from_long_csv(
+        cls,
+        path: Path,
+        key_columns: Sequence[str],
+        period_columns: Sequence[str],
+        value_column: str,
+        to_date: Callable[[Tuple[Optional[str], ...]], Optional[str]],
+        keep: Callable[[Tuple[Optional[str], ...]], bool],
+        contains: Optional[str] = None,
+    ) -> "SeriesMatrix":
+        """Pivot a long file (one observation per row, e.g. FHFA HPI) into a matrix."""
+        width = len(key_columns)
+        period_width = len(period_columns)
+        observations: Dict[Tuple[Optional[str], ...], Dict[str, float]] = {}
+        read = skipped = 0
+        for record in iter_columns(path, list(key_columns) + list(period_columns) + [value_column], contains=contains):
+            read += 1
+            key = record[:width]
+            if not keep(key):
+                skipped += 1
+                continue
+            date = to_date(record[width : width + period_width])
+            value = parse_value(record[-1])
+            if date is None or math.isnan(value):
+                skipped += 1
+                continue
+            observations.setdefault(key, {})[date] = value
+        dates = sorted({date for series in observations.values() for date in series})
+        rows = [array("d", (series.get(date, NAN) for date in dates)) for series in observations.values()]
+        matrix = cls(dates, list(observations), rows)
+        matrix.records_read, matrix.records_skipped = read, skipped
+        return matrix
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def observations(self, row: int) -> List[Tuple[str, float]]:
+        """Non-missing ``(date, value)`` pairs for one row, oldest first."""
+        return [(date, value) for date, value in zip(self.dates, self.rows[row]) if not math.isnan(value)]
+
+    def latest_index(self) -> List[int]:
+        """Column of each row's most recent observation (-1 when the row is empty)."""
+        result = []
+        for values in self.rows:
+            index = len(values) - 1
+            while index >= 0 and math.isnan(values[index]):
+                index -= 1
+            result.append(index)
+        return result
+
+    def latest(self) -> array:
+        return self.take(self.latest_index())
+
+    def take(self, columns: Sequence[int]) -> array:
+        """Pick one column per row; negative columns yield NaN."""
+        return array("d", (values[column] if column >= 0 else NAN for values, column in zip(self.rows, columns)))
+
+    def at_date(self, date: str) -> array:
+        column = self.date_index.get(date)
+        if column is None:
+            return array("d", [NAN] * len(self.rows))
+        return array("d", (values[column] for values in self.rows))
+
+    def observations_back(self, periods: int) -> array:
+        """Value ``periods`` observations before each row's latest one (gaps are skipped, not counted)."""
+        result = array("d")
+        for values, latest in zip(self.rows, self.latest_index()):
+            remaining = periods
+            index = latest
+            while index >= 0 and remaining:
+                index -= 1
+                while index >= 0 and math.isnan(values[index]):
+                    index -= 1
+                remaining -= 1
+            result.append(values[index] if latest >= 0 and index >= 0 else NAN)
+        return result
+
+    def trailing_mean(self, window: int) -> array:
+        """Mean of the last ``window`` periods ending at each row's latest observation, ignoring gaps."""
+        result = array("d")
+        for values, latest in zip(self.rows, self.latest_index()):
+            window_values = [value for value in values[max(0, latest - window + 1) : latest + 1] if not math.isnan(value)]
+            result.append(sum(window_values) / len(window_values) if latest >= 0 and window_values else NAN)
+        return result
+
+
+def change(current: array, previous: array) -> Tuple[List[Optional[float]], List[Optional[float]]]:
+    """Absolute (2 dp) and percent (1 dp) change per row; ``None`` where the base is missing or zero.
+
+    The percent figure is derived from the rounded absolute change, matching the
+    long-standing rent_by_zip.json output.
+    """
+    absolute: List[Optional[float]] = []
+    percent: List[Optional[float]] = []
+    for now, then in zip(current, previous):
+        if math.isnan(now) or math.isnan(then) or not then:
+            absolute.append(None)
+            percent.append(None)
+            continue
+        delta = round(now - then, 2)
+        absolute.append(delta)
+        percent.append(round((delta / then) * 100, 1))
+    return absolute, percent
+
+
+def value_range(values: Sequence[Optional[float]]) -> Tuple[Optional[float], Optional[float]]:
+    present = [value for value in values if value is not None and not math.isnan(value)]
+    if not present:
+        return None, None
+    return min(present), max(present)
+
+
+def quarter_end_date(period: Tuple[Optional[str], ...]) -> Optional[str]:
+    """Map an FHFA ``(yr, period)`` quarterly pair to its quarter-end ISO date."""
+    year, quarter = period
+    try:
+        return f"{int(year)}-{QUARTER_END[int(quarter)]}"
+    except (TypeError, ValueError, KeyError):
+        return None
@@ -0,0 +1,125 @@
+"""
+Polling file watcher and change feed for ``preprocess_data.py --watch``.
+
+``watch`` polls a directory's CSVs (size and mtime, standard library only) and,
+once a change has been quiet for ``debounce`` seconds, hands the changed file
+names to a rebuild callback. Saving a file in an editor or copying a large
+export in place usually shows up as several writes; the debounce folds them
+into one rebuild.
+
+``stages_downstream`` and ``stages_upstream`` walk the stage dependency graph
+(as returned by ``stage_dependencies``) so the caller can rerun just the
+stages fed by the changed files, plus whatever they require.
+
+After every rebuild ``publish_changes`` writes ``data/.build/changes.json``:
+an increasing ``sequence``, the raw ``inputs`` that changed, the ``stages``
+rebuilt and the output files whose content ``changed``. ``serve.py`` follows
+that file and pushes each new entry to the page as a server-sent event.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+def snapshot(directory: Path, pattern: str = "*.csv") -> Snapshot:
+    """``{name: (size, mtime_ns)}`` for the files in ``directory`` matching ``pattern``."""
+    files: Snapshot = {}
+    for path in directory.glob(pattern):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:  # removed between glob and stat
+            continue
+        files[path.name] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def changed_files(before: Snapshot, after: Snapshot) -> List[str]:
+    """Names added, removed or modified between two snapshots."""
+    return sorted(name for name in set(before) | set(after) if before.get(name) != after.get(name))
+
+
+def stages_downstream(deps: Mapping[str, Sequence[str]], roots: Iterable[str]) -> Set[str]:
+    """``roots`` plus every stage that transitively waits on one of them."""
+    dependents: Dict[str, List[str]] = {name: [] for name in deps}
+    for name, requires in deps.items():
+        for dep in requires:
+            dependents[dep].append(name)
+    found: Set[str] = set()
+    stack = list(roots)
+    while stack:
+        name = stack.pop()
+        if name not in found:
+            found.add(name)
+            stack.extend(dependents[name])
+    return found
+
+
+def stages_upstream(deps: Mapping[str, Sequence[str]], names: Iterable[str]) -> Set[str]:
+    """``names`` plus every stage they transitively wait on."""
+    found: Set[str] = set()
+    stack = list(names)
+    while stack:
+        name = stack.pop()
+        if name not in found:
+            found.add(name)
+            stack.extend(deps[name])
+    return found
+
+
+def read_changes(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def publish_changes(path: Path, inputs: List[str], stages: List[str], changed: List[str]) -> Dict[str, Any]:
+    """Write the next change entry to ``path`` (atomically) and return it."""
+    previous = read_changes(path) or {}
+    entry = {
+        "sequence": previous.get("sequence", 0) + 1,
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "inputs": inputs,
+        "stages": stages,
+        "changed": changed,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(json.dumps(entry, indent=2) + "\n")
+    os.replace(tmp_path, path)
+    return entry
+
+
+def watch(
+    directory: Path,
+    rebuild: Callable[[List[str]], None],
+    interval: float = 1.0,
+    debounce: float = 0.5,
+    pattern: str = "*.csv",
+) -> None:
+    """Call ``rebuild(changed names)`` after each settled change under ``directory``; runs until interrupted."""
+    current = snapshot(directory, pattern)
+    while True:
+        time.sleep(interval)
+        latest = snapshot(directory, pattern)
+        if latest == current:
+            continue
+        # Wait until the files stop changing before rebuilding from them.
+        settled = latest
+        while True:
+            time.sleep(debounce)
+            latest = snapshot(directory, pattern)
+            if latest == settled:
+                break
+            settled = latest
+        changed = changed_files(current, settled)
+        current = settled
+        rebuild(changed)
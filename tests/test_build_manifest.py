@@ -0,0 +1,39 @@
+import build_manifest
+import preprocess_data
+from build_manifest import BuildManifest, source_files
+
+
+def test_deleting_a_file_under_a_directory_output_makes_the_stage_stale(tmp_path):
+    for name in ("tiles/parks/meta.json", "tiles/parks/11/327/792.json"):
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("{}")
+    manifest = BuildManifest(tmp_path / ".build")
+    outputs = manifest.output_hashes(tmp_path, ("tiles/parks/",))
+    manifest.record("parks", "key", {}, {}, outputs, {})
+
+    assert sorted(outputs) == ["tiles/parks/11/327/792.json", "tiles/parks/meta.json"]
+    assert manifest.is_fresh("parks", "key", tmp_path)
+    (tmp_path / "tiles/parks/11/327/792.json").unlink()
+    assert not manifest.is_fresh("parks", "key", tmp_path)
+
+
+def test_stage_code_hash_skips_scripts_outside_the_pipeline():
+    names = {path.name for path in source_files(preprocess_data.preprocess_accessibility)}
+
+    assert {"preprocess_data.py", "accessibility.py", "spatial_index.py", "json_writer.py"} <= names
+    assert not names & {"serve.py", "benchmark.py", "check_top_k.py", "watcher.py", "heavy_hitters.py"}
+
+
+def test_each_input_is_hashed_once_across_stages(tmp_path, monkeypatch):
+    raw = tmp_path / "raw.csv"
+    raw.write_text("a,b\n1,2\n")
+    hashed = []
+    monkeypatch.setattr(build_manifest, "hash_file", lambda path: hashed.append(path) or "hash")
+
+    manifest = BuildManifest(tmp_path / ".build")
+    first = manifest.input_record(raw)
+    manifest.record("parks", "key", {"raw.csv": first}, {}, {}, {})
+    assert manifest.input_record(raw) == first
+    # A later run reuses the hash another stage recorded.
+    assert BuildManifest(tmp_path / ".build").input_record(raw) == first
+    assert hashed == [raw]
@@ -0,0 +1,19 @@
+from collections import Counter
+
+from business_changes import ChangeHistory
+
+
+def snapshot(date):
+    return {"name": f"registry_{date}.csv", "date": date, "size": 0, "mtime_ns": 0}
+
+
+def test_business_moving_zip_moves_active_counts():
+    history = ChangeHistory()
+    history.apply(snapshot("2025-01-01"), {"a": ("94110", "Retail"), "b": ("94110", "Food"), "c": ("94103", "Retail")})
+    latest = {"a": ("94103", "Retail"), "b": ("94110", "Retail"), "c": ("94103", "Retail"), "d": ("94110", "Food")}
+    entry = history.apply(snapshot("2025-02-01"), latest)
+
+    assert (entry["opened"], entry["closed"], entry["active"]) == (1, 0, 4)
+    assert +history.active_by_zip == Counter(zip_code for zip_code, _ in latest.values())
+    assert +history.active_by_sector == Counter(sector for _, sector in latest.values())
+    assert {row["zip"]: row["active"] for row in entry["by_zip"]} == {"94110": 2}
@@ -0,0 +1,69 @@
+import csv
+import random
+
+import fast_csv
+import preprocess_data
+from fast_csv import split_records
+from preprocess_data import BUSINESS_COLUMNS, aggregate_business_range, map_record_ranges, merge_business_partials
+
+
+def write_registry(path, rows):
+    rng = random.Random(3)
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["Location Id"] + BUSINESS_COLUMNS)
+        for index in range(rows):
+            # Most sectors span lines and hold quotes and commas, so byte
+            # targets keep landing inside quoted fields.
+            sector = rng.choice(["Retail Trade", 'Food "and"\nDrink,\nServices', "Construction\r\nand Repair", ""])
+            writer.writerow(
+                [
+                    index,
+                    rng.choice(["San Francisco", "San Francisco", "Oakland"]),
+                    rng.choice(["94103", "94110", " 94117 ", ""]),
+                    rng.choice(["Mission", "Castro/Upper Market", "Line\nBreak", ""]),
+                    sector,
+                ]
+            )
+
+
+def as_plain(merged):
+    # Lists of items keep first-seen order, which downstream tie-breaks rely on.
+    return {
+        "business_by_zip": [(key, info["count"], list(info["sectors"].items())) for key, info in merged["business_by_zip"].items()],
+        "business_by_neighborhood": list(merged["business_by_neighborhood"].items()),
+        "naics_rollup": list(merged["naics_rollup"].items()),
+        "zip_neighborhoods": [(key, list(counts.items())) for key, counts in merged["zip_neighborhoods"].items()],
+        "rows_read": merged["rows_read"],
+        "rows_skipped": merged["rows_skipped"],
+    }
+
+
+def aggregate(path, chunks):
+    header, ranges = split_records(path, chunks)
+    return len(ranges), as_plain(merge_business_partials(aggregate_business_range(path, start, end, header) for start, end in ranges))
+
+
+def test_chunked_aggregation_matches_a_serial_pass(tmp_path, monkeypatch):
+    path = tmp_path / "registry.csv"
+    write_registry(path, 400)
+    # Small scan blocks make quoted newlines straddle block edges too.
+    monkeypatch.setattr(fast_csv, "SCAN_BLOCK_SIZE", 97)
+
+    chunks, serial = aggregate(path, 1)
+    assert chunks == 1
+    assert serial["rows_read"] == 400
+    chunks, chunked = aggregate(path, 7)
+    assert chunks == 7
+    assert chunked == serial
+
+
+def test_map_record_ranges_matches_a_serial_pass(tmp_path, monkeypatch):
+    path = tmp_path / "registry.csv"
+    write_registry(path, 400)
+    monkeypatch.setattr(preprocess_data, "MIN_CHUNK_BYTES", 1)
+
+    serial = as_plain(merge_business_partials(map_record_ranges(path, aggregate_business_range, 1)))
+    # Two workers split the file into four ranges, parsed in worker processes.
+    parallel = as_plain(merge_business_partials(map_record_ranges(path, aggregate_business_range, 2)))
+    assert parallel == serial
@@ -0,0 +1,78 @@
+import csv
+import io
+
+import fast_csv
+from fast_csv import prefilter_records, read_range, split_records, stream_records
+
+HEADER = ["id", "name", "note", "shape"]
+# CRLF and LF endings, quoted newlines (both kinds), doubled quotes, short
+# rows, blank lines, and a last record without a line ending.
+TEXT = (
+    "id,name,note,shape\r\n"
+    '1,plain,"keep ""quoted"" text",POINT (1 2)\r\n'
+    "\r\n"
+    '2,"multi\r\nline, keep","a ""b""\nc","POLYGON ((1 2, 3 4))"\n'
+    "3,short\n"
+    "\n"
+    '4,"""",,"x""y"\r\n'
+    '5,"ends in quote""",keep,\r\n'
+    "6,unquoted\rcr,z,\r\n"
+    '7,"",trailing,"MULTI ""POLYGON""\nkeep"'
+)
+
+
+class Collect:
+    def __init__(self):
+        self.pieces = []
+
+    def feed(self, text):
+        self.pieces.append(text)
+
+    def close(self):
+        return "".join(self.pieces)
+
+
+def expected_rows():
+    return [row for row in csv.reader(io.StringIO(TEXT, newline="")) if row][1:]
+
+
+def write(tmp_path):
+    path = tmp_path / "sample.csv"
+    path.write_bytes(TEXT.encode("utf-8"))
+    return path
+
+
+def test_split_records_and_read_range_match_csv_reader(tmp_path, monkeypatch):
+    path = write(tmp_path)
+    for block_size in (1, 2, 3, 5, 8, 1 << 22):
+        monkeypatch.setattr(fast_csv, "SCAN_BLOCK_SIZE", block_size)
+        for chunks in range(1, 12):
+            header, ranges = split_records(path, chunks)
+            assert header == HEADER
+            assert ranges[-1][1] == path.stat().st_size
+            assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+            assert [row for start, end in ranges for row in read_range(path, start, end)] == expected_rows()
+
+
+def test_read_range_prefilter_keeps_whole_records(tmp_path):
+    path = write(tmp_path)
+    header, [(start, end)] = split_records(path, 1)
+    wanted = [row for row in expected_rows() if any("keep" in cell for cell in row)]
+    assert list(read_range(path, start, end, contains="keep")) == wanted
+    lines = io.StringIO(TEXT, newline="")
+    assert [row for row in csv.reader(prefilter_records(lines, "keep")) if row] == wanted
+
+
+def test_stream_records_match_csv_reader_at_every_block_size(tmp_path):
+    path = write(tmp_path)
+    columns = ("name", "id", "missing", "note")
+    expected = [
+        (
+            tuple(row[HEADER.index(name)] if name in HEADER and HEADER.index(name) < len(row) else None for name in columns),
+            row[3] if len(row) > 3 else "",
+        )
+        for row in expected_rows()
+    ]
+    # Block edges land on every character, so doubled quotes and CRLFs split across reads.
+    for block_size in range(1, len(TEXT) + 1):
+        assert list(stream_records(path, columns, "shape", Collect, block_size=block_size)) == expected
@@ -0,0 +1,51 @@
+import random
+from collections import Counter
+
+from heavy_hitters import SpaceSaving
+
+
+def summarize(items, capacity):
+    tally = SpaceSaving(capacity)
+    for item in items:
+        tally[item] += 1
+    return tally
+
+
+def test_merged_chunks_keep_bounds():
+    rng = random.Random(171)
+    for _ in range(2000):
+        capacity = rng.randint(1, 6)
+        stream = [rng.randint(0, 2) if rng.random() < 0.5 else rng.randint(0, 14) for _ in range(rng.randint(0, 80))]
+        cuts = sorted(rng.randint(0, len(stream)) for _ in range(rng.randint(1, 5)))
+        merged = SpaceSaving(capacity)
+        for start, end in zip([0] + cuts, cuts + [len(stream)]):
+            merged.update(summarize(stream[start:end], capacity))
+
+        exact = Counter(stream)
+        assert merged.total == len(stream)
+        for item, count in merged.items():
+            assert count - merged.error(item) <= exact[item] <= count
+        for item, count in exact.items():
+            if count > len(stream) / capacity:
+                assert item in merged
+
+
+def test_merge_credits_untracked_item_with_floor():
+    left = summarize("aa", 2)
+    right = summarize("abc", 2)  # c evicted a, so a's last occurrence only shows in the floor
+    left.update(right)
+    assert left["a"] == 3 and left.error("a") == 1
+    exact = Counter("aaabc")
+    for item, count in left.items():
+        assert count - left.error(item) <= exact[item] <= count
+
+
+def test_merge_without_eviction_matches_counter():
+    chunks = ["abca", "bbd", "dda"]
+    merged = SpaceSaving(10)
+    exact = Counter()
+    for chunk in chunks:
+        merged.update(summarize(chunk, 10))
+        exact.update(Counter(chunk))
+    assert merged.most_common() == exact.most_common()
+    assert merged.max_error == 0
@@ -0,0 +1,99 @@
+import base64
+import random
+import sys
+from array import array
+from bisect import bisect_left
+
+from search_index import GRAM, build_search_index
+
+STREETS = ["Mission St", "Market St", "Valencia St", "Castro St", "Folsom St", "Missouri St"]
+ZIPS = ["94103", "94110", "94114", "94107"]
+
+
+def unpack(text):
+    values = array("I")
+    values.frombytes(base64.b64decode(text))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def score(point, normalized):
+    # scoreAddressPoint in js/main.js.
+    label, address = (point.get("label") or "").lower(), (point.get("address") or "").lower()
+    value = 0
+    if normalized in (label, address):
+        value = 200
+    elif label.startswith(normalized) or address.startswith(normalized):
+        value = 140
+    elif normalized in label or normalized in address:
+        value = 100
+    if point.get("zip") and point["zip"] in normalized:
+        value += 25
+    return value
+
+
+def linear_scan(points, normalized):
+    best, best_score = -1, 0
+    for index, point in enumerate(points):
+        if score(point, normalized) > best_score:
+            best, best_score = index, score(point, normalized)
+    return best
+
+
+def indexed_find(index, points, normalized):
+    # SearchIndex.find in js/main.js: score the trigram candidates and the first point of each ZIP in the query.
+    offsets, postings = unpack(index["trigram_offsets"]), unpack(index["trigram_points"])
+    lists = []
+    for start in range(len(normalized) - GRAM + 1):
+        gram = normalized[start : start + GRAM]
+        if gram not in index["trigrams"]:
+            lists = []
+            break
+        position = index["trigrams"].index(gram)
+        lists.append(set(postings[offsets[position] : offsets[position + 1]]))
+    candidates = set.intersection(*lists) if lists else set()
+    candidates.update(first for zip_code, first in index["zips"].items() if zip_code in normalized)
+    best, best_score = -1, 0
+    for point_index in sorted(candidates):
+        if score(points[point_index], normalized) > best_score:
+            best, best_score = point_index, score(points[point_index], normalized)
+    return best
+
+
+def suggest(index, prefix):
+    offsets, postings = unpack(index["key_offsets"]), unpack(index["key_points"])
+    keys = index["keys"]
+    found = []
+    for k in range(bisect_left(keys, prefix), len(keys)):
+        if not keys[k].startswith(prefix):
+            break
+        found.extend(point for point in postings[offsets[k] : offsets[k + 1]] if point not in found)
+    return found
+
+
+def test_index_ranks_like_a_linear_scan():
+    rng = random.Random(10)
+    points = []
+    for _ in range(600):
+        address = f"{rng.randrange(1, 400)} {rng.choice(STREETS)}"
+        label = rng.choice([address, address.upper(), f"Cafe {rng.choice(STREETS)}", None])
+        points.append({"label": label, "address": rng.choice([address, address, None]), "zip": rng.choice(ZIPS + [None])})
+    index = build_search_index(points)
+    assert index["count"] == len(points)
+
+    fields = [(point.get(key) or "").lower() for point in points for key in ("label", "address")]
+    fields = [field for field in fields if field]
+    queries = {"94110", "mission st 94107", "zzz 94114", "nowhere", "st ", "missio"}
+    for _ in range(400):
+        field = rng.choice(fields)
+        start = rng.randrange(len(field))
+        query = field[start : start + rng.randrange(GRAM, len(field) + 1)]
+        queries.add(query + rng.choice(["", "", " " + rng.choice(ZIPS)]))
+        queries.add(field)
+    for query in sorted(query for query in queries if len(query) >= GRAM):
+        assert indexed_find(index, points, query) == linear_scan(points, query), query
+
+    for prefix in ("1", "12", "cafe m", "mission", "3 ", "x"):
+        expected = {i for i, point in enumerate(points) if any((point.get(key) or "").lower().startswith(prefix) for key in ("label", "address"))}
+        assert set(suggest(index, prefix)) == expected
@@ -0,0 +1,70 @@
+import math
+import random
+from array import array
+
+from spatial_index import EARTH_RADIUS_KM, GridIndex, haversine_km
+
+RADII = (0.5, 1.0, 2.0)
+
+
+def brute_force(coordinates, weights, lat, lon):
+    distances = [(haversine_km(lat, lon, coordinates[2 * i], coordinates[2 * i + 1]), i) for i in range(len(weights))]
+    counts = [sum(1 for km, _ in distances if km <= radius) for radius in RADII]
+    totals = [sum(weights[i] for km, i in distances if km <= radius) for radius in RADII]
+    km, index = min(distances)
+    return counts, totals, (index, km)
+
+
+def test_radius_totals_and_nearest_match_brute_force():
+    rng = random.Random(20)
+    coordinates = array("d")
+    for _ in range(1500):
+        coordinates.extend((37.76 + rng.uniform(-0.03, 0.03), -122.44 + rng.uniform(-0.03, 0.03)))
+    # Duplicates tie on distance; nearest must keep the lower index.
+    coordinates.extend(coordinates[:20])
+    weights = array("d", (rng.uniform(0, 50) for _ in range(len(coordinates) // 2)))
+    index = GridIndex(coordinates, weights)
+
+    for _ in range(300):
+        if rng.random() < 0.3:
+            k = rng.randrange(len(weights))
+            lat, lon = coordinates[2 * k], coordinates[2 * k + 1]
+        else:
+            lat, lon = 37.76 + rng.uniform(-0.05, 0.05), -122.44 + rng.uniform(-0.05, 0.05)
+        counts, totals, nearest = brute_force(coordinates, weights, lat, lon)
+        got_counts, got_totals = index.radius_totals(lat, lon, RADII)
+        assert got_counts == counts
+        assert all(math.isclose(got, total, abs_tol=1e-6) for got, total in zip(got_totals, totals))
+        assert index.nearest(lat, lon) == nearest
+
+
+def destination(lat, lon, km, bearing):
+    phi, lam, angle, theta = math.radians(lat), math.radians(lon), km / EARTH_RADIUS_KM, math.radians(bearing)
+    phi2 = math.asin(math.sin(phi) * math.cos(angle) + math.cos(phi) * math.sin(angle) * math.cos(theta))
+    lam2 = lam + math.atan2(math.sin(theta) * math.sin(angle) * math.cos(phi), math.cos(angle) - math.sin(phi) * math.sin(phi2))
+    return math.degrees(phi2), math.degrees(lam2)
+
+
+def test_points_just_inside_each_radius_are_counted():
+    # Due east and west, 5 mm short of each radius: the longitude
+    # window must allow for the strip's smallest cosine, not its largest.
+    rng = random.Random(1)
+    queries = [(37.76 + rng.uniform(-0.02, 0.02), -122.44 + rng.uniform(-0.02, 0.02)) for _ in range(40)]
+    coordinates = array("d")
+    for lat, lon in queries:
+        for radius in RADII:
+            for bearing in (90, 270):
+                coordinates.extend(destination(lat, lon, radius - 5e-6, bearing))
+    weights = array("d", [1.0] * (len(coordinates) // 2))
+    index = GridIndex(coordinates, weights)
+
+    for lat, lon in queries:
+        counts, _, nearest = brute_force(coordinates, weights, lat, lon)
+        assert index.radius_totals(lat, lon, RADII)[0] == counts
+        assert index.nearest(lat, lon) == nearest
+
+
+def test_empty_layer():
+    index = GridIndex(array("d", [math.nan, math.nan]))
+    assert index.radius_totals(37.76, -122.44, RADII) == ([0, 0, 0], [0.0, 0.0, 0.0])
+    assert index.nearest(37.76, -122.44) is None